@@ -1,6 +1,67 @@
+import multiprocessing
+import os
 from flask import Flask
-from logging import FileHandler,WARNING
 
 app = Flask(__name__)
+app.config.from_mapping(
+    # where the scheduler state is kept between requests: "memory" (per worker process) or "sqlite" (shared)
+    SCHEDULER_SESSION_BACKEND="memory",
+    SCHEDULER_SESSION_TTL=4 * 60 * 60,
+    SCHEDULER_SESSION_MAX_ENTRIES=10000,
+    SCHEDULER_SESSION_DATABASE=os.path.join(app.instance_path, "scheduler_sessions.sqlite3"),
+    # pick ready courses with the longest chain of courses depending on them first, instead of by course number
+    SCHEDULER_RANK_BY_PREREQUISITE_CHAIN=False,
+    # seconds the optimizing mode may search for a schedule with fewer semesters than the greedy one
+    SCHEDULER_SEARCH_TIME_BUDGET=0.5,
+    # semesters after which a complete schedule that does not graduate is given up (some choices never graduate)
+    SCHEDULER_MAX_SEMESTERS=60,
+    # worker processes planning the profiles of /api/plans (None for one per CPU, 0 to plan in the request)
+    SCHEDULER_BATCH_WORKERS=None,
+    # seconds after which a single profile of a batch is given up
+    SCHEDULER_BATCH_PROFILE_TIMEOUT=30,
+    # complete schedules of new students kept per worker process (0 to plan every request) and for how many seconds
+    SCHEDULER_PLAN_CACHE_MAX_ENTRIES=1024,
+    SCHEDULER_PLAN_CACHE_TTL=6 * 60 * 60,
+    # plan the complete schedules of the most common new students into the plan cache at startup
+    SCHEDULER_WARM_UP=False,
+    # the choices combined (with every certificate) into those students, None for a schedule without summers
+    SCHEDULER_WARM_UP_SEMESTERS=["Fall", "Spring"],
+    SCHEDULER_WARM_UP_CREDITS=[12, 15, 18],
+    SCHEDULER_WARM_UP_SUMMER_CREDITS=[None, 6],
+    # seconds after which warming up a single student is given up
+    SCHEDULER_WARM_UP_PROFILE_TIMEOUT=2,
+    # where the compiled templates are kept between restarts and shared by the worker processes (None to disable)
+    SCHEDULER_TEMPLATE_CACHE_DIR=os.path.join(app.instance_path, "jinja_bytecode")
+)
+app.config.from_prefixed_env()
 
-from app import routes
\ No newline at end of file
+from app.middleware.template_cache import create_bytecode_cache
+app.jinja_env.bytecode_cache = create_bytecode_cache(app.config)
+
+from app.middleware.session_store import create_session_store
+scheduler_sessions = create_session_store(app.config)
+
+from app.middleware.plan_cache import create_plan_cache
+plan_results = create_plan_cache(app.config)
+
+from app.middleware.batch_planning import create_planning_pool
+planning_pool = create_planning_pool(app.config)
+
+from app import routes, commands
+from app.middleware.course_parsing import parse_courses, certificate_registry
+
+# load the compiled catalog (from the snapshot when it is up to date) before the first request
+parse_courses()
+certificate_registry()
+
+# compile the templates (from the bytecode cache when it is up to date) before the first request
+for template_name in app.jinja_env.list_templates():
+    app.jinja_env.get_template(template_name)
+
+# the worker processes of the planning pool import the app as well, only the server warms up its plan cache;
+# a worker imports it while loading its task, before `parent_process` is set but while it is still `_inheriting`
+if (app.config["SCHEDULER_WARM_UP"] and multiprocessing.parent_process() is None
+        and not getattr(multiprocessing.current_process(), "_inheriting", False)):
+    from app.middleware.plan_cache import warm_up
+    warm_up_summary = warm_up(plan_results, app.config, app.config["SCHEDULER_WARM_UP_PROFILE_TIMEOUT"])
+    app.logger.info("Warmed up the plan cache with %(planned)d schedules in %(seconds).1fs", warm_up_summary)
@@ -0,0 +1,64 @@
+import json
+import time
+
+import click
+
+from app import app
+from app.middleware.batch_planning import plan_cohort, planner_settings, read_profiles
+from app.middleware.catalog_snapshot import SNAPSHOT_PATH, write_snapshot
+from app.middleware.course_parsing import course_catalog_cache, certificate_registry_cache
+
+
+@app.cli.command('build-catalog-snapshot')
+@click.option('--output', default=SNAPSHOT_PATH, show_default=True, help='Where to write the snapshot.')
+def build_catalog_snapshot(output):
+    """Validate the catalog XML against its XSDs and write the compiled snapshot."""
+    try:
+        sources = write_snapshot([course_catalog_cache, certificate_registry_cache], output)
+    except ValueError as error:
+        raise click.ClickException(str(error))
+    for name, digest in sources.items():
+        click.echo(f"{name:<30}{digest[:12]}")
+    click.echo(f"Wrote catalog snapshot to {output}")
+
+
+@app.cli.command('precompile-templates')
+def precompile_templates():
+    """Compile every template under app/templates into the Jinja bytecode cache."""
+    bytecode_cache = app.jinja_env.bytecode_cache
+    if bytecode_cache is None:
+        raise click.ClickException("SCHEDULER_TEMPLATE_CACHE_DIR is not set or cannot be created, "
+                                   "there is no bytecode cache to fill")
+    # compile from the sources, not from the templates loaded when the app was created
+    bytecode_cache.clear()
+    app.jinja_env.cache.clear()
+    names = app.jinja_env.list_templates()
+    for name in names:
+        app.jinja_env.get_template(name)
+    click.echo(f"Compiled {len(names)} templates into {bytecode_cache.directory}")
+
+
+@app.cli.command('plan-bulk', with_appcontext=False)
+@click.argument('profiles', type=click.File('r'), default='-')
+@click.option('--format', 'input_format', type=click.Choice(['csv', 'jsonl']),
+              help='Format of the profiles, from the file extension by default (JSON lines for stdin).')
+@click.option('--output', '-o', type=click.File('w'), default='-', help='Where to write the schedules (JSON lines).')
+@click.option('--workers', type=int, help='Worker processes, one per CPU by default; 0 plans in this process.')
+@click.option('--timeout', type=float, default=30, show_default=True,
+              help='Seconds after which a single profile is given up.')
+def plan_bulk(profiles, input_format, output, workers, timeout):
+    """Plan the complete schedule of every student profile in a CSV or JSON lines file."""
+    if input_format is None:
+        input_format = 'csv' if profiles.name.lower().endswith('.csv') else 'jsonl'
+
+    planned = errors = 0
+    started = time.perf_counter()
+    for result in plan_cohort(read_profiles(profiles, input_format), workers, timeout, planner_settings(app.config)):
+        output.write(json.dumps(result) + '\n')
+        output.flush()
+        planned += 1
+        errors += 'error' in result
+    elapsed = time.perf_counter() - started
+    click.echo(f"Planned {planned} profiles ({errors} errors) in {elapsed:.1f}s, "
+               f"{planned / elapsed if elapsed else 0:.1f} profiles/s", err=True)
+
@@ -0,0 +1,393 @@
+import csv
+import json
+import multiprocessing
+import os
+import signal
+import threading
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, wait
+from concurrent.futures.process import BrokenProcessPool
+from contextlib import contextmanager
+from typing import Iterable, Iterator, Mapping, Optional, TextIO
+
+from app.middleware.course_model import TERM_BITS
+from app.middleware.course_parsing import UnschedulableError, catalog_version, certificate_choices, plan_semester
+from app.middleware.planning import PlanRequest, SchedulerState
+
+# profiles handed to each worker process ahead of the results that were read back
+PROFILES_IN_FLIGHT_PER_WORKER = 4
+
+# the settings of the app config the planner uses, copied to the worker processes
+PLANNER_SETTINGS = ("SCHEDULER_RANK_BY_PREREQUISITE_CHAIN", "SCHEDULER_SEARCH_TIME_BUDGET", "SCHEDULER_MAX_SEMESTERS")
+
+# profile fields that hold a list of courses, separated by `;` in a CSV file
+LIST_FIELDS = ("courses_taken", "waived_courses")
+# profile fields that are switched on or off
+FLAG_FIELDS = ("include_summer", "aleks_check", "optimize_schedule")
+
+
+class ProfileError(ValueError):
+    """
+    raised when a student profile cannot be planned, i.e. a missing or invalid field.
+    """
+
+
+class PlanningTimeout(Exception):
+    """
+    raised when planning a single profile takes longer than its time limit.
+    """
+
+
+def _integer(profile: Mapping, field: str, default: Optional[int] = None) -> int:
+    value = profile.get(field, default)
+    if value is None:
+        raise ProfileError(f"Missing field: {field}")
+    try:
+        return int(value)
+    except (TypeError, ValueError):
+        raise ProfileError(f"{field} must be a whole number, not {value!r}")
+
+
+def _course_list(profile: Mapping, field: str) -> list:
+    courses = profile.get(field) or []
+    if isinstance(courses, str):
+        courses = [courses]
+    if not all(isinstance(course, str) for course in courses):
+        raise ProfileError(f"{field} must be a list of course names (i.e. `CMP SCI 1250`)")
+    return list(courses)
+
+
+def _certificate_choice(certificate: Optional[str]) -> tuple:
+    for name, tag in certificate_choices():
+        if certificate in (name, tag) or (not certificate and not tag):
+            return name, tag
+    raise ProfileError(f"Unknown certificate: {certificate}")
+
+
+def profile_request(profile: Mapping) -> PlanRequest:
+    """
+    builds the request that plans a complete schedule for a student profile.
+
+    Parameters
+    ----------
+    profile:    Mapping
+                the student, with the fields (the names of the home page form where there is one):
+                - `current_semester`: the first term to plan, `Fall`, `Spring` or `Summer` (needed)
+                - `minimum_semester_credits`: credits per Fall and Spring semester (needed)
+                - `include_summer`, `minimum_summer_credits`: whether to plan summers and their credits
+                - `courses_taken`, `waived_courses`: lists of course names
+                - `certificate`: the name or XML tag of a certificate (see `certificate_choices`), none by default
+                - `total_credits`, `ge_taken`, `fe_taken`: credits earned so far
+                - `aleks_check`: True if the math placement exam was passed
+                - `min_3000_course`: 3000+ level electives needed, 5 by default
+                - `optimize_schedule`: True to search for the schedule with the fewest semesters
+                - `user_name`, `catalog_version`
+    Returns
+    ----------
+    PlanRequest
+                the request the home page sends for the same choices
+    """
+    if not isinstance(profile, Mapping):
+        raise ProfileError("A profile must be a JSON object")
+    current_semester = profile.get("current_semester")
+    if current_semester not in TERM_BITS:
+        raise ProfileError(f"Unknown semester: {current_semester}")
+
+    # the counters of the home page, at the values of a new schedule
+    state: SchedulerState = {
+        "current_semester": current_semester,
+        "semester_number": 0,
+        "num_3000_replaced_by_cert_core": 0,
+        "first_semester": "",
+        "semester_years": {},
+        "user_name": str(profile.get("user_name", "Student")),
+        "ge_taken": _integer(profile, "ge_taken", 0),
+        "fe_taken": _integer(profile, "fe_taken", 0),
+        "gen_ed_credits_still_needed": 27,
+        "cert_elective_courses_still_needed": 0,
+        "min_3000_course": _integer(profile, "min_3000_course", 5),
+        "total_credits": _integer(profile, "total_credits", 0),
+        "minimum_summer_credits": _integer(profile, "minimum_summer_credits", 0),
+        "catalog_version": profile.get("catalog_version") or catalog_version()
+    }
+    return PlanRequest(
+        state=state,
+        course_schedule=[],
+        minimum_semester_credits=_integer(profile, "minimum_semester_credits"),
+        generate_complete_schedule=True,
+        optimize_schedule=bool(profile.get("optimize_schedule")),
+        include_summer=bool(profile.get("include_summer")),
+        courses_taken=tuple(_course_list(profile, "courses_taken")),
+        waived_courses=tuple(_course_list(profile, "waived_courses")),
+        has_passed_math_placement_exam=bool(profile.get("aleks_check")),
+        certificate_choice=_certificate_choice(profile.get("certificate"))
+    )
+
+
+def planner_settings(config: Optional[Mapping] = None) -> dict:
+    """
+    returns the settings of the planner (see PLANNER_SETTINGS) from an app config, the config of the app by default.
+    """
+    if config is None:
+        from app import app
+        config = app.config
+    return {name: config[name] for name in PLANNER_SETTINGS}
+
+
+def plan_profile(profile: Mapping, settings: Optional[Mapping] = None) -> dict:
+    """
+    plans the complete schedule of a student profile (see `profile_request`).
+
+    Does not need a request or an app context, the settings of the planner are taken from the
+    app config unless they are given (see `planner_settings`).
+
+    Returns
+    ----------
+    dict
+                `catalog_version`, `is_graduated`, `total_credits`, the planned `semesters` (as shown on the
+                schedule page) and the `outstanding_requirements` if the student does not graduate
+    """
+    plan = profile_request(profile)
+    result = plan_semester(plan, planner_settings() if settings is None else settings)
+    return {
+        "catalog_version": plan.state["catalog_version"],
+        "is_graduated": result.is_graduated,
+        "total_credits": result.total_credits,
+        "semesters": result.course_schedule,
+        "outstanding_requirements": result.outstanding_requirements
+    }
+
+
+def _csv_profile(row: Mapping) -> dict:
+    profile = {}
+    for field, value in row.items():
+        if field is None or value is None or not value.strip():
+            continue
+        value = value.strip()
+        if field in LIST_FIELDS:
+            profile[field] = [course.strip() for course in value.split(";") if course.strip()]
+        elif field in FLAG_FIELDS:
+            profile[field] = value.lower() in ("1", "true", "yes", "y", "on")
+        else:
+            profile[field] = value
+    return profile
+
+
+def read_profiles(stream: TextIO, input_format: str = "jsonl") -> Iterator:
+    """
+    reads student profiles (see `profile_request`) one at a time from a file.
+
+    Parameters
+    ----------
+    stream:         TextIO
+                    the open file
+    input_format:   str
+                    "jsonl" for one JSON object per line, or "csv" for a header row with the field names
+                    followed by one profile per row (courses separated by `;`, flags as true/false)
+    Returns
+    ----------
+    Iterator
+                    the profiles; a line that cannot be read is yielded as a ProfileError, so it is reported
+                    in place of its schedule
+    """
+    if input_format == "csv":
+        for row in csv.DictReader(stream):
+            yield _csv_profile(row)
+    elif input_format == "jsonl":
+        for line_number, line in enumerate(stream, 1):
+            if not line.strip():
+                continue
+            try:
+                yield json.loads(line)
+            except ValueError as error:
+                yield ProfileError(f"Line {line_number} is not valid JSON: {error}")
+    else:
+        raise ValueError(f"Unknown profile format: {input_format}")
+
+
+@contextmanager
+def time_limit(seconds: Optional[float]):
+    """
+    raises a PlanningTimeout in the block it guards once it runs for longer than `seconds` (None for no limit).
+    """
+    # SIGALRM can only interrupt the main thread, elsewhere (i.e. a request thread) only the planner's own limit on
+    # the number of semesters (SCHEDULER_MAX_SEMESTERS) applies
+    if not seconds or not hasattr(signal, "SIGALRM") or threading.current_thread() is not threading.main_thread():
+        yield
+        return
+
+    def timed_out(signum, frame):
+        raise PlanningTimeout(f"Planning took longer than {seconds} seconds")
+
+    previous_handler = signal.signal(signal.SIGALRM, timed_out)
+    signal.setitimer(signal.ITIMER_REAL, seconds)
+    try:
+        yield
+    finally:
+        signal.setitimer(signal.ITIMER_REAL, 0)
+        signal.signal(signal.SIGALRM, previous_handler)
+
+
+def _plan_indexed(index: int, profile: Mapping, timeout: Optional[float], settings: Mapping) -> dict:
+    result = {"index": index, "id": profile.get("id") if isinstance(profile, Mapping) else None}
+    try:
+        if isinstance(profile, ProfileError):
+            raise profile
+        with time_limit(timeout):
+            result.update(plan_profile(profile, settings))
+    except (ProfileError, PlanningTimeout, UnschedulableError) as error:
+        result["error"] = str(error)
+    except Exception as error:
+        result["error"] = f"{type(error).__name__}: {error}"
+    return result
+
+
+def _pool_context():
+    # forking the server would copy the threads of its other requests into the workers; the workers of a fork server
+    # or spawned ones import the app (and load its compiled catalog) once when they start and are reused afterwards
+    if "forkserver" in multiprocessing.get_all_start_methods():
+        return multiprocessing.get_context("forkserver")
+    return multiprocessing.get_context("spawn")
+
+
+class PlanningPool:
+    """
+    The worker processes that plan the profiles of every batch (see `plan_cohort`), started by the
+    first batch and reused by the next ones.
+
+    If a worker dies (i.e. it is killed for running out of memory) the processes are replaced by
+    new ones for the next batch.
+    """
+
+    def __init__(self, workers: int):
+        """
+        Parameters
+        ----------
+        workers:    int
+                    number of worker processes
+        """
+        self.workers = workers
+        self._executor = None
+        self._lock = threading.Lock()
+
+    def executor(self) -> ProcessPoolExecutor:
+        """
+        returns the executor of the worker processes, which start when the first profile is submitted.
+        """
+        with self._lock:
+            if self._executor is None:
+                self._executor = ProcessPoolExecutor(max_workers=self.workers, mp_context=_pool_context())
+            return self._executor
+
+    def discard(self, executor: ProcessPoolExecutor) -> None:
+        """
+        drops a broken executor, the next batch starts new worker processes.
+        """
+        with self._lock:
+            if self._executor is executor:
+                self._executor = None
+        executor.shutdown(wait=False, cancel_futures=True)
+
+    def shutdown(self) -> None:
+        """
+        stops the worker processes once the profiles they were given are planned.
+        """
+        with self._lock:
+            executor, self._executor = self._executor, None
+        if executor is not None:
+            executor.shutdown(cancel_futures=True)
+
+
+def create_planning_pool(config: Mapping) -> Optional[PlanningPool]:
+    """
+    creates the worker processes shared by the batches of /api/plans from the app config, None when
+    SCHEDULER_BATCH_WORKERS is 0 (the profiles are planned in the request).
+    """
+    workers = config["SCHEDULER_BATCH_WORKERS"]
+    if workers is None:
+        workers = os.cpu_count() or 1
+    return PlanningPool(workers) if workers > 0 else None
+
+
+def _broken_pool_result(index: int, profile: Mapping, error: BrokenProcessPool) -> dict:
+    return {"index": index, "id": profile.get("id") if isinstance(profile, Mapping) else None,
+            "error": f"The worker processes stopped before the profile was planned: {error}"}
+
+
+def plan_cohort(profiles: Iterable[Mapping], workers: Optional[int] = None, timeout: Optional[float] = None,
+                settings: Optional[Mapping] = None, pool: Optional[PlanningPool] = None) -> Iterator[dict]:
+    """
+    plans the complete schedules of many student profiles across a pool of worker processes.
+
+    The results are yielded as soon as each profile is planned, so they come back out of order;
+    `index` is the position of the profile in `profiles` and `id` is copied from the profile. Only
+    a few profiles per worker are read ahead of the results, so `profiles` may be a long generator.
+    If the worker processes stop, every profile that was not planned yet gets an `error`.
+
+    Parameters
+    ----------
+    profiles:   Iterable
+                the student profiles (see `profile_request`)
+    workers:    int, optional
+                number of worker processes started for these profiles when no `pool` is given, the
+                number of CPUs by default; 0 plans in this process
+    timeout:    float, optional
+                seconds after which a single profile is given up
+    settings:   Mapping, optional
+                the settings of the planner, from the app config by default (see `planner_settings`)
+    pool:       PlanningPool, optional
+                the worker processes to plan the profiles with, which are left running for the next batch
+    Returns
+    ----------
+    Iterator
+                one dictionary per profile, the result of `plan_profile` or an `error` message
+    """
+    settings = planner_settings() if settings is None else dict(settings)
+    if pool is None:
+        if workers is None:
+            workers = os.cpu_count() or 1
+        if workers <= 0:
+            for index, profile in enumerate(profiles):
+                yield _plan_indexed(index, profile, timeout, settings)
+            return
+        own_pool = pool = PlanningPool(workers)
+    else:
+        own_pool = None
+
+    executor = pool.executor()
+    in_flight = {}
+    broken = None
+
+    def finished() -> Iterator[dict]:
+        nonlocal broken
+        done, _ = wait(in_flight, return_when=FIRST_COMPLETED)
+        for future in done:
+            index, profile = in_flight.pop(future)
+            try:
+                yield future.result()
+            except BrokenProcessPool as error:
+                broken = error
+                yield _broken_pool_result(index, profile, error)
+
+    try:
+        for index, profile in enumerate(profiles):
+            if broken is not None:
+                yield _broken_pool_result(index, profile, broken)
+                continue
+            try:
+                in_flight[executor.submit(_plan_indexed, index, profile, timeout, settings)] = (index, profile)
+            except BrokenProcessPool as error:
+                broken = error
+                yield _broken_pool_result(index, profile, error)
+                continue
+            if len(in_flight) >= pool.workers * PROFILES_IN_FLIGHT_PER_WORKER:
+                yield from finished()
+        while in_flight:
+            yield from finished()
+    finally:
+        # the caller may stop reading early, the profiles that were not started are dropped
+        for future in in_flight:
+            future.cancel()
+        if broken is not None:
+            pool.discard(executor)
+        if own_pool is not None:
+            own_pool.shutdown()
@@ -0,0 +1,113 @@
+import gzip
+import hashlib
+import os
+import threading
+from typing import Callable, Hashable, Iterable
+
+from flask import Response
+
+from app.middleware.lru_cache import LRUCache
+
+# gzip level of the bodies compressed ahead of time, they are compressed once and sent many times
+GZIP_LEVEL = 9
+
+
+class CachedBody:
+    """
+    A response body built once and sent to every request, kept next to its gzip encoding.
+
+    The ETag identifies the content, each encoding gets its own variant of it (see `etag_for`)
+    so caches never answer a request with the encoding another client asked for.
+    """
+
+    __slots__ = ('body', 'gzipped', 'etag', 'content_type')
+
+    def __init__(self, body: bytes, content_type: str, etag: str = None):
+        """
+        Parameters
+        ----------
+        body:           bytes
+                        the response body
+        content_type:   str
+                        the mimetype of the body (with its charset)
+        etag:           str, optional
+                        the ETag of the body, a hash of the body by default
+        """
+        self.body = body
+        self.gzipped = gzip.compress(body, GZIP_LEVEL, mtime=0)
+        self.etag = etag or hashlib.sha256(body).hexdigest()[:32]
+        self.content_type = content_type
+
+    def etag_for(self, gzipped: bool) -> str:
+        return f"{self.etag}-gzip" if gzipped else self.etag
+
+
+def cached_response(request, cached: CachedBody, max_age: int, immutable: bool = False) -> Response:
+    """
+    builds the response for a cached body: gzip encoded if the client accepts it, and a bodiless
+    304 Not Modified if the client already has the same variant (`If-None-Match`).
+
+    Parameters
+    ----------
+    request:        Request
+                    the request being answered
+    cached:         CachedBody
+                    the body to send
+    max_age:        int
+                    seconds the client may use its copy without asking again
+    immutable:      bool
+                    True if the URL always serves the same body (i.e. it names the version of the content)
+    Returns
+    ----------
+    Response
+    """
+    gzipped = bool(request.accept_encodings["gzip"])
+    etag = cached.etag_for(gzipped)
+    if request.if_none_match.contains(etag):
+        response = Response(status=304)
+    else:
+        response = Response(cached.gzipped if gzipped else cached.body, content_type=cached.content_type)
+        if gzipped:
+            response.content_encoding = "gzip"
+    response.set_etag(etag)
+    response.vary.add("Accept-Encoding")
+    response.cache_control.public = True
+    response.cache_control.max_age = max_age
+    if immutable:
+        response.cache_control.immutable = True
+    return response
+
+
+def template_signature(app, names: Iterable[str]) -> tuple:
+    """
+    returns the modification times of templates of `app`, which change whenever one of the templates is edited.
+    """
+    folder = os.path.join(app.root_path, app.template_folder)
+    return tuple(os.stat(os.path.join(folder, name)).st_mtime_ns for name in names)
+
+
+class PageCache:
+    """
+    Keeps rendered pages that only depend on a few values (i.e. the catalog version and the templates).
+
+    A page is rendered once per key and kept as a CachedBody, so it is also compressed once
+    and can be answered with a 304 through `cached_response`.
+    """
+
+    def __init__(self, max_entries: int = 4):
+        self._pages = LRUCache(max_entries)
+        self._lock = threading.Lock()
+
+    def get(self, key: Hashable, render: Callable[[], str]) -> CachedBody:
+        """
+        returns the page stored for `key`, rendering it with `render` the first time.
+        """
+        page = self._pages.get(key)
+        if page is None:
+            # one request renders the page, requests arriving meanwhile wait for it instead of rendering it again
+            with self._lock:
+                page = self._pages.get(key)
+                if page is None:
+                    page = CachedBody(render().encode("utf-8"), "text/html; charset=utf-8")
+                    self._pages.put(key, page)
+        return page
@@ -0,0 +1,54 @@
+import json
+
+from app.middleware.cached_responses import CachedBody
+from app.middleware.course_parsing import catalog_for_version
+from app.middleware.lru_cache import LRUCache
+
+# the assets of the catalog versions served recently (only the current one is served, the previous one is
+# kept while pages built from it are still being answered)
+_assets = LRUCache(max_entries=2)
+
+
+def home_page_courses(version: str) -> list:
+    """
+    returns the courses of a catalog version as listed on the home page, sorted by course name.
+
+    Built once per catalog version and shared by every request: the list is read-only.
+
+    Parameters
+    ----------
+    version:    str
+                the catalog version id (see `catalog_version`)
+    Returns
+    ----------
+    list
+                one dictionary per course with its `course` name, `credits`, `course_number` and
+                `prerequisite_description`; raises a CatalogVersionError if `version` is retired
+    """
+    return _catalog_assets(version)[0]
+
+
+def catalog_json(version: str) -> CachedBody:
+    """
+    returns the courses of `home_page_courses` as a JSON body (with its gzip encoding), serialized once per
+    catalog version. Its ETag is the catalog version.
+    """
+    return _catalog_assets(version)[1]
+
+
+def _catalog_assets(version: str) -> tuple:
+    assets = _assets.get(version)
+    if assets is None:
+        courses = []
+        for course, info in catalog_for_version(version).items():
+            courses.append({
+                "course": course,
+                "credits": info["credit"],
+                "course_number": info["course_number"],
+                "prerequisite_description": info.get("prerequisite_description", "")
+            })
+        courses.sort(key=lambda course: course["course"])
+        body = json.dumps(courses).encode("utf-8")
+        assets = (courses, CachedBody(body, "application/json", etag=version))
+        _assets.put(version, assets)
+    return assets
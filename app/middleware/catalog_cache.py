@@ -0,0 +1,226 @@
+import copy
+import hashlib
+import os
+import threading
+from collections.abc import Mapping, Sequence
+from typing import Any, BinaryIO, Callable, Optional
+
+# bytes read at a time when a file is hashed
+_CHUNK_SIZE = 64 * 1024
+
+
+class FrozenDict(dict):
+    """
+    A dictionary that cannot be modified after it is built.
+
+    The compiled catalog is shared by every request in the process, so the
+    values handed out by the cache are frozen. Any attempt to write to them
+    raises a TypeError instead of silently leaking into the next request.
+
+    `copy.deepcopy` returns a regular (mutable) dictionary so that callers who
+    need to change the data can take a private copy first.
+    """
+
+    def _read_only(self, *args, **kwargs):
+        raise TypeError(f"'{type(self).__name__}' object is read-only")
+
+    __setitem__ = _read_only
+    __delitem__ = _read_only
+    __ior__ = _read_only
+    clear = _read_only
+    pop = _read_only
+    popitem = _read_only
+    setdefault = _read_only
+    update = _read_only
+
+    def __reduce__(self):
+        return (type(self), (dict(self),))
+
+    def __copy__(self) -> dict:
+        return dict(self)
+
+    def __deepcopy__(self, memo) -> dict:
+        return thaw(self)
+
+
+def freeze(value: Any) -> Any:
+    """
+    recursively converts dictionaries to FrozenDicts and lists to tuples.
+
+    Parameters
+    ----------
+    value:      Any
+                the parsed data to freeze
+    Returns
+    ----------
+    Any
+                a read-only version of `value`
+    """
+    if isinstance(value, dict):
+        return FrozenDict((key, freeze(item)) for key, item in value.items())
+    if isinstance(value, (list, tuple)):
+        return tuple(freeze(item) for item in value)
+    return value
+
+
+def thaw(value: Any) -> Any:
+    """
+    recursively converts frozen data back into regular dictionaries and lists.
+
+    Parameters
+    ----------
+    value:      Any
+                data returned by `freeze` (or read from a catalog snapshot)
+    Returns
+    ----------
+    Any
+                a private, mutable copy of `value`
+    """
+    if isinstance(value, dict):
+        return {key: thaw(item) for key, item in value.items()}
+    if isinstance(value, (list, tuple)):
+        return [thaw(item) for item in value]
+    if isinstance(value, (Mapping, Sequence)) and not isinstance(value, (str, bytes)):
+        # the read-only views of a catalog snapshot copy themselves (see `MappedTable.copy`)
+        return copy.deepcopy(value)
+    return value
+
+
+class CompiledFileCache:
+    """
+    Process-wide cache for data compiled from a single file.
+
+    The file is compiled on first use and the frozen result is shared by every
+    caller. On each lookup the file's modification time and size are checked;
+    if they changed, the file is re-read and hashed, and it is only recompiled
+    when the content hash is different from the one that was compiled last.
+
+    When a `precompiled` lookup is given, it is asked for data matching the
+    content hash before the file is compiled (i.e. from a catalog snapshot).
+
+    A `streaming` compile function is given the open file instead of its text,
+    so large files are never held in memory as a whole.
+    """
+
+    def __init__(self, path: str, compile_function: Callable[[Any], Any],
+                 precompiled: Optional[Callable[[str, str], Any]] = None, streaming: bool = False):
+        """
+        Parameters
+        ----------
+        path:               str
+                            location of the file to compile
+        compile_function:   Callable
+                            turns the text of the file (or the binary file, if `streaming`) into the compiled data
+        precompiled:        Callable, optional
+                            called with the file name and content hash, returns read-only data that was
+                            already compiled from that exact content, or None
+        streaming:          bool
+                            True if `compile_function` reads the file itself
+        """
+        self.path = path
+        self.name = os.path.basename(path)
+        self.compile_function = compile_function
+        self.precompiled = precompiled
+        self.streaming = streaming
+        self._lock = threading.Lock()
+        # (file signature, content hash, compiled data), replaced as a whole so readers never see a partial update
+        self._entry = None
+
+    def _signature(self) -> tuple:
+        stat = os.stat(self.path)
+        return stat.st_mtime_ns, stat.st_size
+
+    def _load(self) -> tuple:
+        signature = self._signature()
+        entry = self._entry
+        if entry is not None and entry[0] == signature:
+            return entry
+
+        with self._lock:
+            # another thread may have rebuilt the entry while we were waiting
+            entry = self._entry
+            if entry is not None and entry[0] == signature:
+                return entry
+
+            with open(self.path, 'rb') as fd:
+                reader = _HashingReader(fd)
+                reader.read_all()
+            digest = reader.hexdigest()
+
+            if entry is not None and entry[1] == digest:
+                # file was touched but its content is the same, keep the compiled data
+                entry = (signature, digest, entry[2])
+            else:
+                compiled = self.precompiled(self.name, digest) if self.precompiled else None
+                if compiled is None:
+                    # the hash of the content that was compiled, in case the file changed in the meantime
+                    digest, compiled = self.compile_file()
+                entry = (signature, digest, compiled)
+            self._entry = entry
+            return entry
+
+    def compile_file(self) -> tuple:
+        """
+        compiles the file from scratch, without looking at the cache or any precompiled data.
+
+        Returns
+        ----------
+        tuple
+                    the sha256 hash of the file content and the frozen compiled data
+        """
+        with open(self.path, 'rb') as fd:
+            if not self.streaming:
+                content = fd.read()
+                return hashlib.sha256(content).hexdigest(), freeze(self.compile_function(content.decode('utf-8')))
+            reader = _HashingReader(fd)
+            compiled = self.compile_function(reader)
+            # hash anything the compile function did not read (i.e. after the root element)
+            reader.read_all()
+        return reader.hexdigest(), freeze(compiled)
+
+    def get(self) -> Any:
+        """
+        returns the compiled (read-only) data, rebuilding it if the file changed.
+        """
+        return self._load()[2]
+
+    def get_versioned(self) -> tuple:
+        """
+        returns the content hash and the compiled data together, both from the same version of the file.
+        """
+        entry = self._load()
+        return entry[1], entry[2]
+
+    @property
+    def digest(self) -> str:
+        """
+        the sha256 hash of the file content the current data was compiled from.
+        """
+        return self._load()[1]
+
+    def clear(self) -> None:
+        """
+        forgets the compiled data so the next lookup compiles the file again.
+        """
+        with self._lock:
+            self._entry = None
+
+
+class _HashingReader:
+    # file wrapper that hashes every byte read from it, so a file is hashed and parsed in a single pass
+
+    def __init__(self, fd: BinaryIO):
+        self._fd = fd
+        self._hash = hashlib.sha256()
+
+    def read(self, size: int = -1) -> bytes:
+        data = self._fd.read(size)
+        self._hash.update(data)
+        return data
+
+    def read_all(self) -> None:
+        while self.read(_CHUNK_SIZE):
+            pass
+
+    def hexdigest(self) -> str:
+        return self._hash.hexdigest()
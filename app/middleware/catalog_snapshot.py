@@ -0,0 +1,155 @@
+import logging
+import os
+import struct
+import threading
+from typing import Any, Iterable, Mapping, Optional
+
+from app.middleware.mapped_catalog import MappedTable, write_table
+
+logger = logging.getLogger(__name__)
+
+XML_ROOT = os.path.join(os.path.dirname(os.path.dirname(__file__)), 'xml')
+SNAPSHOT_PATH = os.path.join(XML_ROOT, 'catalog.snapshot')
+
+# the schema each XML file is validated against before it is written to a snapshot
+XML_SCHEMAS = {
+    'course_data.xml': 'course_data.xsd',
+    'cscertificate_data.xml': 'cscertificate_schema.xsd'
+}
+
+# bump SNAPSHOT_FORMAT_VERSION whenever the shape of the compiled catalog changes,
+# so snapshots written by older code are ignored instead of loaded
+SNAPSHOT_MAGIC = b'CSCATSNP'
+SNAPSHOT_FORMAT_VERSION = 2
+_HEADER = struct.Struct('<8sH2x')
+
+_lock = threading.Lock()
+_loaded = None  # (file signature, snapshot contents) of the last snapshot read
+
+
+def validate_xml(xml_path: str) -> None:
+    """
+    validates an XML file against its XSD (see XML_SCHEMAS).
+
+    Parameters
+    ----------
+    xml_path:       str
+                    location of the XML file
+    Returns
+    ----------
+    None
+                    raises a ValueError listing the problems if the file does not match its schema
+    """
+    # lxml is only needed by the build step, not by the workers that load the snapshot
+    from lxml import etree
+
+    xsd_path = os.path.join(os.path.dirname(xml_path), XML_SCHEMAS[os.path.basename(xml_path)])
+    schema = etree.XMLSchema(etree.parse(xsd_path))
+    if not schema.validate(etree.parse(xml_path)):
+        errors = "\n".join(f"  line {error.line}: {error.message}" for error in schema.error_log)
+        raise ValueError(f"{os.path.basename(xml_path)} does not match {os.path.basename(xsd_path)}:\n{errors}")
+
+
+def write_snapshot(caches: Iterable, path: str = SNAPSHOT_PATH) -> dict:
+    """
+    validates and compiles each cached XML file, then writes them all to a binary snapshot.
+
+    The snapshot is a small header (magic bytes and format version) followed by a table
+    (see `write_table`) of the compiled data and the sha256 hash of each source file, which
+    every worker process maps into memory instead of loading its own copy.
+
+    Parameters
+    ----------
+    caches:     Iterable
+                the CompiledFileCache of each XML file to include
+    path:       str
+                where to write the snapshot
+    Returns
+    ----------
+    dict
+                the sha256 hash of each file written to the snapshot, keyed by file name
+    """
+    sources = {}
+    compiled = {}
+    for cache in caches:
+        validate_xml(cache.path)
+        sources[cache.name], compiled[cache.name] = cache.compile_file()
+
+    # write to a temporary file first so workers never read a half-written snapshot, and the
+    # snapshot that workers have mapped into memory is replaced rather than overwritten
+    temp_path = path + '.tmp'
+    with open(temp_path, 'wb') as fd:
+        fd.write(_HEADER.pack(SNAPSHOT_MAGIC, SNAPSHOT_FORMAT_VERSION))
+        write_table({'sources': sources, 'compiled': compiled}, fd)
+    os.replace(temp_path, path)
+    return sources
+
+
+def read_snapshot(path: str = SNAPSHOT_PATH) -> Optional[dict]:
+    """
+    maps a snapshot written by `write_snapshot` into memory.
+
+    Returns
+    ----------
+    Mapping or None
+                read-only `sources` and `compiled` dictionaries keyed by file name (see `MappedTable`),
+                or None when the snapshot does not exist, was written in another format version or
+                cannot be read
+    """
+    try:
+        with open(path, 'rb') as fd:
+            header = fd.read(_HEADER.size)
+            if len(header) < _HEADER.size:
+                return None
+            magic, format_version = _HEADER.unpack(header)
+            if magic != SNAPSHOT_MAGIC or format_version != SNAPSHOT_FORMAT_VERSION:
+                logger.warning("Ignoring catalog snapshot %s: unsupported format", path)
+                return None
+            table = MappedTable(fd, _HEADER.size)
+    except FileNotFoundError:
+        return None
+    except (OSError, ValueError) as error:
+        logger.warning("Ignoring catalog snapshot %s: %s", path, error)
+        return None
+    return table.value(table.root)
+
+
+def _current_snapshot() -> Optional[Mapping]:
+    global _loaded
+    try:
+        stat = os.stat(SNAPSHOT_PATH)
+    except FileNotFoundError:
+        return None
+    signature = (stat.st_mtime_ns, stat.st_size)
+
+    with _lock:
+        if _loaded is None or _loaded[0] != signature:
+            _loaded = (signature, read_snapshot(SNAPSHOT_PATH))
+        return _loaded[1]
+
+
+def snapshot_lookup(name: str, digest: str) -> Any:
+    """
+    returns the compiled data for an XML file from the snapshot, if the snapshot is up to date.
+
+    Used as the `precompiled` lookup of a CompiledFileCache.
+
+    Parameters
+    ----------
+    name:       str
+                file name of the XML file (i.e. `course_data.xml`)
+    digest:     str
+                sha256 hash of the current content of the XML file
+    Returns
+    ----------
+    Any
+                the read-only compiled data, or None if there is no snapshot or it was built
+                from a different version of the file
+    """
+    snapshot = _current_snapshot()
+    if snapshot is None or name not in snapshot['sources']:
+        return None
+    if snapshot['sources'][name] != digest:
+        logger.warning("Catalog snapshot is stale for %s, compiling from XML", name)
+        return None
+    return snapshot['compiled'][name]
@@ -0,0 +1,375 @@
+import sys
+from collections.abc import Mapping
+from itertools import chain
+from typing import Iterable, Optional
+
+from app.middleware.lru_cache import LRUCache
+
+# each term a course can be offered in is one bit of `Course.terms`
+TERM_BITS = {
+    'Fall': 1,
+    'Spring': 2,
+    'Summer': 4
+}
+
+# courses that also need a minimum number of earned credits before they can be taken
+MINIMUM_CREDITS_FOR_COURSE = {
+    'ENGLISH 3130': 48
+}
+
+# courses that must be taken by a given semester of the schedule (counted from 0), with how the limit is shown
+LATEST_SEMESTER_FOR_COURSE = {
+    'INTDSC 1003': (0, "the first semester"),
+    'CMP SCI 1000': (1, "the first or second semester")
+}
+
+
+def compile_prerequisites(prerequisite: tuple, concurrent: Optional[int], minimum_credits: int) -> tuple:
+    """
+    compiles the prerequisites of a course into an OR of AND clauses over course id bitmasks.
+
+    Each clause is a tuple `(mask, strict_mask, minimum_credits)`. It is satisfied when every course
+    of `mask` has been taken, no course of `strict_mask` is taken in the current semester and at
+    least `minimum_credits` credits have been earned. The course is ready when any clause is satisfied.
+
+    The clauses follow how the scheduler has always read the shape built by `build_prerequisites`:
+    - a list of courses is a clause of its own
+    - of the single courses (strings) outside a list only the last one is checked
+    - a course with a minimum number of credits (ENGLISH 3130) can be taken together with a single
+      prerequisite, once any of them has been taken
+    - the `concurrent` course of a course may be taken in the same semester
+
+    Parameters
+    ----------
+    prerequisite:       tuple
+                        the prerequisites as course ids, in the shape of `build_prerequisites`
+    concurrent:         int, optional
+                        id of the course that can be taken in the same semester
+    minimum_credits:    int
+                        credits that must be earned before the course can be taken, 0 for none
+    Returns
+    ----------
+    tuple
+                        the clauses; a course without prerequisites has one clause that is always satisfied
+    """
+    if not prerequisite:
+        return ((0, 0, 0),)
+
+    concurrent_bit = 1 << concurrent if concurrent is not None else 0
+    clauses = []
+    last_single = None
+    for prereqs in prerequisite:
+        if isinstance(prereqs, int):
+            if minimum_credits:
+                clauses.append((1 << prereqs, 0, minimum_credits))
+            else:
+                last_single = 1 << prereqs
+        else:
+            mask = 0
+            for prereq in prereqs:
+                mask |= 1 << prereq
+            clauses.append((mask, mask & ~concurrent_bit, 0))
+            if len(prereqs) > 1:
+                last_single = None
+    if last_single is not None:
+        clauses.append((last_single, last_single & ~concurrent_bit, 0))
+    return tuple(clauses)
+
+
+def choose_prerequisites(prerequisite: tuple, in_catalog) -> tuple:
+    """
+    picks the prerequisites that are planned for a course when none of its prerequisites are taken or planned.
+
+    The first usable entry of `prerequisite` is picked: a single course, or a list of courses
+    if every course of the list is in the catalog (a list naming a course that cannot be
+    scheduled is skipped).
+
+    Parameters
+    ----------
+    prerequisite:       tuple
+                        the prerequisites as course ids, in the shape of `build_prerequisites`
+    in_catalog:         Callable
+                        returns True if a course id is a course of the catalog
+    Returns
+    ----------
+    tuple
+                        ids of the picked prerequisites, empty if there is nothing to pick
+    """
+    for prereqs in prerequisite:
+        if isinstance(prereqs, int):
+            return (prereqs,)
+        if len(prereqs) == 1 or all(in_catalog(prereq) for prereq in prereqs):
+            return tuple(dict.fromkeys(prereqs))
+    return ()
+
+
+class Course:
+    """
+    Compact, read-only record of a single course.
+
+    Courses are identified by a dense integer id (their position in
+    `CourseModel.courses`), and prerequisites refer to other courses by id:
+    a string in the parsed catalog becomes an int and a list of courses
+    becomes a tuple of ints, so the shape built by `build_prerequisites` is kept.
+    The scheduler checks `clauses`, the same prerequisites compiled into bitmasks
+    (see `compile_prerequisites`).
+    """
+
+    __slots__ = ('id', 'key', 'subject', 'course_number', 'credit', 'terms', 'prerequisite', 'concurrent',
+                 'minimum_credits', 'clauses', 'options', 'required', 'info')
+
+    def __init__(self, course_id: int, key: str, info: Mapping, prerequisite: tuple, concurrent: Optional[int]):
+        self.id = course_id
+        self.key = key
+        self.subject = sys.intern(info['subject'])
+        self.course_number = info['course_number']
+        # None for courses with a variable number of credits (i.e. `1-3`), which are never scheduled automatically
+        self.credit = int(info['credit']) if info['credit'].isdigit() else None
+        self.terms = terms_mask(info['semesters_offered'])
+        self.prerequisite = prerequisite
+        self.concurrent = concurrent
+        self.minimum_credits = MINIMUM_CREDITS_FOR_COURSE.get(key, 0)
+        self.clauses = compile_prerequisites(prerequisite, concurrent, self.minimum_credits)
+        # one bitmask per entry of `prerequisite`, any of which is enough when deciding which prerequisites to plan
+        self.options = tuple(1 << prereqs if isinstance(prereqs, int) else sum(1 << prereq for prereq in set(prereqs))
+                             for prereqs in prerequisite)
+        self.required = info.get('required') == 'true'
+        # the parsed (read-only) course dictionary, only used to render the course
+        self.info = info
+
+    def is_offered(self, term_bit: int) -> bool:
+        return bool(self.terms & term_bit)
+
+    def is_ready(self, courses_taken: 'TakenCourses', credits_earned: int) -> bool:
+        """
+        returns True if the prerequisites are met to add the course to the current semester.
+        """
+        taken = courses_taken.mask
+        this_semester = courses_taken.semester_mask
+        for mask, strict_mask, minimum_credits in self.clauses:
+            if taken & mask == mask and not this_semester & strict_mask and credits_earned >= minimum_credits:
+                return True
+        return False
+
+    def __repr__(self) -> str:
+        return f"Course({self.id}, {self.key!r})"
+
+
+def terms_mask(semesters_offered) -> int:
+    """
+    converts the `semesters_offered` of a parsed course (one term or a list of terms) to a bitmask of TERM_BITS.
+    """
+    if isinstance(semesters_offered, str):
+        semesters_offered = [semesters_offered]
+    mask = 0
+    for term in semesters_offered:
+        mask |= TERM_BITS[term]
+    return mask
+
+
+class CourseModel:
+    """
+    The courses a schedule is planned from, each with a dense integer id.
+
+    Ids `0 .. len(courses) - 1` are the courses of the catalog, in catalog order.
+    Names that only appear as prerequisites (i.e. `INFSYS 3806` or the `ALEKS`
+    placement exam) get the ids after that, so they can be tracked as taken
+    like any other course. The planner works on ids only; `names` maps them
+    back to display strings when the result is rendered.
+
+    `dependents[i]` lists the courses whose prerequisites mention id `i`, so a
+    planner only has to look at those courses again when `i` is taken.
+    `same_semester_dependents[i]` is the part of them that may be taken in the
+    same semester as `i` (i.e. `i` is their concurrent course).
+
+    The prerequisites of every course are also followed ahead of time, in
+    `prerequisite_order` (every id after all of its prerequisites):
+    `prerequisite_choice[i]` are the courses planned for `i` when a student has
+    none of its prerequisites (see `choose_prerequisites`), `prerequisite_closure[i]`
+    is a bitmask of those courses and, transitively, of their own choices, and
+    `chain_length[i]` is the length of the longest chain of courses that build on
+    `i` and lead to a required course (0 if no required course needs `i`).
+
+    Models are cached per catalog version and certificate (see `course_model_for`),
+    so these indexes are only built once for each of them.
+    """
+
+    __slots__ = ('courses', 'names', 'ids', 'dependents', 'same_semester_dependents', 'prerequisite_order',
+                 'prerequisite_choice', 'prerequisite_closure', 'chain_length')
+
+    def __init__(self, courses: Mapping):
+        """
+        Parameters
+        ----------
+        courses:    Mapping
+                    the parsed courses (see `build_dictionary`), keyed by subject and course number
+        """
+        self.names = list(courses.keys())
+        self.ids = {name: course_id for course_id, name in enumerate(self.names)}
+
+        self.courses = []
+        for course_id, (key, info) in enumerate(courses.items()):
+            prerequisite = tuple(
+                self._intern(prereq) if isinstance(prereq, str) else tuple(self._intern(name) for name in prereq)
+                for prereq in info['prerequisite']
+            )
+            concurrent = self._intern(info['concurrent']) if 'concurrent' in info else None
+            self.courses.append(Course(course_id, key, info, prerequisite, concurrent))
+
+        dependents = [[] for _ in self.names]
+        same_semester_dependents = [[] for _ in self.names]
+        for course in self.courses:
+            for prereq in dict.fromkeys(chain.from_iterable((p,) if isinstance(p, int) else p for p in course.prerequisite)):
+                dependents[prereq].append(course.id)
+                bit = 1 << prereq
+                if any(mask & bit and not strict_mask & bit for mask, strict_mask, _ in course.clauses):
+                    same_semester_dependents[prereq].append(course.id)
+        self.dependents = tuple(tuple(courses) for courses in dependents)
+        self.same_semester_dependents = tuple(tuple(courses) for courses in same_semester_dependents)
+
+        self.prerequisite_choice = tuple(
+            choose_prerequisites(self.courses[course_id].prerequisite, self.in_catalog) if self.in_catalog(course_id) else ()
+            for course_id in range(len(self.names))
+        )
+        self.prerequisite_order = order = tuple(self._prerequisite_order())
+        # prerequisites come first in `order`, so their closure is complete when a course that needs them is reached
+        closure = [0] * len(self.names)
+        for course_id in order:
+            for prereq in self.prerequisite_choice[course_id]:
+                closure[course_id] |= 1 << prereq | closure[prereq]
+        self.prerequisite_closure = tuple(closure)
+        # and the courses that build on a course come after it
+        chain_length = [0] * len(self.names)
+        for course_id in reversed(order):
+            for dependent in self.dependents[course_id]:
+                if self.courses[dependent].required or chain_length[dependent]:
+                    chain_length[course_id] = max(chain_length[course_id], chain_length[dependent] + 1)
+        self.chain_length = tuple(chain_length)
+
+    def _prerequisite_order(self) -> list:
+        """
+        returns every id of the model, ordered so that a course comes after all of its prerequisites.
+        """
+        remaining_prereqs = [0] * len(self.names)
+        for dependents in self.dependents:
+            for dependent in dependents:
+                remaining_prereqs[dependent] += 1
+        order = [course_id for course_id, count in enumerate(remaining_prereqs) if count == 0]
+        for course_id in order:
+            for dependent in self.dependents[course_id]:
+                remaining_prereqs[dependent] -= 1
+                if remaining_prereqs[dependent] == 0:
+                    order.append(dependent)
+        if len(order) < len(self.names):
+            # courses on a prerequisite cycle are never reached above, they go last
+            ordered = set(order)
+            order.extend(course_id for course_id in range(len(self.names)) if course_id not in ordered)
+        return order
+
+    def _intern(self, name: str) -> int:
+        course_id = self.ids.get(name)
+        if course_id is None:
+            course_id = self.ids[name] = len(self.names)
+            self.names.append(name)
+        return course_id
+
+    def id_of(self, name: str) -> Optional[int]:
+        """
+        returns the id of a course (or other prerequisite) name, None if the name is not used in this model.
+        """
+        return self.ids.get(name)
+
+    def ids_of(self, names: Iterable[str]) -> list:
+        """
+        returns the ids of the given names in the same order, skipping names that are not used in this model.
+        """
+        return [self.ids[name] for name in names if name in self.ids]
+
+    def names_of(self, course_ids: Iterable[int]) -> list:
+        """
+        returns the display names of the given ids in the same order.
+        """
+        return [self.names[course_id] for course_id in course_ids]
+
+    def in_catalog(self, course_id: int) -> bool:
+        """
+        returns True if the id is a course of the model, False if it is only used as a prerequisite.
+        """
+        return course_id < len(self.courses)
+
+    def __len__(self) -> int:
+        return len(self.courses)
+
+
+class TakenCourses:
+    """
+    The ids of the courses a student has taken or is scheduled to take.
+
+    Keeps the order the courses were added in (for display) next to a bitset
+    (`mask`, bit `i` is course id `i`) for constant-time membership tests. The
+    courses added since the last `start_semester` are tracked in `semester_mask`,
+    because a prerequisite usually has to be completed before the semester of
+    the course that needs it.
+    """
+
+    __slots__ = ('order', 'mask', 'semester_mask')
+
+    def __init__(self, course_ids: Iterable[int] = ()):
+        self.order = list(course_ids)
+        self.mask = 0
+        for course_id in self.order:
+            self.mask |= 1 << course_id
+        self.semester_mask = 0
+
+    def add(self, course_id: int) -> None:
+        self.order.append(course_id)
+        self.mask |= 1 << course_id
+        self.semester_mask |= 1 << course_id
+
+    def start_semester(self) -> None:
+        self.semester_mask = 0
+
+    def __contains__(self, course_id: int) -> bool:
+        return bool(self.mask >> course_id & 1)
+
+    def __iter__(self):
+        return iter(self.order)
+
+    def __len__(self) -> int:
+        return len(self.order)
+
+
+# the models built for recent (catalog version, certificate) pairs, shared by every request in the process
+_models = LRUCache(max_entries=32)
+
+
+def course_model_for(catalog_version: str, catalog: Mapping, certificate_tag: str = "",
+                     certificate_core: Optional[Mapping] = None, certificate_version: str = "") -> CourseModel:
+    """
+    returns the course model for a catalog version, with the core courses of a certificate added.
+
+    Parameters
+    ----------
+    catalog_version:    str
+                        id of the catalog version, part of the cache key
+    catalog:            Mapping
+                        the compiled course catalog of that version
+    certificate_tag:    str
+                        XML tag of the selected certificate, "" for none
+    certificate_core:   Mapping, optional
+                        the core courses of the certificate, which replace the catalog entries of the same courses
+    certificate_version: str
+                        id of the certificate data the core courses come from, part of the cache key
+    Returns
+    ----------
+    CourseModel
+    """
+    key = (catalog_version, certificate_tag, certificate_version)
+    model = _models.get(key)
+    if model is None:
+        courses = dict(catalog)
+        if certificate_core:
+            courses.update(certificate_core)
+        model = CourseModel(courses)
+        _models.put(key, model)
+    return model
@@ -1,12 +1,24 @@
 import xmltodict
 import json
 from collections.abc import Mapping
-from typing import Union, Any
+from typing import Union, Any, Optional, BinaryIO
+from xml.etree import ElementTree
 import math
 import datetime
-from itertools import chain
 import os
 import copy
+import logging
+from dataclasses import replace
+
+from app.middleware.catalog_cache import CompiledFileCache
+from app.middleware.course_model import CourseModel, TakenCourses, LATEST_SEMESTER_FOR_COURSE, TERM_BITS, \
+    course_model_for
+from app.middleware.schedule_search import ScheduleSearch
+from app.middleware.planner import ReadyQueue, GraduationTracker, earliest_graduation, expand_prerequisites
+from app.middleware.catalog_snapshot import snapshot_lookup
+from app.middleware.planning import PlanRequest, PlanResult, SchedulerState
+
+logger = logging.getLogger(__name__)
 
 
 def print_dictionary(course_dictionary: dict) -> None:
@@ -139,50 +151,236 @@ def build_dictionary(courses: Union[dict, list]) -> dict:
     return updated_course_dict
 
 
-def parse_courses() -> dict:
+# the course types of course_data.xml, in the order they are added to the catalog (a later type wins)
+COURSE_SECTIONS = ("Electives", "OtherCourses", "MathandStatistics", "CoreCourses")
+
+
+def element_data(element: ElementTree.Element) -> Any:
+    """
+    converts an XML element to the value xmltodict gives it.
+
+    Parameters
+    ----------
+    element:    Element
+                the element to convert (without namespaced tags or attributes)
+    Returns
+    ----------
+    Any
+                the stripped text of the element (None if it is empty) or, if the element has
+                attributes or children, a dictionary of its attributes (`@name`), its children (a list
+                for a child that is repeated) and its text (`#text`, if it is not blank)
+    """
+    data = {f'@{name}': value for name, value in element.attrib.items()}
+    for child in element:
+        value = element_data(child)
+        if child.tag not in data:
+            data[child.tag] = value
+        elif isinstance(data[child.tag], list):
+            data[child.tag].append(value)
+        else:
+            data[child.tag] = [data[child.tag], value]
+
+    text = ((element.text or '') + ''.join(child.tail or '' for child in element)).strip()
+    if not data:
+        return text or None
+    if text:
+        data['#text'] = text
+    return data
+
+
+def compile_course_stream(stream: BinaryIO) -> dict:
     """
-    Parses relevant information from XML and return dictionaries.
+    Parses course_data.xml incrementally and returns a dictionary of the courses of every course type.
 
-    This function opens up the XML file, calls the build_dictionary function
-    and returns the dictionary based upon the two parameters provided to
-    the function.
+    Each `<course>` is compiled (see `build_dictionary`) as soon as its end tag is read and
+    then dropped from the tree, so only one course is held as XML at a time and the memory
+    needed does not depend on the size of the file.
 
-    csbs_req is a dictionary that represents a section of parsed XML data. It
-    holds each course type as a key and each value for the key is either:
-        - a list(if only one course for that key exists) or
-        - a dictionary (if multiple courses for that key exist)
+    Parameters
+    ----------
+    stream:         BinaryIO
+                    the open course_data.xml file
 
     Returns
     ----------
     dict
                     The dictionary that holds all course information
     """
-    # open xml document to begin parsing
-    root = os.path.dirname(os.path.dirname(__file__))
-    with open(os.path.join(root, 'xml/course_data.xml')) as fd:
-        doc = xmltodict.parse(fd.read())
+    sections = {}
+    path = []
+    for event, element in ElementTree.iterparse(stream, events=("start", "end")):
+        if event == "start":
+            path.append(element)
+            continue
+        path.pop()
+        if not path:
+            if element.tag != "CSBSReq":
+                raise ValueError(f"course_data.xml has a {element.tag} root element instead of CSBSReq")
+            continue
+
+        depth = len(path)
+        if depth == 2 and element.tag == "course":
+            section = sections.setdefault(path[1].tag, {})
+            section.update(build_dictionary(element_data(element)))
+        if depth <= 2:
+            # compiled or not part of the catalog, either way it is no longer needed
+            path[-1].remove(element)
+
+    missing = [section for section in COURSE_SECTIONS if section not in sections]
+    if missing:
+        raise ValueError(f"course_data.xml has no courses under {', '.join(missing)}")
+
+    all_courses = {}
+    for section in COURSE_SECTIONS:
+        all_courses.update(sections[section])
+    return all_courses
 
-    # create a dictionary with course information to further parse
-    csbs_req = doc["CSBSReq"]
 
-    all_courses = build_dictionary(csbs_req["Electives"]["course"])
-    all_courses.update(build_dictionary(csbs_req["OtherCourses"]["course"]))
-    all_courses.update(build_dictionary(csbs_req["MathandStatistics"]["course"]))
-    all_courses.update(build_dictionary(csbs_req["CoreCourses"]["course"]))
+XML_ROOT = os.path.join(os.path.dirname(os.path.dirname(__file__)), 'xml')
 
-    # return finalized dictionary of the course type
-    return all_courses
+# course_data.xml is compiled once per process (or loaded from the catalog snapshot) and only rebuilt when the file changes
+course_catalog_cache = CompiledFileCache(os.path.join(XML_ROOT, 'course_data.xml'), compile_course_stream,
+                                         snapshot_lookup, streaming=True)
+
+
+def parse_courses() -> dict:
+    """
+    Returns the compiled course catalog.
+
+    The catalog is parsed from course_data.xml the first time it is needed and
+    shared by every request afterwards. It is read-only: use `copy.deepcopy`
+    to get a copy that can be modified.
+
+    Returns
+    ----------
+    dict
+                    The dictionary that holds all course information
+    """
+    return course_catalog_cache.get()
+
+
+# number of hex digits of the course_data.xml hash used as the catalog version id
+CATALOG_VERSION_LENGTH = 16
+
+
+class CatalogVersionError(ValueError):
+    """
+    Raised when a request references a catalog version that is no longer served.
+    """
+
+
+class UnschedulableError(ValueError):
+    """
+    Raised when a complete schedule does not graduate within the most semesters the planner may plan.
+    """
+
+
+def catalog_version() -> str:
+    """
+    Returns the id of the catalog version currently served.
+
+    The id is derived from the content hash of course_data.xml, so it changes
+    whenever the catalog does. Pages carry this id instead of the catalog itself.
+
+    Returns
+    ----------
+    str
+                    the catalog version id
+    """
+    return course_catalog_cache.digest[:CATALOG_VERSION_LENGTH]
+
+
+def catalog_for_version(version: str) -> dict:
+    """
+    Returns the compiled course catalog for a catalog version id.
+
+    Parameters
+    ----------
+    version:        str
+                    the catalog version id sent by the page (see `catalog_version`)
+    Returns
+    ----------
+    dict
+                    The (read-only) dictionary that holds all course information,
+                    raises a CatalogVersionError if `version` is not the current catalog
+    """
+    digest, courses = course_catalog_cache.get_versioned()
+    if version != digest[:CATALOG_VERSION_LENGTH]:
+        raise CatalogVersionError(f"Catalog version {version!r} has been retired")
+    return courses
 
-def parse_certificate(certificate_name) -> dict:
+def compile_certificates(xml_text: str) -> dict:
     """
-    Parses relevant information from XML and return dictionaries.
+    Parses every certificate from the certificate XML and returns a dictionary.
 
     cscertificate_data.xml is a document that contains all course data for certificates in the computer science program.
+    Every element directly under `CSCertificates` is treated as a certificate, so certificates added to the XML are
+    picked up without any code changes.
+
+    Parameters
+    ----------
+    xml_text:       str
+                    the contents of cscertificate_data.xml
+
+    Returns
+    ----------
+    dict
+                    Each key is the XML tag of the certificate (i.e. `AICERTReq`).
+                    The corresponding value is a dictionary holding:
+                    - `name`: the name shown to students (the tag if the certificate has no `CertName`)
+                    - `core`: dictionary of the certificate core courses
+                    - `electives`: dictionary of the certificate elective courses
+                    - `electives_needed`: number of certificate electives that must be taken
+    """
+    doc = xmltodict.parse(xml_text)
+
+    # create a dictionary with course information to further parse
+    certificate_data = doc["CSCertificates"]
+
+    certificates = {}
+    for certificate_name, certificate in certificate_data.items():
+        # skip the attributes of the root element (i.e. `@xmlns:xsi`)
+        if certificate_name.startswith('@'):
+            continue
+        certificates[certificate_name] = {
+            "name": certificate.get("CertName") or certificate_name,
+            "core": build_dictionary(certificate["CertCore"]["course"]),
+            "electives": build_dictionary(certificate["CertElectives"]["course"]),
+            "electives_needed": int(certificate["NoOfElectives"]["num"])
+        }
+
+    return certificates
+
+
+# cscertificate_data.xml is compiled once per process (or loaded from the catalog snapshot) and only rebuilt when the file changes
+certificate_registry_cache = CompiledFileCache(os.path.join(XML_ROOT, 'cscertificate_data.xml'), compile_certificates,
+                                               snapshot_lookup)
+
+
+def certificate_registry() -> dict:
+    """
+    Returns the compiled (read-only) certificates, keyed by the XML tag of each certificate.
+    """
+    return certificate_registry_cache.get()
+
+
+def certificate_choices() -> list:
+    """
+    Returns the certificates a student can choose, as (name, XML tag of cscertificate_data.xml) in the
+    order of the XML, preceded by ("None", "") for no certificate.
+    """
+    return [("None", "")] + [(certificate["name"], tag) for tag, certificate in certificate_registry().items()]
+
+
+def parse_certificate(certificate_name) -> tuple:
+    """
+    Looks up a certificate in the compiled certificate registry.
 
     Params
     ----------
     certificate_name        string
-                            is the name of the desired certificate. May have any of the following values:
+                            is the name of the desired certificate. May be any certificate in
+                            cscertificate_data.xml, i.e.:
                             AICERTReq
                             CYBERCERTReq
                             DATACERTReq
@@ -191,32 +389,49 @@ def parse_certificate(certificate_name) -> dict:
 
     Returns
     ----------
-    dict
+    tuple
+                            the certificate core courses, the certificate elective courses and the
+                            number of electives needed. The course dictionaries are read-only.
 
     """
-    # open xml document to begin parsing
-    root = os.path.dirname(os.path.dirname(__file__))
-    with open(os.path.join(root, 'xml/cscertificate_data.xml')) as fd:
-        doc = xmltodict.parse(fd.read())
+    certificate = certificate_registry()[certificate_name]
 
-    # create a dictionary with course information to further parse
-    certificate_data = doc["CSCertificates"]
+    # return finalized dictionary of the course type
+    return certificate["core"], certificate["electives"], certificate["electives_needed"]
 
-    core_courses = build_dictionary(certificate_data[certificate_name]["CertCore"]["course"])
-    elective_courses = build_dictionary(certificate_data[certificate_name]["CertElectives"]["course"])
-    electives_needed = int(certificate_data[certificate_name]["NoOfElectives"]["num"])
 
-    # return finalized dictionary of the course type
-    return core_courses, elective_courses, electives_needed
+def course_model(version: str, certificate_name: str = "") -> CourseModel:
+    """
+    Returns the course model (courses with integer ids) a schedule is planned from.
 
+    The model is built once per catalog version and certificate and shared by every request.
 
-def add_course(current_semester, course_info, current_semester_classes, course, courses_taken,
+    Parameters
+    ----------
+    version:            str
+                        the catalog version id (see `catalog_version`)
+    certificate_name:   str
+                        XML tag of the selected certificate (i.e. `AICERTReq`), "" for none
+    Returns
+    ----------
+    CourseModel
+                        raises a CatalogVersionError if `version` is not the current catalog
+    """
+    catalog = catalog_for_version(version)
+    if certificate_name == "":
+        return course_model_for(version, catalog)
+    certificate_core = parse_certificate(certificate_name)[0]
+    return course_model_for(version, catalog, certificate_name, certificate_core, certificate_registry_cache.digest)
+
+
+def add_course(current_semester, course, current_semester_classes, courses_taken,
                total_credits_accumulated, current_semester_credits, course_category):
     # Add course, credits to current semester and list of courses taken, credits earned
     course_added = False
-    if current_semester in course_info['semesters_offered']:
+    if course.is_offered(TERM_BITS[current_semester]):
+        course_info = course.info
         current_semester_classes.append({
-            'course': course,
+            'course': course.key,
             'name': course_info['course_name'],
             'description': course_info['course_description'],
             'credits': course_info['credit'],
@@ -224,9 +439,9 @@ def add_course(current_semester, course_info, current_semester_classes, course,
             'prerequisite_description': course_info['prerequisite_description'] if 'prerequisite_description' in course_info.keys() else '',
             'passed_validation': True
         })
-        courses_taken.append(course)
-        total_credits_accumulated = total_credits_accumulated + int(course_info['credit'])
-        current_semester_credits = current_semester_credits + int(course_info['credit'])
+        courses_taken.add(course.id)
+        total_credits_accumulated = total_credits_accumulated + course.credit
+        current_semester_credits = current_semester_credits + course.credit
         course_added = True
     return course_added, current_semester_classes, courses_taken, total_credits_accumulated, current_semester_credits
 
@@ -295,50 +510,6 @@ def print_course_list_information(certificate_core, cert_elective_courses_still_
             print(f"\t{item}")
 
 
-def graduation_check(total_credits_accumulated, required_courses_tuple, courses_taken,
-                   min_3000_course_still_needed, cert_elective_courses_still_needed, gen_ed_credits_still_needed) -> bool:
-
-    # assume that course generation is complete
-    is_course_generation_complete = True
-
-    # check that all required core (BSCS and certificate) has been taken
-    error_messages = []
-    for course in required_courses_tuple:
-        if course not in courses_taken:
-            error_messages.append(f"ERROR: Must take {course}")
-            is_course_generation_complete = False
-            break # leave 'for' loop if a course still needs to be taken
-
-    # check all required electives have been taken
-    # print(f"{'CMP SCI 3000+ courses needed:':<30}{min_3000_course_still_needed:}")
-    if is_course_generation_complete and min_3000_course_still_needed != 0:
-        is_course_generation_complete = False
-        error_messages.append(f"ERROR: Must take {min_3000_course_still_needed} more 3000+ level electives.")
-
-    # check that all certificates have been taken
-    # print(f"{'Certificate courses needed:':<30}{cert_elective_courses_still_needed:}")
-    if is_course_generation_complete and cert_elective_courses_still_needed != 0:
-        is_course_generation_complete = False
-        error_messages.append(f"ERROR: Must take {cert_elective_courses_still_needed} more certificate electives.")
-
-     # check that all gen eds have been taken
-    # print(f"{'Gen Ed courses needed:':<30}{gen_ed_credits_still_needed:}")
-    if is_course_generation_complete and gen_ed_credits_still_needed != 0:
-        is_course_generation_complete = False
-        error_messages.append(f"ERROR: Must take {gen_ed_credits_still_needed} more general education electives.")
-
-    # check credit hours
-    # print(f"{'Total credits accumulated:':<30}{total_credits_accumulated:}/{120}")
-    if is_course_generation_complete and total_credits_accumulated < 120:
-        is_course_generation_complete = False
-        error_messages.append(f"ERROR: Must have 120 credit hours completed. Only {total_credits_accumulated} completed.")
-
-    # if is_course_generation_complete == False:
-    #     print(error_messages)
-
-    # check if ultimately finished
-    return is_course_generation_complete
-
 def update_semester(current_semester, include_summer) -> str:
     if current_semester == "Fall":
         return "Spring"
@@ -350,31 +521,91 @@ def update_semester(current_semester, include_summer) -> str:
     else:
         return "Fall"
     
-def initial_prerequisite_check(required_courses_dict, course, courses_taken, courses_for_graduation) -> bool:
-    required_courses_taken = True
-    for prereqs in required_courses_dict[course]["prerequisite"]:
-        required_courses_taken = False
-        if isinstance(prereqs, str):
-            if ((prereqs in courses_taken) or (prereqs in courses_for_graduation)):
-                required_courses_taken = True
-                break
-        elif (len(prereqs) == 1):
-            if ((prereqs[0] in courses_taken) or (prereqs[0] in courses_for_graduation)):
-                required_courses_taken = True
-                break
-        else:
-            for prereq in prereqs:
-                if ((prereq in courses_taken) or (prereq in courses_for_graduation)):
-                    required_courses_taken = True
-                else:
-                    required_courses_taken = False
-                # if there's one failure in the list of required courses then stop looping
-                if not required_courses_taken:
-                    break
-            # if all the courses in the prerequisite list have been taken, so we don't need to check other prerequisites
-            if required_courses_taken:
-                break
-    return not required_courses_taken
+def plan_required_courses(model, courses_taken, total_credits_accumulated, has_passed_math_placement_exam) -> tuple:
+    """
+    decides which courses a student still has to take to graduate.
+
+    The required courses of the model are completed with the prerequisites they are missing, and the
+    courses made unnecessary by the courses already taken (i.e. MATH 1045 or MATH 1030) are removed.
+
+    Parameters
+    ----------
+    model:                          CourseModel
+                                    the courses of the schedule
+    courses_taken:                  list
+                                    ids of the courses already taken or waived (not modified)
+    total_credits_accumulated:      int
+                                    the credits earned so far
+    has_passed_math_placement_exam: bool
+                                    True if the student passed the math placement exam (ALEKS)
+    Returns
+    ----------
+    tuple
+                                    the ids of the required courses (sorted by name), the ids of the
+                                    courses still to take (sorted by course number) and the ids of the
+                                    courses taken, with the placement exam when it was passed
+    """
+    ############################################################################
+    ### Note to self: after 'if' statements of course rules, loop through list to build course dictionary
+    # filter out all non-required courses and then return a just the course ids (sorted by name) as a list and convert that list to a tuple
+    courses_for_graduation = [course.id for course in sorted(model.courses, key=lambda course: course.key) if course.required]
+    required_courses_tuple = tuple(courses_for_graduation)
+
+    logger.debug("courses_for_graduation=%s", model.names_of(courses_for_graduation))
+
+    # plan the prerequisites the required courses are missing, and the prerequisites of those
+    courses_for_graduation = expand_prerequisites(model, required_courses_tuple, courses_taken)
+    ############################################################################
+
+    # ids of the courses the rules below refer to (None if the course is not in the catalog)
+    intdsc_1003, english_1100, english_3130, cmp_sci_4732 = model.id_of('INTDSC 1003'), model.id_of('ENGLISH 1100'), \
+        model.id_of('ENGLISH 3130'), model.id_of('CMP SCI 4732')
+    math_1030, math_1035, math_1045, math_1100, math_1320, math_1800 = (
+        model.id_of(f'MATH {number}') for number in (1030, 1035, 1045, 1100, 1320, 1800))
+
+    # remove University course - INTDSC 1003 - if user has required credits
+    if total_credits_accumulated >= 24:
+        courses_for_graduation.remove(intdsc_1003)
+    ## Handle MATH 1045 checks first because it's an unnecessary course if MATH 1030 and MATH 1035 exist
+    if (math_1045 in courses_taken) and ((math_1030 not in courses_taken) or (math_1035 not in courses_taken)):
+        if math_1030 in courses_for_graduation:
+            courses_for_graduation.remove(math_1030)
+        if math_1035 in courses_for_graduation:
+            courses_for_graduation.remove(math_1035)
+    # MATH 1045 is redundant if MATH 1030 and MATH 1035 are going to be courses used
+    if (math_1045 not in courses_taken) and (math_1030 in courses_for_graduation) and (math_1035 in courses_for_graduation) and (math_1045 in courses_for_graduation):
+        courses_for_graduation.remove(math_1045)
+    ## Remove optional courses if they are no longer required due to courses already taken
+    if (english_3130 in courses_taken) and (english_1100 not in courses_taken) and (english_1100 in courses_for_graduation):
+        courses_for_graduation.remove(english_1100)
+    if (math_1800 in courses_taken):
+        if (math_1320 in courses_taken) and (math_1030 not in courses_taken) and (math_1030 in courses_for_graduation):
+            courses_for_graduation.remove(math_1030)
+        if (math_1035 in courses_for_graduation) and (math_1035 not in courses_taken) and (math_1035 in courses_for_graduation):
+            courses_for_graduation.remove(math_1035)
+    # MATH 1100 is only required for CMP SCI 4732
+    if (cmp_sci_4732 not in courses_for_graduation) and (math_1100 not in courses_taken) and (math_1100 in courses_for_graduation):
+        courses_for_graduation.remove(math_1100)
+    if has_passed_math_placement_exam:
+        if (math_1320 in courses_taken) and (math_1030 not in courses_taken) and (math_1030 in courses_for_graduation):
+            courses_for_graduation.remove(math_1030)
+        if math_1035 in courses_for_graduation:
+            courses_for_graduation.remove(math_1035)
+        if math_1045 in courses_for_graduation:
+            courses_for_graduation.remove(math_1045)
+        if model.id_of("ALEKS") is not None:
+            # the list may belong to the caller (i.e. a cached request), the exam is added to a copy
+            courses_taken = courses_taken + [model.id_of("ALEKS")]
+
+    for course in courses_taken:
+        if course in courses_for_graduation:
+            courses_for_graduation.remove(course)
+
+    # sort the required courses by course number for easier processing
+    remaining_courses = sorted(dict.fromkeys(courses_for_graduation), key=lambda course: model.courses[course].course_number)
+
+    return required_courses_tuple, remaining_courses, courses_taken
+
 
 def get_semester_years(selected_season) -> dict:
     # calculate user's current time and season
@@ -452,42 +683,137 @@ def get_semester_years(selected_season) -> dict:
                 'Summer': current_year + 1,
                 'Fall': current_year + 1
             }
-    print()
     return semester_years
 
 
-def generate_semester(request): # -> dict[Union[str, Any], Union[Union[str, list, int, list[Any], None], Any]]:
-    # get information from user form, routes.py
-    course_schedule = json.loads(request.form["course_schedule"])
-    current_semester = request.form["current_semester"]
-    semester = int(request.form["semester_number"])
-    generate_complete_schedule = True if "generate_complete_schedule" in request.form.keys() else False
-    num_3000_replaced_by_cert_core = int(request.form["num_3000_replaced_by_cert_core"])  # default is 0
-    first_semester = request.form["first_semester"]
-    semester_years = json.loads(request.form["semester_years"])
-    user_name = request.form["user_name"]
+def earliest_graduation_estimate(form) -> dict:
+    """
+    computes how soon a student could graduate at the earliest, without building a schedule.
+
+    Parameters
+    ----------
+    form:       MultiDict
+                the fields of the home page form: `current_semester` and `minimum_semester_credits` are
+                needed, `total_credits`, `ge_taken`, `fe_taken`, `courses_taken`, `waived_courses`,
+                `aleks_check`, `include_summer`, `minimum_summer_credits`, `min_3000_course`,
+                `certificate_choice` and `catalog_version` default to the values of a new schedule
+    Returns
+    ----------
+    dict
+                the number of `terms` left at the least (see `earliest_graduation`), the `graduation` term
+                and year they lead to, the bound from each kind of `limits`, the courses of the
+                `critical_path` and the courses that are `unschedulable`
+    """
+    version = form.get("catalog_version") or catalog_version()
+    current_semester = form["current_semester"]
+    if current_semester not in TERM_BITS:
+        raise ValueError(f"Unknown semester: {current_semester}")
+    include_summer = form.get("include_summer") == "on"
+    semester_credits = int(form["minimum_semester_credits"])
+    summer_credits = int(form.get("minimum_summer_credits", 0))
+    ge_taken = int(form.get("ge_taken", 0))
+    fe_taken = int(form.get("fe_taken", 0))
+    total_credits = int(form.get("total_credits", 0)) + ge_taken + fe_taken
+    min_3000_course_still_needed = int(form.get("min_3000_course", 5))
+    certificate_choice = form.get("certificate_choice", "None,").split(",")
+    if len(certificate_choice) != 2 or certificate_choice[1] not in dict(certificate_choices()).values():
+        raise ValueError(f"Unknown certificate: {form['certificate_choice']}")
+    certificate_choice_xml_tag = certificate_choice[1]
+
+    cert_elective_courses_still_needed = 0
+    model = course_model(version, certificate_choice_xml_tag)
+    if certificate_choice_xml_tag != "":
+        _, _, cert_elective_courses_still_needed = parse_certificate(certificate_choice_xml_tag)
+        min_3000_course_still_needed -= cert_elective_courses_still_needed
+        min_3000_course_still_needed -= len(model) - len(catalog_for_version(version))
+
+    courses_taken = model.ids_of(dict.fromkeys(form.getlist("courses_taken") + form.getlist("waived_courses")))
+    _, remaining_courses, courses_taken = plan_required_courses(model, courses_taken, total_credits,
+                                                                "aleks_check" in form)
+
+    # a term is closed once it reaches the selected credits, so it can go over them by less than one course
+    largest_course = max([3] + [model.courses[course].credit or 0 for course in remaining_courses])
+    semesters = [current_semester]
+
+    def term_at(index):
+        while len(semesters) <= index:
+            semesters.append(update_semester(semesters[-1], include_summer))
+        credits = summer_credits if semesters[index] == "Summer" else semester_credits
+        return TERM_BITS[semesters[index]], max(credits - 1, 0) + largest_course
+
+    bound = earliest_graduation(model, remaining_courses, courses_taken, term_at, total_credits,
+                                max(min_3000_course_still_needed, 0) + cert_elective_courses_still_needed)
+
+    graduation = None
+    if bound["terms"]:
+        term_at(bound["terms"] - 1)
+        semester_years = get_semester_years(current_semester)
+        for semester in semesters[1:bound["terms"]]:
+            if semester == current_semester:
+                semester_years = {key: value + 1 for key, value in semester_years.items()}
+        last_semester = semesters[bound["terms"] - 1]
+        graduation = {"semester": last_semester, "year": semester_years[last_semester]}
+
+    return {
+        "catalog_version": version,
+        "terms": bound["terms"],
+        "graduation": graduation,
+        "limits": bound["limits"],
+        "critical_path": model.names_of(bound["critical_path"]),
+        "unschedulable": model.names_of(bound["unschedulable"])
+    }
+
+
+def plan_semester(plan: PlanRequest, settings: Mapping, release_semesters: Optional[dict] = None) -> PlanResult:
+    """
+    plans the next semester of a student, or every semester up to graduation.
+
+    Only reads its arguments, so it can be called without a request or an app context
+    (i.e. by batch jobs, caches and benchmarks).
+
+    Parameters
+    ----------
+    plan:               PlanRequest
+                        the student and the semesters planned so far
+    settings:           Mapping
+                        the SCHEDULER_* settings of the app config
+    release_semesters:  dict, optional
+                        the semester from which each course id may be added, used to build the
+                        schedule found by the search
+    Returns
+    ----------
+    PlanResult
+                        the schedule, with the scheduler state the next semester continues from; raises an
+                        UnschedulableError if a complete schedule does not graduate within
+                        `SCHEDULER_MAX_SEMESTERS` semesters
+    """
+    state = plan.state
+
+    # the schedule may have been rearranged by drag and drop
+    course_schedule = list(plan.course_schedule)
+    current_semester = state["current_semester"]
+    semester = state["semester_number"]
+    generate_complete_schedule = plan.generate_complete_schedule
+    num_3000_replaced_by_cert_core = state["num_3000_replaced_by_cert_core"]
+    first_semester = state["first_semester"]
+    semester_years = state["semester_years"]
+    user_name = state["user_name"]
 
 
     # credit hour trackers
-    ge_taken = int(request.form["ge_taken"])
-    free_elective_credits_accumulated = int(request.form["fe_taken"])
-    gen_ed_credits_still_needed = int(request.form["gen_ed_credits_still_needed"]) - ge_taken if semester == 0 else int(request.form["gen_ed_credits_still_needed"])
-    cert_elective_courses_still_needed = int(request.form["cert_elective_courses_still_needed"])  # default is 0
-    min_3000_course_still_needed = int(request.form["min_3000_course"]) # default is 5
-    total_credits_accumulated = int(request.form["total_credits"]) if semester != 0 else int(request.form["total_credits"]) + ge_taken + free_elective_credits_accumulated
-
-    # print out student information
-    # print(f"{'Student:':<40}{user_name}")
-    # print(f"{'General Education Credits Earned:':<40}{27 - gen_ed_credits_still_needed}")
-    # print(f"{'Free Elective Credits Earned:':<40}{free_elective_credits_accumulated}")
-    # print(f"{'Total Credits Incoming:':<40}{total_credits_accumulated}")
+    ge_taken = state["ge_taken"]
+    free_elective_credits_accumulated = state["fe_taken"]
+    gen_ed_credits_still_needed = state["gen_ed_credits_still_needed"] - ge_taken if semester == 0 else state["gen_ed_credits_still_needed"]
+    cert_elective_courses_still_needed = state["cert_elective_courses_still_needed"]
+    min_3000_course_still_needed = state["min_3000_course"]
+    total_credits_accumulated = state["total_credits"] if semester != 0 else state["total_credits"] + ge_taken + free_elective_credits_accumulated
 
     # set up default variables (also used for counter on scheduling page)
     TOTAL_CREDITS_FOR_GRADUATION = 120
     TOTAL_CREDITS_FOR_BSCS = 71
     TOTAL_CREDITS_FOR_BSCS_ELECTIVES = 15
     TOTAL_CREDITS_FOR_GEN_EDS = 27
-    TOTAL_CREDITS_FOR_CERTIFICATE_ELECTIVES = 0 # set in first semester and maintained by request.form in subsequent semesters
+    TOTAL_CREDITS_FOR_CERTIFICATE_ELECTIVES = 0 # set in first semester and maintained by the scheduler state in subsequent semesters
     DEFAULT_CREDIT_HOURS = 3
     course_categories = {
         'R': 'BSCS',
@@ -499,15 +825,14 @@ def generate_semester(request): # -> dict[Union[str, Any], Union[Union[str, list
     }
 
     # user enters credits for upcoming semester
-    min_credits_per_semester = int(request.form["minimum_semester_credits"])
-    summer_credit_count = int(request.form["minimum_summer_credits"])
+    min_credits_per_semester = plan.minimum_semester_credits
+    summer_credit_count = state["minimum_summer_credits"]
     temp_min_credits_per_semester = None
 
     # set up scheduler variables, overwritten below
     include_summer = False
     courses_taken = []
-    waived_courses = None
-    required_courses_dict_list = []
+    remaining_courses = []
     has_passed_math_placement_exam = False
     is_graduated = False
 
@@ -518,36 +843,29 @@ def generate_semester(request): # -> dict[Union[str, Any], Union[Union[str, list
     certificate_choice_xml_tag = ""
     certificate_choice_name = ""
 
-    course_prereqs_for = None
-
 
     # if the first semester, overwrite schedular variables from above
     if semester == 0:
         temp_min_credits_per_semester = min_credits_per_semester
-        first_semester = request.form["current_semester"]
+        first_semester = current_semester
 
         if (first_semester == "Summer"):
             min_credits_per_semester = summer_credit_count
 
         semester_years = get_semester_years(first_semester)
-        if "include_summer" in request.form.keys():
-            include_summer = True if request.form["include_summer"] == "on" else False
-
-        if ("courses_taken" in request.form.keys()):
-            courses_taken = request.form.getlist("courses_taken")
-
-        if ("aleks_check" in request.form.keys()):
-            has_passed_math_placement_exam = True
+        include_summer = plan.include_summer
+        courses_taken = list(plan.courses_taken)
+        has_passed_math_placement_exam = plan.has_passed_math_placement_exam
 
         # Do we need separate selects for waived/taken courses or should we combine them to one?
         # If they say taken, do we need to add the credits to the total accumulated credits?
         # ensure waived courses cannot be added when building a semester and remove any duplicates
-        if ("waived_courses" in request.form.keys()):
-            courses_taken.extend(request.form.getlist("waived_courses"))
+        if plan.waived_courses:
+            courses_taken.extend(plan.waived_courses)
             courses_taken = list(dict.fromkeys(courses_taken))
 
         # if user elects to complete a certificate, get course data for that certificate and decrease electives accordingly
-        certificate_choice = request.form["certificate_choice"].split(",")
+        certificate_choice = list(plan.certificate_choice)
         certificate_choice_name = certificate_choice[0]
         certificate_choice_xml_tag = certificate_choice[1]
 
@@ -562,148 +880,81 @@ def generate_semester(request): # -> dict[Union[str, Any], Union[Union[str, list
         # determine the semesters that user will be enrolled in
         user_semesters = build_semester_list(current_semester, include_summer)
 
-        # generate required courses
-        all_courses_dict = json.loads(request.form['required_courses_dict'])
+        # the courses of the catalog version the page was built from, with the certificate core courses added
+        model = course_model(state["catalog_version"], certificate_choice_xml_tag)
+        courses_taken = model.ids_of(courses_taken)
 
-        # if a certificate was selected, add the required certificate courses to required courses and update counters
+        # if a certificate was selected, the required certificate courses are part of the model, update counters
         if certificate_core:
-            num_courses_in_base_csdeg = len(all_courses_dict)
-            all_courses_dict.update(certificate_core)
-            num_3000_replaced_by_cert_core = len(all_courses_dict) - num_courses_in_base_csdeg
-            # print(f"{'3000+ Electives Used in Certificate':<40}{num_3000_replaced_by_cert_core}")
+            num_courses_in_base_csdeg = len(catalog_for_version(state["catalog_version"]))
+            num_3000_replaced_by_cert_core = len(model) - num_courses_in_base_csdeg
 
             # update counters according to certificate selection
             min_3000_course_still_needed -= num_3000_replaced_by_cert_core
 
-        ############################################################################
-        ### Note to self: after 'if' statements of course rules, loop through list to build course dictionary
-        # filter out all non-required courses and then return a just the course numbers as a list and convert that list to a tuple
-        courses_for_graduation = sorted(({k:v for (k,v) in all_courses_dict.items() if "required" in v.keys() and v['required'] == 'true'}).keys())
-        required_courses_tuple = tuple(copy.deepcopy(courses_for_graduation))
-
-        print(f"{courses_for_graduation=}")
-
-        for course in required_courses_tuple:
-            should_add_prereqs = initial_prerequisite_check(all_courses_dict, course, courses_taken, courses_for_graduation)
-            temp_courses_to_add = []
-            if should_add_prereqs:
-                print(f"{course=}")
-                for prereqs in all_courses_dict[course]["prerequisite"]:
-                    required_courses_taken = False
-                    if isinstance(prereqs, str):
-                        if (prereqs not in courses_for_graduation) and (prereqs not in courses_taken):
-                            courses_for_graduation.append(prereqs)
-                            print(f'Missing course: {prereqs}')
-                            break
-                    elif (len(prereqs) == 1):
-                        if (prereqs[0] not in courses_for_graduation) and (prereqs[0] not in courses_taken):
-                            courses_for_graduation.append(prereqs[0])
-                            print(f'Missing course: {prereqs[0]}')
-                            break
-                    else:
-                        # Potential improvement: Decide a better way to add prerequisites instead of just taking first pre
-                        for prereq in prereqs:
-                            if (prereq not in all_courses_dict.keys()):
-                                temp_courses_to_add = []
-                                break
-                            if ((prereq not in courses_for_graduation) and (prereq not in courses_taken)):
-                                temp_courses_to_add.append(prereq)
-                        if (len(temp_courses_to_add) > 0):
-                            courses_for_graduation.extend(temp_courses_to_add)
-                            break
-        ############################################################################
-
-        # remove University course - INTDSC 1003 - if user has required credits
-        if total_credits_accumulated >= 24:
-            courses_for_graduation.remove('INTDSC 1003') 
-        ## Handle MATH 1045 checks first because it's an unnecessary course if MATH 1030 and MATH 1035 exist
-        if ('MATH 1045' in courses_taken) and (('MATH 1030' not in courses_taken) or ('MATH 1035' not in courses_taken)):
-            if "MATH 1030" in courses_for_graduation:
-                courses_for_graduation.remove('MATH 1030')
-            if "MATH 1035" in courses_for_graduation:
-                courses_for_graduation.remove('MATH 1035')
-        # MATH 1045 is redundant if MATH 1030 and MATH 1035 are going to be courses used
-        if ('MATH 1045' not in courses_taken) and ('MATH 1030' in courses_for_graduation) and ('MATH 1035' in courses_for_graduation) and ("MATH 1045" in courses_for_graduation):
-            courses_for_graduation.remove('MATH 1045')
-        ## Remove optional courses if they are no longer required due to courses already taken
-        if ('ENGLISH 3130' in courses_taken) and ('ENGLISH 1100' not in courses_taken) and ('ENGLISH 1100' in courses_for_graduation):
-            courses_for_graduation.remove('ENGLISH 1100')
-        if ('MATH 1800' in courses_taken):
-            if ('MATH 1320' in courses_taken) and ('MATH 1030' not in courses_taken) and ("MATH 1030" in courses_for_graduation):
-                courses_for_graduation.remove('MATH 1030')
-            if ("MATH 1035" in courses_for_graduation) and ('MATH 1035' not in courses_taken) and ("MATH 1035" in courses_for_graduation):
-                courses_for_graduation.remove('MATH 1035')
-        # MATH 1100 is only required for CMP SCI 4732
-        if ('CMP SCI 4732' not in courses_for_graduation) and ('MATH 1100' not in courses_taken) and ("MATH 1100" in courses_for_graduation):
-            courses_for_graduation.remove('MATH 1100')
-        if has_passed_math_placement_exam:
-            if ('MATH 1320' in courses_taken) and ('MATH 1030' not in courses_taken) and ("MATH 1030" in courses_for_graduation):
-                courses_for_graduation.remove('MATH 1030')
-            if "MATH 1035" in courses_for_graduation:
-                courses_for_graduation.remove('MATH 1035')
-            if "MATH 1045" in courses_for_graduation:
-                courses_for_graduation.remove('MATH 1045')
-            courses_taken.append("ALEKS")
-        
-        for course in courses_taken:
-            if course in courses_for_graduation:
-                courses_for_graduation.remove(course)
-
-        required_courses_dict = {}
-        for course in courses_for_graduation:
-            course_dict = {
-                course: all_courses_dict[course]
-            }
-            required_courses_dict.update(course_dict)
-        
-        # convert required courses dictionary to list for easier processing
-        required_courses_dict_list = sorted(list(required_courses_dict.items()), key=lambda d: d[1]["course_number"])
-        courses_dict_list_unchanged = copy.deepcopy(required_courses_dict_list)
-
-        prereqs_for_dict = {}
-
-        for course_data in required_courses_dict.items():
-            prereq_for_list = []
-            key = course_data[0]
-            course = course_data[1]
-            for prereq in course['prerequisite']:
-                if isinstance(prereq, str):
-                    prereq_for_list.append(prereq)
-                else:
-                    prereq_for_list.extend(list(chain.from_iterable(course['prerequisite'])))
-            prereq_for_list = list(set(prereq_for_list))
-
-            for prereq in prereq_for_list:
-                if prereq not in prereqs_for_dict.keys():
-                    prereqs_for_dict[prereq] = [key]
-                else:
-                    prereqs_for_dict[prereq].append(key)
-
-        course_prereqs_for = prereqs_for_dict
-
-        # print information for certificates and proposed course schedule, update tuple
-        # print_course_list_information(certificate_core, cert_elective_courses_still_needed, certificate_electives,
-                                      # min_3000_course_still_needed, required_courses_tuple)
+        required_courses_tuple, remaining_courses, courses_taken = plan_required_courses(
+            model, courses_taken, total_credits_accumulated, has_passed_math_placement_exam)
+        planned_courses = list(remaining_courses)
 
     # if NOT the first semester
     elif semester != 0:
-        required_courses_dict_list = json.loads(request.form['required_courses_dict_list'])
-        courses_dict_list_unchanged = json.loads(request.form['required_courses_dict_list_unchanged'])
-        course_prereqs_for = json.loads(request.form["course_prereqs_for"])
-        user_semesters = request.form["semesters"]
-        include_summer = True if request.form["include_summer"] == "True" else False
-        temp_min_credits_per_semester = int(request.form["saved_minimum_credits_selection"])
-        is_graduated = True if request.form["is_graduated"] == "True" else False
-
-        certificate_choice = json.loads(request.form["certificate_choice"])
+        remaining_courses = state['remaining_courses']
+        planned_courses = state['planned_courses']
+        user_semesters = state["semesters"]
+        include_summer = state["include_summer"]
+        temp_min_credits_per_semester = state["saved_minimum_credits_selection"]
+        is_graduated = state["is_graduated"]
+
+        certificate_choice = state["certificate_choice"]
         certificate_choice_name = certificate_choice[0]
         certificate_choice_xml_tag = certificate_choice[1]
-        TOTAL_CREDITS_FOR_CERTIFICATE_ELECTIVES = int(request.form["TOTAL_CREDITS_FOR_CERTIFICATE_ELECTIVES"])
-
-        if ("courses_taken" in request.form.keys()):
-            courses_taken = json.loads(request.form["courses_taken"])
-
-        required_courses_tuple = json.loads(request.form["required_courses_tuple"])
+        TOTAL_CREDITS_FOR_CERTIFICATE_ELECTIVES = state["TOTAL_CREDITS_FOR_CERTIFICATE_ELECTIVES"]
+        model = course_model(state["catalog_version"], certificate_choice_xml_tag)
+
+        courses_taken = state["courses_taken"]
+
+        required_courses_tuple = state["required_courses_tuple"]
+
+    # the scheduler works on course ids, courses_taken also tracks the courses added to the current semester
+    courses_taken = TakenCourses(courses_taken)
+
+    # the optimizing mode searches for a schedule with fewer semesters than the greedy one below, which it starts from
+    if plan.optimize_schedule and generate_complete_schedule and not is_graduated:
+        greedy_plan = replace(plan, state=copy.deepcopy(plan.state), optimize_schedule=False)
+        greedy_schedule = plan_semester(greedy_plan, settings)
+        semesters = [current_semester]
+
+        def term_at(index):
+            while len(semesters) <= index:
+                semesters.append(update_semester(semesters[-1], include_summer))
+            if index == 0:
+                return TERM_BITS[current_semester], min_credits_per_semester
+            elif semesters[index] == "Summer":
+                return TERM_BITS["Summer"], summer_credit_count
+            return TERM_BITS[semesters[index]], temp_min_credits_per_semester
+
+        # the courses the schedule page wants in its first semesters, counted from the semester planned now
+        latest_semesters = {model.id_of(name): latest - semester
+                            for name, (latest, _) in LATEST_SEMESTER_FOR_COURSE.items() if model.id_of(name) is not None}
+        schedule_search = ScheduleSearch(
+            model, remaining_courses, courses_taken, required_courses_tuple, term_at, total_credits_accumulated,
+            min_3000_course_still_needed, cert_elective_courses_still_needed, gen_ed_credits_still_needed,
+            certificate_choice_xml_tag != "", TOTAL_CREDITS_FOR_GRADUATION, latest_semesters=latest_semesters)
+        best_schedule = schedule_search.run(greedy_schedule.semester_number - semester,
+                                            settings["SCHEDULER_SEARCH_TIME_BUDGET"])
+        if best_schedule is None:
+            return greedy_schedule
+        # build the schedule the search found with the planner, holding each course back until its semester
+        optimized_plan = replace(plan, state=copy.deepcopy(plan.state), optimize_schedule=False)
+        optimized_schedule = plan_semester(optimized_plan, settings, best_schedule["release_semesters"])
+        if optimized_schedule.semester_number < greedy_schedule.semester_number:
+            return optimized_schedule
+        return greedy_schedule
+
+    # the remaining required courses, each checked again only when one of its pre-requisites is taken
+    ready_courses = ReadyQueue(model, remaining_courses, courses_taken, total_credits_accumulated,
+                               settings["SCHEDULER_RANK_BY_PREREQUISITE_CHAIN"], release_semesters)
+    graduation_tracker = GraduationTracker(required_courses_tuple, courses_taken, TOTAL_CREDITS_FOR_GRADUATION)
 
     # adjust credit parameters for scheduling
     credits_for_3000_level = 60  # 3000+ level credits will not be taken before this many credits earned
@@ -715,21 +966,19 @@ def generate_semester(request): # -> dict[Union[str, Any], Union[Union[str, list
     current_CS_elective_credits_per_semester = 0
     is_course_generation_complete = False
 
-    # create header for console
-    # if(generate_complete_schedule):
-    #     print(f"{'Min credits Fall/Spring:':<40} {min_credits_per_semester}")
-    #     print(f"{'Min credits for summer:':<40} {summer_credit_count}\n\n")
-    # elif(not generate_complete_schedule):
-    #     print(f"Minimum credits for upcoming semester: {min_credits_per_semester}\n\n")
-    # print(f"Status:\t{'Num:':<15}{'Course Name:':<40} "
-    #       f"{'Cr of Min:':<5}"
-    #       f"{'Total':>15}/{TOTAL_CREDITS_FOR_GRADUATION}:")
-    
-
-
     if not is_graduated:
         # loop through to generate a semester or a whole schedule
         while (not is_course_generation_complete):
+            # a required course that can never be taken keeps a complete schedule from graduating, it is given up
+            if generate_complete_schedule and semester >= settings["SCHEDULER_MAX_SEMESTERS"]:
+                outstanding = graduation_tracker.outstanding_requirements(
+                    total_credits_accumulated, min_3000_course_still_needed,
+                    cert_elective_courses_still_needed, gen_ed_credits_still_needed)
+                missing = [", ".join(model.names_of(requirement['courses'])) if 'courses' in requirement
+                           else f"{requirement['requirement']} ({requirement['remaining']})" for requirement in outstanding]
+                raise UnschedulableError(f"The schedule does not graduate within {settings['SCHEDULER_MAX_SEMESTERS']} "
+                                         f"semesters, still missing: {', '.join(missing)}")
+
             course_added = False
 
             # adjust credit ratios for scheduling
@@ -737,145 +986,64 @@ def generate_semester(request): # -> dict[Union[str, Any], Union[Union[str, list
             max_CS_math_total_credits = min_credits_per_semester - 3
             max_CS_elective_credits_per_semester = 6
 
-            # first, attempt to add a required course
-            for index, x in enumerate(required_courses_dict_list):
-                course: str = x[0]  # holds course subject + number
-                course_info: dict = x[1]  # holds all other information about course
-                concurrent = None
-                if "concurrent" in course_info.keys():
-                    concurrent = course_info["concurrent"]
-
-                # add course to schedule if not already added AND current semester doesn't have too many core credits
-                if (course not in courses_taken and current_semester_credits < max_core_credits_per_semester):
-
-                    # if the course has no pre-requisites
-                    if len(course_info["prerequisite"]) == 0:
-                        course_added, current_semester_classes, courses_taken, total_credits_accumulated, current_semester_credits \
-                            = add_course(
-                            current_semester, course_info, current_semester_classes, course, courses_taken,
-                            total_credits_accumulated, current_semester_credits, course_categories['R'])
-
-                    # if the course has at least one pre-requisite
+            # first, attempt to add a required course: the first remaining course (in course number order) whose
+            # pre-requisites are met and that is offered this semester, as long as the semester doesn't have too many core credits
+            course = None
+            if current_semester_credits < max_core_credits_per_semester:
+                course = ready_courses.next_course(current_semester, total_credits_accumulated)
+
+            if course is not None:
+                course_added, current_semester_classes, courses_taken, total_credits_accumulated, current_semester_credits \
+                    = add_course(
+                    current_semester, course, current_semester_classes, courses_taken,
+                    total_credits_accumulated, current_semester_credits, course_categories['R'])
+                ready_courses.course_added(course.id)
+
+                # update semester info
+                current_semester_cs_math_credits_per_semester += course.credit
+
+                is_graduated = graduation_tracker.is_graduated(
+                        total_credits_accumulated, min_3000_course_still_needed,
+                        cert_elective_courses_still_needed, gen_ed_credits_still_needed)
+
+                # if current semester is fully generated or generating the whole schedule and has graduated, then stop generation
+                if (current_semester_credits >= min_credits_per_semester) or (generate_complete_schedule and is_graduated):
+                    current_semester_info = {
+                        'semester': current_semester,
+                        'semester_number': semester,
+                        'credits': current_semester_credits,
+                        'schedule': current_semester_classes,
+                        'year': semester_years[current_semester]
+                    }
+                    course_schedule.append(current_semester_info)
+
+                    # if only generating a semester stop here
+                    if not generate_complete_schedule:
+                        is_course_generation_complete = True
+
+                    # reset semester info
+                    current_semester_credits = 0
+                    current_semester_classes = []
+                    ready_courses.start_semester()
+                    semester += 1
+                    current_semester_cs_math_credits_per_semester = 0
+                    current_CS_elective_credits_per_semester = 0
+                    current_semester = update_semester(current_semester, include_summer)
+
+                    if is_graduated and generate_complete_schedule:
+                        # generation is complete, the last course stays on the list of remaining courses
+                        is_course_generation_complete = True
+                        continue
                     else:
-                        # look up list of pre-requisites for current course
-                        course_added = False
-                        prereqs = course_info["prerequisite"]
-
-                        # iterate through pre-requisites for the current course
-                        required_courses_taken = False
-                        for prereqs in course_info["prerequisite"]:
-                            # if there is only one pre-requisite (a string)
-                            if isinstance(prereqs, str):
-                                # ENGLISH 3130 has a special prerequisite of at least 48 credit hours before the class can be taken
-                                if (course == "ENGLISH 3130"):
-                                    if (total_credits_accumulated >= 48) and (prereqs in courses_taken):
-                                        course_added, current_semester_classes, courses_taken, total_credits_accumulated, current_semester_credits \
-                                            = add_course(
-                                            current_semester, course_info, current_semester_classes, course, courses_taken,
-                                            total_credits_accumulated, current_semester_credits, course_categories['R']
-                                        )
-                                        break
-
-                                # add the current course because pre-requisite has already been taken
-                                elif (prereqs in courses_taken) and (
-                                        # `not any(current...)` verifies the prereq is not in the current semester class list of dictionaries
-                                        (not any(current['course'] == prereqs for current in current_semester_classes)) or (prereqs == concurrent)):
-                                    required_courses_taken = True
-                                else:
-                                    required_courses_taken = False
-
-                            # if there is a list of pre-requisites
-                            else:
-                                # if there is only one pre-requisite
-                                if (len(prereqs) == 1):
-
-                                    # add the current course because pre-requisite has already been taken
-                                    if (prereqs[0] in courses_taken) and (
-                                            (not any(current['course'] == prereqs[0] for current in current_semester_classes))
-                                            or (prereqs[0] == concurrent)):
-                                        course_added, current_semester_classes, courses_taken, total_credits_accumulated, current_semester_credits = add_course(
-                                            current_semester, course_info, current_semester_classes, course, courses_taken,
-                                            total_credits_accumulated, current_semester_credits, course_categories['R']
-                                        )
-                                        break
-
-                                # if there is >1 pre-requisite
-                                else:
-                                    # iterate through each pre-requisite
-                                    for prereq in prereqs:
-                                        if (prereq in courses_taken) and (
-                                                # `not any(current...)` verifies the prereq is not in the current semester class list of dictionaries
-                                                (not any(current['course'] == prereq for current in current_semester_classes)) or (prereq == concurrent)):
-                                            required_courses_taken = True
-                                        else:
-                                            required_courses_taken = False
-                                        if not required_courses_taken:
-                                            break
-
-                                    # add the current course because pre-requisite has already been taken
-                                    if required_courses_taken:
-                                        course_added, current_semester_classes, courses_taken, total_credits_accumulated, current_semester_credits = add_course(
-                                            current_semester, course_info, current_semester_classes, course, courses_taken,
-                                            total_credits_accumulated, current_semester_credits, course_categories['R']
-                                        )
-                                        required_courses_taken = False
-                                        break
-                        if required_courses_taken:
-                            course_added, current_semester_classes, courses_taken, total_credits_accumulated, current_semester_credits = add_course(
-                                current_semester, course_info, current_semester_classes, course, courses_taken,
-                                total_credits_accumulated, current_semester_credits, course_categories['R']
-                            )
-
-                    # if the course was added, update semester info
-                    if course_added:
-                        current_semester_cs_math_credits_per_semester += int(course_info['credit'])
-                        # print(f"Added: \t{course:<15}{course_info['course_name'][:40]:<40} "
-                        #     f"{current_semester_credits:<2} of {min_credits_per_semester:<2}"
-                        #     f"{total_credits_accumulated:>15}")
-                        
-                        is_graduated = graduation_check(
-                                total_credits_accumulated, required_courses_tuple,
-                                courses_taken, min_3000_course_still_needed,
-                                cert_elective_courses_still_needed, gen_ed_credits_still_needed)
+                        if(current_semester == first_semester):
+                            semester_years = {key: value + 1 for key, value in semester_years.items()}
+                        # ensure summer credit hours are not F/Sp credit hours
+                        if (current_semester == "Summer" and generate_complete_schedule):
+                            min_credits_per_semester = summer_credit_count
+                        elif (current_semester != "Summer" and generate_complete_schedule):
+                            min_credits_per_semester = temp_min_credits_per_semester
 
-                        # if current semester is fully generated or generating the whole schedule and has graduated, then stop generation
-                        if (current_semester_credits >= min_credits_per_semester) or (generate_complete_schedule and is_graduated):
-                            current_semester_info = {
-                                'semester': current_semester,
-                                'semester_number': semester,
-                                'credits': current_semester_credits,
-                                'schedule': current_semester_classes,
-                                'year': semester_years[current_semester]
-                            }
-                            course_schedule.append(current_semester_info)
-
-                            # if only generating a semester stop here
-                            if not generate_complete_schedule:
-                                is_course_generation_complete = True
-
-                            # reset semester info
-                            current_semester_credits = 0
-                            current_semester_classes = []
-                            semester += 1
-                            current_semester_cs_math_credits_per_semester = 0
-                            current_CS_elective_credits_per_semester = 0
-                            current_semester = update_semester(current_semester, include_summer)
-
-                            if is_graduated and generate_complete_schedule:
-                                is_course_generation_complete = True
-                                break
-                            else:
-                                if(current_semester == first_semester):
-                                    semester_years = {key: value + 1 for key, value in semester_years.items()}
-                                    # print(f"\nNext Semester, {current_semester} {semester_years[current_semester]}")
-                                # ensure summer credit hours are not F/Sp credit hours
-                                if (current_semester == "Summer" and generate_complete_schedule):
-                                    min_credits_per_semester = summer_credit_count
-                                elif (current_semester != "Summer" and generate_complete_schedule):
-                                    min_credits_per_semester = temp_min_credits_per_semester
-
-                        required_courses_dict_list.pop(index)
-                        break
+                ready_courses.pop(course.id)
 
             # second, if a required course was NOT added above, add some kind of elective
             if (not course_added):
@@ -884,15 +1052,9 @@ def generate_semester(request): # -> dict[Union[str, Any], Union[Union[str, list
                     if gen_ed_credits_still_needed >= DEFAULT_CREDIT_HOURS:
                         current_semester_classes.append(add_gen_ed_elective())
                         gen_ed_credits_still_needed -= DEFAULT_CREDIT_HOURS
-                        # print(f"Added: \t{'GEN ED':<15}{'[User Selects]':<40} "
-                        #     f"{current_semester_credits + 3:<2} of {min_credits_per_semester:<2}"
-                        #     f"{total_credits_accumulated + 3:>15}")
                     else:
                         current_semester_classes.append(add_free_elective())
                         free_elective_credits_accumulated += DEFAULT_CREDIT_HOURS
-                        # print(f"Added: \t{'FREE ELEC':<15}{'[User Selects]':<40} "
-                        #     f"{current_semester_credits + 3:<2} of {min_credits_per_semester:<2}"
-                        #     f"{total_credits_accumulated + 3:>15}")
                 # if user CAN take 3000+ level classes
                 else:
                     # user elects for a certificate
@@ -925,9 +1087,6 @@ def generate_semester(request): # -> dict[Union[str, Any], Union[Union[str, list
                                 current_semester_cs_math_credits_per_semester += DEFAULT_CREDIT_HOURS
                                 current_CS_elective_credits_per_semester += DEFAULT_CREDIT_HOURS
                                 min_3000_course_still_needed -= 1
-                                # print(f"Added: \t{'COMP SCI 3000+':<15}{'[User Selects]':<40} "
-                                #     f"{current_semester_credits + 3:<2} of {min_credits_per_semester:<2}"
-                                #     f"{total_credits_accumulated + 3:>15}")
 
                             # condition 4: if elective 3000-level courses are still needed, add these secondarily
                             elif cert_elective_courses_still_needed > 0:
@@ -944,40 +1103,25 @@ def generate_semester(request): # -> dict[Union[str, Any], Union[Union[str, list
                                 current_semester_cs_math_credits_per_semester += DEFAULT_CREDIT_HOURS
                                 current_CS_elective_credits_per_semester += DEFAULT_CREDIT_HOURS
                                 cert_elective_courses_still_needed -= 1
-                                # print(f"Added: \t{'CMP SCI CERT':<15}{'[User Selects]':<40} "
-                                #     f"{current_semester_credits + 3:<2} of {min_credits_per_semester:<2}"
-                                #     f"{total_credits_accumulated + 3:>15}")
 
                             # all 4 conditions fail.
                             # add a general education elective
                             elif gen_ed_credits_still_needed > 0:
                                 current_semester_classes.append(add_gen_ed_elective())
-                                # print(f"Added: \t{'GEN ED':<15}{'[User Selects]':<40} "
-                                #     f"{current_semester_credits + 3:<2} of {min_credits_per_semester:<2}"
-                                #     f"{total_credits_accumulated + 3:>15}")
                                 gen_ed_credits_still_needed -= DEFAULT_CREDIT_HOURS
                             # add a free elective
                             else:
                                 current_semester_classes.append(add_free_elective())
                                 free_elective_credits_accumulated += DEFAULT_CREDIT_HOURS
-                                # print(f"Added: \t{'FREE ELEC':<15}{'[User Selects]':<40} " 
-                                #     f"{current_semester_credits + 3:<2} of {min_credits_per_semester:<2}" 
-                                #     f"{total_credits_accumulated + 3:>15}")
 
                         # if condition 1 or 2 fail, add a type of elective for balance
                         else:
                             if gen_ed_credits_still_needed > 0:
                                 current_semester_classes.append(add_gen_ed_elective())
                                 gen_ed_credits_still_needed -= DEFAULT_CREDIT_HOURS
-                                # print(f"Added: \t{'GEN ED':<15}{'[User Selects]':<40} "
-                                #     f"{current_semester_credits + 3:<2} of {min_credits_per_semester:<2}"
-                                #    f"{total_credits_accumulated + 3:>15}")
                             else:
                                 current_semester_classes.append(add_free_elective())
                                 free_elective_credits_accumulated += DEFAULT_CREDIT_HOURS
-                                # print(f"Added: \t{'FREE ELEC':<15}{'[User Selects]':<40} "
-                                #     f"{current_semester_credits + 3:<2} of {min_credits_per_semester:<2}"
-                                #     f"{total_credits_accumulated + 3:>15}")
 
 
                     # user does NOT elect for a certificate
@@ -1004,32 +1148,25 @@ def generate_semester(request): # -> dict[Union[str, Any], Union[Union[str, list
                             current_semester_cs_math_credits_per_semester += DEFAULT_CREDIT_HOURS
                             current_CS_elective_credits_per_semester += DEFAULT_CREDIT_HOURS
                             min_3000_course_still_needed -= 1
-                            # print(f"Added: \t{'CMP SCI 3000+':<15}{'[User Selects]':<40} "
-                            #     f"{current_semester_credits + 3:<2} of {min_credits_per_semester:<2}"
-                            #     f"{total_credits_accumulated + 3:>15}")
 
                         # if condition 1, 2, or 3 fail, add a type of elective for balance
                         else:
                             if gen_ed_credits_still_needed > 0:
                                 current_semester_classes.append(add_gen_ed_elective())
                                 gen_ed_credits_still_needed -= DEFAULT_CREDIT_HOURS
-                                print(f"Added: \t{'GEN ED':<15}{'[User Selects]':<40} "
-                                    f"{current_semester_credits + 3:<2} of {min_credits_per_semester:<2}"
-                                    f"{total_credits_accumulated + 3:>15}")
+                                logger.debug("Added: \t%-15s%-40s %-2s of %-2s%15s", "GEN ED", "[User Selects]",
+                                             current_semester_credits + 3, min_credits_per_semester,
+                                             total_credits_accumulated + 3)
                             else:
                                 current_semester_classes.append(add_free_elective())
                                 free_elective_credits_accumulated += DEFAULT_CREDIT_HOURS
-                                # print(f"Added: \t{'FREE ELEC':<15}{'[User Selects]':<40} "
-                                    # f"{current_semester_credits + 3:<2} of {min_credits_per_semester:<2}"
-                                    # f"{total_credits_accumulated + 3:>15}")
 
                 # regardless of the type of elective, add the credits
                 total_credits_accumulated = total_credits_accumulated + DEFAULT_CREDIT_HOURS
                 current_semester_credits = current_semester_credits + DEFAULT_CREDIT_HOURS
 
-                is_graduated = graduation_check(
-                                total_credits_accumulated, required_courses_tuple,
-                                courses_taken, min_3000_course_still_needed,
+                is_graduated = graduation_tracker.is_graduated(
+                                total_credits_accumulated, min_3000_course_still_needed,
                                 cert_elective_courses_still_needed, gen_ed_credits_still_needed)
 
                 # if current semester is fully generated or generating the whole schedule and has graduated, then stop generation
@@ -1050,6 +1187,7 @@ def generate_semester(request): # -> dict[Union[str, Any], Union[Union[str, list
                     # reset semester info
                     current_semester_credits = 0
                     current_semester_classes = []
+                    ready_courses.start_semester()
                     semester += 1
                     current_semester_cs_math_credits_per_semester = 0
                     current_CS_elective_credits_per_semester = 0
@@ -1057,7 +1195,6 @@ def generate_semester(request): # -> dict[Union[str, Any], Union[Union[str, list
 
                     if(current_semester == first_semester):
                         semester_years = {key: value + 1 for key, value in semester_years.items()}
-                        # print(f"\nNext Semester, {current_semester} {semester_years[current_semester]}")
                     # ensure summer credit hours are not F/Sp credit hours
                     if (current_semester == "Summer" and generate_complete_schedule):
                         min_credits_per_semester = summer_credit_count
@@ -1083,7 +1220,6 @@ def generate_semester(request): # -> dict[Union[str, Any], Union[Union[str, list
 
         if(current_semester == first_semester):
                             semester_years = {key: value + 1 for key, value in semester_years.items()}
-                            # print(f"\nNext Semester, {current_semester} {semester_years[current_semester]}")
 
     if (current_semester != "Summer" and not generate_complete_schedule):
         min_credits_per_semester = temp_min_credits_per_semester
@@ -1097,13 +1233,6 @@ def generate_semester(request): # -> dict[Union[str, Any], Union[Union[str, list
     else:
         minimum_semester_credits = list(map(lambda x: x, range(3, 22)))
 
-    # print(f'{certificate_choice=}')
-    #print(f'{certificate_option=}')
-    # print(f'{certificate_choice_xml_tag=}')
-
-    # print(f'{min_credits_per_semester=}')
-    # print(f'{temp_min_credits_per_semester=}')
-
     # Calculating counter values (credits for ELECTIVES)
     accumulated_gen_eds = (TOTAL_CREDITS_FOR_GEN_EDS - gen_ed_credits_still_needed)
     accumulated_certificates = (TOTAL_CREDITS_FOR_CERTIFICATE_ELECTIVES - (cert_elective_courses_still_needed* DEFAULT_CREDIT_HOURS))
@@ -1111,58 +1240,71 @@ def generate_semester(request): # -> dict[Union[str, Any], Union[Union[str, list
     modified_total_for_3000 = (TOTAL_CREDITS_FOR_BSCS_ELECTIVES - (TOTAL_CREDITS_FOR_CERTIFICATE_ELECTIVES+ (num_3000_replaced_by_cert_core*DEFAULT_CREDIT_HOURS)))
     modified_accumulated_3000 = (modified_total_for_3000 -(min_3000_course_still_needed*DEFAULT_CREDIT_HOURS))
 
-    # print(f"{min_3000_course_still_needed=} {cert_elective_courses_still_needed=} {num_3000_replaced_by_cert_core=}")
-    # print(f'TOTAL_CREDITS_FOR_GEN_EDS:               {accumulated_gen_eds:>2} / {TOTAL_CREDITS_FOR_GEN_EDS}')
-    # print(f'TOTAL_CREDITS_FOR_BSCS_ELECTIVES:        {accumulated_3000:>2} / {TOTAL_CREDITS_FOR_BSCS_ELECTIVES}')
-    # print(f'TOTAL_CREDITS_FOR_BSCS_ELECTIVES after certificate added: {modified_accumulated_3000} / {modified_total_for_3000}')
-    # print(f'TOTAL_CREDITS_FOR_CERTIFICATE_ELECTIVES: {accumulated_certificates:>2} / {TOTAL_CREDITS_FOR_CERTIFICATE_ELECTIVES}')
-    # print(f'Total Free Electives Accumulated:        {free_elective_credits_accumulated:<5}')
-    # for course, info in required_courses_dict_list:
-    #     print(f'{course}', end=", ")
-    # print("\n")
-    # print(f'{required_courses_dict_list=}')
-
-
-    # complete graduation check
-    # print("Certificate Electives Still Needed ", cert_elective_courses_still_needed)
-    # print("Gen Eds Still Needed ", gen_ed_credits_still_needed)
-    # print("Total Credits Accumulated ", total_credits_accumulated)
-    # print("Required Courses Tuple ", required_courses_tuple)
-    # print("Min 3000+ courses ", min_3000_course_still_needed)
-    # print("courses taken", courses_taken)
+    remaining_courses = ready_courses.remaining()
 
-    return {
-        "required_courses_dict_list": json.dumps(required_courses_dict_list),
-        "required_courses_dict_list_unchanged": json.dumps(courses_dict_list_unchanged),
-        "semesters": user_semesters,
-        "total_credits": total_credits_accumulated,
-        "course_schedule": json.dumps(course_schedule),
-        "course_schedule_display": course_schedule,
-        "courses_taken": json.dumps(courses_taken),
-        "list_of_required_courses_taken_display": courses_taken,
-        "semester_number": semester,
-        "waived_courses": waived_courses,
+    # everything the next semester needs, kept on the server between requests
+    scheduler_state: SchedulerState = {
         "current_semester": current_semester,
-        "minimum_semester_credits": minimum_semester_credits,
-        "min_3000_course": min_3000_course_still_needed,
-        "include_summer": include_summer,
-        "certificate_choice": json.dumps(certificate_choice),
-        "certificates_display": certificate_choice,
+        "semester_number": semester,
         "num_3000_replaced_by_cert_core": num_3000_replaced_by_cert_core,
-        "cert_elective_courses_still_needed": cert_elective_courses_still_needed,
-        "TOTAL_CREDITS_FOR_CERTIFICATE_ELECTIVES": TOTAL_CREDITS_FOR_CERTIFICATE_ELECTIVES,
-        "saved_minimum_credits_selection": min_credits_per_semester,
-        "gen_ed_credits_still_needed": gen_ed_credits_still_needed,
-        "full_schedule_generation": generate_complete_schedule,
-        "minimum_summer_credits": summer_credit_count,
         "first_semester": first_semester,
-        "semester_years": json.dumps(semester_years),
-        "semester_years_display": semester_years,
-        "course_prereqs_for": json.dumps(course_prereqs_for),
+        "semester_years": semester_years,
         "user_name": user_name,
-        "fe_taken": free_elective_credits_accumulated,
         "ge_taken": ge_taken,
+        "fe_taken": free_elective_credits_accumulated,
+        "gen_ed_credits_still_needed": gen_ed_credits_still_needed,
+        "cert_elective_courses_still_needed": cert_elective_courses_still_needed,
+        "min_3000_course": min_3000_course_still_needed,
+        "total_credits": total_credits_accumulated,
+        "minimum_summer_credits": summer_credit_count,
+        "catalog_version": state["catalog_version"],
+        "remaining_courses": remaining_courses,
+        "planned_courses": planned_courses,
+        "semesters": user_semesters,
+        "include_summer": include_summer,
+        "saved_minimum_credits_selection": min_credits_per_semester,
         "is_graduated": is_graduated,
-        "required_courses_tuple": json.dumps(required_courses_tuple),
-        "required_courses_tuple_display": required_courses_tuple
+        "certificate_choice": certificate_choice,
+        "TOTAL_CREDITS_FOR_CERTIFICATE_ELECTIVES": TOTAL_CREDITS_FOR_CERTIFICATE_ELECTIVES,
+        "courses_taken": courses_taken.order,
+        "required_courses_tuple": required_courses_tuple
     }
+
+    # map the course ids back to display names
+    courses_taken_display = model.names_of(courses_taken)
+    required_courses_tuple_display = model.names_of(required_courses_tuple)
+    outstanding_requirements = graduation_tracker.outstanding_requirements(
+        total_credits_accumulated, min_3000_course_still_needed,
+        cert_elective_courses_still_needed, gen_ed_credits_still_needed)
+    for requirement in outstanding_requirements:
+        if 'courses' in requirement:
+            requirement['courses'] = model.names_of(requirement['courses'])
+
+    return PlanResult(
+        scheduler_state=scheduler_state,
+        course_schedule=course_schedule,
+        semester_number=semester,
+        current_semester=current_semester,
+        semesters=user_semesters,
+        first_semester=first_semester,
+        semester_years=semester_years,
+        include_summer=include_summer,
+        is_graduated=is_graduated,
+        full_schedule_generation=generate_complete_schedule,
+        user_name=user_name,
+        total_credits=total_credits_accumulated,
+        ge_taken=ge_taken,
+        fe_taken=free_elective_credits_accumulated,
+        gen_ed_credits_still_needed=gen_ed_credits_still_needed,
+        min_3000_course=min_3000_course_still_needed,
+        num_3000_replaced_by_cert_core=num_3000_replaced_by_cert_core,
+        cert_elective_courses_still_needed=cert_elective_courses_still_needed,
+        total_credits_for_certificate_electives=TOTAL_CREDITS_FOR_CERTIFICATE_ELECTIVES,
+        certificate_choice=certificate_choice,
+        minimum_semester_credits=minimum_semester_credits,
+        saved_minimum_credits_selection=min_credits_per_semester,
+        minimum_summer_credits=summer_credit_count,
+        courses_taken=courses_taken_display,
+        required_courses=required_courses_tuple_display,
+        outstanding_requirements=outstanding_requirements
+    )
@@ -0,0 +1,77 @@
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Callable, Hashable, Optional
+
+
+class LRUCache:
+    """
+    Thread-safe, size-bounded cache with an optional time-to-live.
+
+    When the cache is full the least recently used entry is dropped. Entries
+    older than `ttl` seconds are treated as missing and removed when they are
+    next looked up.
+    """
+
+    def __init__(self, max_entries: int, ttl: Optional[float] = None, clock: Callable[[], float] = time.monotonic):
+        """
+        Parameters
+        ----------
+        max_entries:    int
+                        number of entries kept before the least recently used one is dropped
+        ttl:            float, optional
+                        seconds an entry stays valid after it was stored, None to keep entries until evicted
+        clock:          Callable
+                        returns the current time in seconds
+        """
+        if max_entries < 1:
+            raise ValueError("max_entries must be at least 1")
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self.clock = clock
+        self._lock = threading.Lock()
+        self._entries = OrderedDict()  # key -> (expiry time or None, value)
+
+    def get(self, key: Hashable, default: Any = None) -> Any:
+        """
+        returns the value stored for `key` (marking it as recently used), or `default` if missing or expired.
+        """
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return default
+            expires, value = entry
+            if expires is not None and expires <= self.clock():
+                del self._entries[key]
+                return default
+            self._entries.move_to_end(key)
+            return value
+
+    def put(self, key: Hashable, value: Any) -> None:
+        """
+        stores `value` for `key`, dropping the least recently used entries if the cache is full.
+        """
+        expires = self.clock() + self.ttl if self.ttl is not None else None
+        with self._lock:
+            self._entries[key] = (expires, value)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def pop(self, key: Hashable, default: Any = None) -> Any:
+        """
+        removes `key` and returns its value, or `default` if it was not stored.
+        """
+        with self._lock:
+            entry = self._entries.pop(key, None)
+        return default if entry is None else entry[1]
+
+    def clear(self) -> None:
+        """
+        removes every entry.
+        """
+        with self._lock:
+            self._entries.clear()
+
+    def __len__(self) -> int:
+        return len(self._entries)
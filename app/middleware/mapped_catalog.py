@@ -0,0 +1,309 @@
+import mmap
+import struct
+import sys
+from array import array
+from collections.abc import ItemsView, Mapping, Sequence
+from typing import Any, BinaryIO, Optional
+
+from app.middleware.catalog_cache import freeze, thaw
+
+# every node of the table is a fixed-size record of three unsigned ints: (kind, a, b)
+#   NONE:   -
+#   STR:    a = string id
+#   INT:    a = the value (two's complement)
+#   LIST:   a = number of items, b = index in the item array of their node ids
+#   DICT:   a = number of entries, b = index in the item array of their key string ids, followed by
+#           their value node ids and by the positions of the entries sorted by key (for lookups)
+NONE, STR, INT, LIST, DICT = range(5)
+_NODE_SIZE = 3
+
+# byte order of the arrays, then the root node id and the size of each section
+_TABLE_HEADER = struct.Struct('<c3x5I')
+_BYTE_ORDER = b'L' if sys.byteorder == 'little' else b'B'
+
+
+class MappedTable:
+    """
+    A read-only tree of dictionaries, lists, strings and ints stored in a memory-mapped file.
+
+    The file holds a string table (an array of offsets into the UTF-8 bytes of every distinct
+    string), an array of fixed-size node records and an array of item ids the container nodes
+    point into (see `write_table`). Nothing is decoded when the file is opened: the views
+    returned by `value` (MappedDict, MappedList) read the records they need from the mapping,
+    so every process that opens the same file shares its pages instead of holding its own copy.
+
+    The file must never be modified in place, only replaced (see `write_table`): the mapping of
+    a replaced file stays valid for as long as views of it are in use.
+    """
+
+    __slots__ = ('_mmap', '_offsets', '_nodes', '_items', '_data_start', 'root')
+
+    def __init__(self, fd: BinaryIO, offset: int = 0):
+        """
+        Parameters
+        ----------
+        fd:         BinaryIO
+                    the open file, raises a ValueError if it does not hold a table written by `write_table`
+                    on a machine with the same byte order
+        offset:     int
+                    where the table starts in the file (a multiple of 4)
+        """
+        size = fd.seek(0, 2)
+        if size < offset + _TABLE_HEADER.size:
+            raise ValueError("the catalog table is truncated")
+        self._mmap = mmap.mmap(fd.fileno(), 0, access=mmap.ACCESS_READ)
+        byte_order, root, string_count, node_count, item_count, data_size = \
+            _TABLE_HEADER.unpack_from(self._mmap, offset)
+        if byte_order != _BYTE_ORDER:
+            raise ValueError("the catalog table was written on a machine with another byte order")
+
+        view = memoryview(self._mmap)
+        start = offset + _TABLE_HEADER.size
+        sections = []
+        for count in (string_count + 1, node_count * _NODE_SIZE, item_count):
+            end = start + count * 4
+            if end > size:
+                raise ValueError("the catalog table is truncated")
+            sections.append(view[start:end].cast('I'))
+            start = end
+        self._offsets, self._nodes, self._items = sections
+        self._data_start = start
+        if start + data_size != size or root >= node_count:
+            raise ValueError("the catalog table is truncated")
+        self.root = root
+
+    def string_bytes(self, string_id: int) -> bytes:
+        return self._mmap[self._data_start + self._offsets[string_id]:self._data_start + self._offsets[string_id + 1]]
+
+    def string(self, string_id: int) -> str:
+        return self.string_bytes(string_id).decode('utf-8')
+
+    def value(self, node_id: int) -> Any:
+        """
+        returns the value of a node: a string, int or None, or a read-only view of a dictionary or list.
+        """
+        position = node_id * _NODE_SIZE
+        kind, a, b = self._nodes[position:position + _NODE_SIZE]
+        if kind == STR:
+            return self.string(a)
+        if kind == DICT:
+            return MappedDict(self, a, b)
+        if kind == LIST:
+            return MappedList(self, a, b)
+        if kind == INT:
+            return a - (1 << 32) if a >= 1 << 31 else a
+        return None
+
+    def copy(self, node_id: int) -> Any:
+        """
+        returns the value of a node with regular (mutable) dictionaries and lists, as `thaw` does.
+        """
+        nodes = self._nodes
+        position = node_id * _NODE_SIZE
+        kind = nodes[position]
+        if kind == STR:
+            return self.string(nodes[position + 1])
+        if kind == DICT:
+            return self.copy_dict(nodes[position + 1], nodes[position + 2])
+        if kind == LIST:
+            return self.copy_list(nodes[position + 1], nodes[position + 2])
+        return self.value(node_id)
+
+    def copy_dict(self, count: int, start: int) -> dict:
+        keys, values = self._items[start:start + count], self._items[start + count:start + 2 * count]
+        return {self.string(key): self.copy(value) for key, value in zip(keys, values)}
+
+    def copy_list(self, count: int, start: int) -> list:
+        return [self.copy(item) for item in self._items[start:start + count]]
+
+
+class MappedDict(Mapping):
+    """
+    Read-only view of a dictionary of a MappedTable, in the order it was written.
+
+    Keys are looked up with a binary search over the entries sorted by key. Like a FrozenDict,
+    `copy.deepcopy` returns a regular (mutable) dictionary, and pickling stores a FrozenDict.
+    """
+
+    __slots__ = ('_table', '_count', '_start')
+
+    def __init__(self, table: MappedTable, count: int, start: int):
+        self._table = table
+        self._count = count
+        self._start = start
+
+    def _find(self, key: Any) -> Optional[int]:
+        if not isinstance(key, str):
+            return None
+        wanted = key.encode('utf-8')
+        items = self._table._items
+        keys, order = self._start, self._start + 2 * self._count
+        low, high = 0, self._count
+        while low < high:
+            middle = (low + high) // 2
+            entry = items[order + middle]
+            found = self._table.string_bytes(items[keys + entry])
+            if found == wanted:
+                return entry
+            if found < wanted:
+                low = middle + 1
+            else:
+                high = middle
+        return None
+
+    def __getitem__(self, key: Any) -> Any:
+        entry = self._find(key)
+        if entry is None:
+            raise KeyError(key)
+        return self._table.value(self._table._items[self._start + self._count + entry])
+
+    def __contains__(self, key: Any) -> bool:
+        return self._find(key) is not None
+
+    def __iter__(self):
+        items = self._table._items
+        for entry in range(self._start, self._start + self._count):
+            yield self._table.string(items[entry])
+
+    def __len__(self) -> int:
+        return self._count
+
+    def items(self) -> ItemsView:
+        return _MappedItems(self)
+
+    def __repr__(self) -> str:
+        return f"{type(self).__name__}({thaw(self)!r})"
+
+    def __reduce__(self):
+        return (freeze, (thaw(self),))
+
+    def __copy__(self) -> dict:
+        return dict(self)
+
+    def __deepcopy__(self, memo) -> dict:
+        return self._table.copy_dict(self._count, self._start)
+
+
+class _MappedItems(ItemsView):
+    # reads the keys and values side by side instead of looking every key up again
+
+    def __iter__(self):
+        mapping = self._mapping
+        table, items, count = mapping._table, mapping._table._items, mapping._count
+        for entry in range(mapping._start, mapping._start + count):
+            yield table.string(items[entry]), table.value(items[entry + count])
+
+
+class MappedList(Sequence):
+    """
+    Read-only view of a list of a MappedTable, which compares equal to the tuple of its items (as
+    lists are stored in a FrozenDict). `copy.deepcopy` returns a regular list.
+    """
+
+    __slots__ = ('_table', '_count', '_start')
+
+    def __init__(self, table: MappedTable, count: int, start: int):
+        self._table = table
+        self._count = count
+        self._start = start
+
+    def __getitem__(self, index):
+        if isinstance(index, slice):
+            return tuple(self[position] for position in range(*index.indices(self._count)))
+        if index < 0:
+            index += self._count
+        if not 0 <= index < self._count:
+            raise IndexError("list index out of range")
+        return self._table.value(self._table._items[self._start + index])
+
+    def __len__(self) -> int:
+        return self._count
+
+    def __eq__(self, other) -> bool:
+        if isinstance(other, (tuple, MappedList)):
+            return tuple(self) == tuple(other)
+        return NotImplemented
+
+    def __hash__(self) -> int:
+        return hash(tuple(self))
+
+    def __repr__(self) -> str:
+        return f"{type(self).__name__}({tuple(self)!r})"
+
+    def __reduce__(self):
+        return (freeze, (thaw(self),))
+
+    def __copy__(self) -> tuple:
+        return tuple(self)
+
+    def __deepcopy__(self, memo) -> list:
+        return self._table.copy_list(self._count, self._start)
+
+
+class _TableWriter:
+
+    def __init__(self):
+        self.strings = {}
+        self.nodes = array('I')
+        self.items = array('I')
+
+    def string(self, value: str) -> int:
+        return self.strings.setdefault(value, len(self.strings))
+
+    def node(self, value: Any) -> int:
+        # the children are written before their parent, which points to their ids
+        if value is None:
+            record = (NONE, 0, 0)
+        elif isinstance(value, str):
+            record = (STR, self.string(value), 0)
+        elif isinstance(value, int) and not isinstance(value, bool):
+            if not -(1 << 31) <= value < 1 << 31:
+                raise ValueError(f"{value} does not fit in a catalog table")
+            record = (INT, value & 0xFFFFFFFF, 0)
+        elif isinstance(value, Mapping):
+            keys = list(value.keys())
+            if not all(isinstance(key, str) for key in keys):
+                raise TypeError("only dictionaries with string keys can be written to a catalog table")
+            values = [self.node(item) for item in value.values()]
+            start = len(self.items)
+            self.items.extend(self.string(key) for key in keys)
+            self.items.extend(values)
+            self.items.extend(sorted(range(len(keys)), key=lambda entry: keys[entry].encode('utf-8')))
+            record = (DICT, len(keys), start)
+        elif isinstance(value, (list, tuple, MappedList)):
+            values = [self.node(item) for item in value]
+            start = len(self.items)
+            self.items.extend(values)
+            record = (LIST, len(values), start)
+        else:
+            raise TypeError(f"{type(value).__name__} values cannot be written to a catalog table")
+        self.nodes.extend(record)
+        return len(self.nodes) // _NODE_SIZE - 1
+
+
+def write_table(value: Any, fd: BinaryIO) -> None:
+    """
+    writes a tree of dictionaries (with string keys), lists, strings, ints and None to a table file
+    opened by `MappedTable`.
+
+    Parameters
+    ----------
+    value:      Any
+                the root of the tree
+    fd:         BinaryIO
+                the file to write to, positioned where the table starts (a multiple of 4)
+    """
+    writer = _TableWriter()
+    root = writer.node(value)
+    offsets = array('I', [0])
+    data = bytearray()
+    for string in writer.strings:
+        data += string.encode('utf-8')
+        offsets.append(len(data))
+
+    fd.write(_TABLE_HEADER.pack(_BYTE_ORDER, root, len(writer.strings), len(writer.nodes) // _NODE_SIZE,
+                                len(writer.items), len(data)))
+    fd.write(offsets.tobytes())
+    fd.write(writer.nodes.tobytes())
+    fd.write(writer.items.tobytes())
+    fd.write(data)
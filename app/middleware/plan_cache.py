@@ -0,0 +1,214 @@
+import hashlib
+import json
+import logging
+import pickle
+import threading
+import time
+from itertools import product
+from typing import Iterator, Mapping, Optional
+
+from app.middleware.batch_planning import PLANNER_SETTINGS, PlanningTimeout, ProfileError, planner_settings, \
+    profile_request, time_limit
+from app.middleware.course_parsing import UnschedulableError, catalog_for_version, certificate_choices, \
+    certificate_registry_cache, get_semester_years, plan_semester
+from app.middleware.lru_cache import LRUCache
+from app.middleware.planning import PlanRequest, PlanResult
+
+logger = logging.getLogger(__name__)
+
+
+def is_cacheable(plan: PlanRequest) -> bool:
+    """
+    returns True if `plan` asks for the complete schedule of a new student, the only plans that are cached.
+
+    Later steps depend on the semesters the student rearranged, so they are always planned.
+    """
+    return plan.generate_complete_schedule and plan.state["semester_number"] == 0 and not plan.course_schedule
+
+
+def profile_key(plan: PlanRequest, settings: Mapping, catalog: tuple) -> str:
+    """
+    returns the canonical hash of a new student's profile, under which its complete schedule is cached.
+
+    Plans that only differ in the name of the student share a key. Taken and waived courses are both
+    counted as taken, in the order the student is shown them.
+
+    Parameters
+    ----------
+    plan:       PlanRequest
+                the plan of a new student (see `is_cacheable`)
+    settings:   Mapping
+                the SCHEDULER_* settings of the app config
+    catalog:    tuple
+                the versions of the course catalog and of the certificates the plan is built from
+    """
+    profile = {name: value for name, value in plan.state.items() if name != "user_name"}
+    profile.update(
+        minimum_semester_credits=plan.minimum_semester_credits,
+        optimize_schedule=plan.optimize_schedule,
+        include_summer=plan.include_summer,
+        courses_taken=list(dict.fromkeys(plan.courses_taken + plan.waived_courses)),
+        has_passed_math_placement_exam=plan.has_passed_math_placement_exam,
+        certificate_choice=list(plan.certificate_choice),
+        # the years of the semesters move on with the calendar
+        semester_years=get_semester_years(plan.state["current_semester"]),
+        settings={name: settings[name] for name in PLANNER_SETTINGS},
+        catalog=list(catalog)
+    )
+    return hashlib.sha256(json.dumps(profile, sort_keys=True).encode("utf-8")).hexdigest()
+
+
+class PlanCache:
+    """
+    Keeps the complete schedules planned for new students, so identical profiles are only planned once.
+
+    Results are pickled when they are stored, so every hit returns a private copy that the
+    caller is free to modify (i.e. save as the scheduler state of a session). The cache is
+    emptied whenever the course catalog or the certificates change.
+    """
+
+    def __init__(self, max_entries: int, ttl: Optional[float] = None):
+        """
+        Parameters
+        ----------
+        max_entries:    int
+                        number of schedules kept, 0 to plan every request
+        ttl:            float, optional
+                        seconds a schedule stays valid after it was planned, None to keep it until evicted
+        """
+        self._results = LRUCache(max_entries, ttl) if max_entries > 0 else None
+        self._lock = threading.Lock()
+        self._catalog = None
+        self.hits = 0
+        self.misses = 0
+
+    def plan(self, plan: PlanRequest, settings: Mapping) -> PlanResult:
+        """
+        returns the result of `plan_semester`, from the cache for the complete schedule of a new student.
+
+        Raises a CatalogVersionError if the plan was built from a retired catalog, as `plan_semester` does.
+        """
+        if self._results is None or not is_cacheable(plan):
+            return plan_semester(plan, settings)
+
+        version = plan.state["catalog_version"]
+        catalog_for_version(version)
+        catalog = (version, certificate_registry_cache.digest)
+        with self._lock:
+            if catalog != self._catalog:
+                self._results.clear()
+                self._catalog = catalog
+
+        key = profile_key(plan, settings, catalog)
+        data = self._results.get(key)
+        with self._lock:
+            if data is None:
+                self.misses += 1
+            else:
+                self.hits += 1
+        if data is None:
+            result = plan_semester(plan, settings)
+            self._results.put(key, pickle.dumps(result, pickle.HIGHEST_PROTOCOL))
+            return result
+
+        result = pickle.loads(data)
+        result.user_name = plan.state["user_name"]
+        result.scheduler_state["user_name"] = plan.state["user_name"]
+        return result
+
+    def stats(self) -> dict:
+        """
+        returns the number of `entries`, `hits` and `misses` of the cache.
+        """
+        return {
+            "entries": 0 if self._results is None else len(self._results),
+            "hits": self.hits,
+            "misses": self.misses
+        }
+
+    def clear(self) -> None:
+        """
+        removes every schedule, keeping the counters.
+        """
+        if self._results is not None:
+            self._results.clear()
+
+
+def create_plan_cache(config) -> PlanCache:
+    """
+    creates the cache of complete schedules configured for the app.
+
+    Parameters
+    ----------
+    config:     Mapping
+                the Flask app config, using:
+                - `SCHEDULER_PLAN_CACHE_MAX_ENTRIES`: schedules kept, 0 to disable the cache
+                - `SCHEDULER_PLAN_CACHE_TTL`: seconds a schedule stays valid
+    Returns
+    ----------
+    PlanCache
+    """
+    return PlanCache(config["SCHEDULER_PLAN_CACHE_MAX_ENTRIES"], config["SCHEDULER_PLAN_CACHE_TTL"])
+
+
+def warm_up_profiles(config) -> Iterator[dict]:
+    """
+    returns the profiles (see `profile_request`) of the most common choices of new students, planned by `warm_up`.
+
+    Parameters
+    ----------
+    config:     Mapping
+                the Flask app config, using:
+                - `SCHEDULER_WARM_UP_SEMESTERS`: the first semesters
+                - `SCHEDULER_WARM_UP_CREDITS`: the credits per Fall and Spring semester
+                - `SCHEDULER_WARM_UP_SUMMER_CREDITS`: the credits per summer, None to plan without summers
+                every certificate choice of the home page is combined with each of these
+    """
+    for semester, credits, summer_credits, (certificate, _) in product(
+            config["SCHEDULER_WARM_UP_SEMESTERS"], config["SCHEDULER_WARM_UP_CREDITS"],
+            config["SCHEDULER_WARM_UP_SUMMER_CREDITS"], certificate_choices()):
+        yield {
+            "current_semester": semester,
+            "minimum_semester_credits": credits,
+            "include_summer": summer_credits is not None,
+            "minimum_summer_credits": summer_credits or 0,
+            "certificate": certificate
+        }
+
+
+def warm_up(cache: PlanCache, config, timeout: Optional[float] = None) -> dict:
+    """
+    plans the complete schedules of the common profiles (see `warm_up_profiles`) into the cache.
+
+    Must run in the main thread for `timeout` to apply. Profiles that fail or take too long are
+    logged and skipped, so they are planned again when a student asks for them.
+
+    Parameters
+    ----------
+    cache:      PlanCache
+                the cache the schedules are stored in
+    config:     Mapping
+                the Flask app config, for the grid and the settings of the planner
+    timeout:    float, optional
+                seconds after which a single profile is given up
+    Returns
+    ----------
+    dict
+                the number of profiles `planned` and `failed`, and the `seconds` it took
+    """
+    settings = planner_settings(config)
+    planned = failed = 0
+    started = time.perf_counter()
+    for profile in warm_up_profiles(config):
+        try:
+            with time_limit(timeout):
+                cache.plan(profile_request(profile), settings)
+            planned += 1
+        except (ProfileError, PlanningTimeout, UnschedulableError) as error:
+            logger.warning("Skipped warming up %s: %s", profile, error)
+            failed += 1
+        except Exception:
+            # a bug in the planner must not keep the app from starting, the student gets the error on request instead
+            logger.exception("Skipped warming up %s", profile)
+            failed += 1
+    return {"planned": planned, "failed": failed, "seconds": time.perf_counter() - started}
@@ -0,0 +1,443 @@
+import heapq
+from itertools import chain
+from typing import Callable, Iterable, Mapping, Optional
+
+from app.middleware.course_model import Course, CourseModel, TakenCourses, TERM_BITS
+
+
+class ReadyQueue:
+    """
+    The required courses that still have to be scheduled, ordered for the greedy planner.
+
+    The planner always adds the first remaining course (in course number order)
+    whose prerequisites are met and that is offered in the current term. Instead
+    of scanning every remaining course for each addition, the queue keeps a heap
+    of the courses that are ready per term, and when a course is taken it only
+    checks the courses that depend on it (see `CourseModel.dependents`).
+
+    A course never stops being ready once it is: taking courses, starting a new
+    semester and earning credits only ever satisfy more prerequisites. So a ready
+    course stays in the heaps until it is taken.
+
+    With `rank_by_chain`, ready courses that start a longer chain of courses
+    (see `CourseModel.chain_length`) are picked first, so the courses on the
+    critical path to graduation are not pushed back by courses nothing depends on.
+
+    With `release_semesters`, a course is held back until the semester it was
+    planned for (i.e. by `ScheduleSearch`), counting the current semester as 0.
+    """
+
+    __slots__ = ('model', 'courses_taken', 'credits_earned', '_order', '_rank', '_waiting', '_credit_gated',
+                 '_heaps', '_this_semester', '_scheduled', '_release_semesters', '_semester', '_held')
+
+    def __init__(self, model: CourseModel, remaining_courses: Iterable[int], courses_taken: TakenCourses,
+                 credits_earned: int, rank_by_chain: bool = False,
+                 release_semesters: Optional[Mapping[int, int]] = None):
+        """
+        Parameters
+        ----------
+        model:              CourseModel
+                            the courses of the schedule
+        remaining_courses:  Iterable
+                            ids of the required courses still to schedule, in the order they are considered
+        courses_taken:      TakenCourses
+                            the courses taken so far, shared with the planner
+        credits_earned:     int
+                            the credits earned so far
+        rank_by_chain:      bool
+                            consider the courses with the longest chain of dependent courses first,
+                            ties keep the order of `remaining_courses`
+        release_semesters:  Mapping, optional
+                            the semester (counted from the current one) each course can be added from,
+                            courses that are not listed are never added
+        """
+        self.model = model
+        self.courses_taken = courses_taken
+        self.credits_earned = credits_earned
+        self._order = list(remaining_courses)
+        ranked = self._order
+        if rank_by_chain:
+            ranked = sorted(self._order, key=lambda course_id: -model.chain_length[course_id])
+        self._rank = {course_id: rank for rank, course_id in enumerate(ranked)}
+        # remaining courses whose prerequisites are not met yet
+        self._waiting = set()
+        # waiting courses that also need a minimum number of credits, checked again whenever credits are earned
+        self._credit_gated = set()
+        # per term bit, a heap of (rank, course id) of the ready courses offered in that term
+        self._heaps = {term_bit: [] for term_bit in TERM_BITS.values()}
+        self._this_semester = []
+        # courses taken off the remaining list
+        self._scheduled = set()
+        self._release_semesters = release_semesters
+        self._semester = 0
+        # courses waiting for the semester they are released in
+        self._held = set()
+
+        for course_id in self._order:
+            if course_id not in courses_taken:
+                self._waiting.add(course_id)
+                if model.courses[course_id].minimum_credits:
+                    self._credit_gated.add(course_id)
+                self._check(course_id)
+
+    def _check(self, course_id: int) -> None:
+        if self._release_semesters is not None:
+            release_semester = self._release_semesters.get(course_id)
+            if release_semester is None or release_semester > self._semester:
+                self._held.add(course_id)
+                return
+        course = self.model.courses[course_id]
+        if course.is_ready(self.courses_taken, self.credits_earned):
+            self._waiting.discard(course_id)
+            self._credit_gated.discard(course_id)
+            for term_bit, heap in self._heaps.items():
+                if course.is_offered(term_bit):
+                    heapq.heappush(heap, (self._rank[course_id], course_id))
+
+    def _check_dependents(self, course_ids: Iterable[int], dependents: tuple) -> None:
+        for course_id in course_ids:
+            for dependent in dependents[course_id]:
+                if dependent in self._waiting:
+                    self._check(dependent)
+
+    def next_course(self, current_semester: str, credits_earned: int) -> Optional[Course]:
+        """
+        returns the first remaining course that can be added to the current semester, None if there is none.
+
+        Parameters
+        ----------
+        current_semester:   str
+                            the term of the current semester (i.e. `Fall`)
+        credits_earned:     int
+                            the credits earned so far, including the current semester
+        """
+        if credits_earned != self.credits_earned:
+            self.credits_earned = credits_earned
+            for course_id in list(self._credit_gated):
+                self._check(course_id)
+
+        heap = self._heaps[TERM_BITS[current_semester]]
+        while heap and heap[0][1] in self.courses_taken:
+            heapq.heappop(heap)
+        return self.model.courses[heap[0][1]] if heap else None
+
+    def course_added(self, course_id: int) -> None:
+        """
+        updates the courses that depend on a course that was just added to the current semester.
+        """
+        self._this_semester.append(course_id)
+        # most courses cannot be taken in the same semester as their pre-requisites, those wait for `start_semester`
+        self._check_dependents((course_id,), self.model.same_semester_dependents)
+
+    def start_semester(self) -> None:
+        """
+        starts a new semester; the courses of the previous semester can now be prerequisites of any course.
+        """
+        self.courses_taken.start_semester()
+        finished, self._this_semester = self._this_semester, []
+        self._check_dependents(finished, self.model.dependents)
+        self._semester += 1
+        if self._held:
+            held, self._held = self._held, set()
+            for course_id in held:
+                if course_id in self._waiting:
+                    self._check(course_id)
+
+    def pop(self, course_id: int) -> None:
+        """
+        takes a course off the list of remaining courses.
+        """
+        self._scheduled.add(course_id)
+
+    def remaining(self) -> list:
+        """
+        returns the ids of the remaining courses, in the order they are considered.
+        """
+        return [course_id for course_id in self._order if course_id not in self._scheduled]
+
+
+def expand_prerequisites(model: CourseModel, course_ids: Iterable[int], courses_taken: Iterable[int]) -> list:
+    """
+    adds the prerequisites that are still missing for a list of courses, until no planned course misses one.
+
+    A course misses its prerequisites when none of its prerequisite options (see `Course.options`)
+    is covered by the courses taken and planned so far. Its `CourseModel.prerequisite_choice` is
+    then planned as well, and checked in turn, so prerequisites of prerequisites are not left out.
+
+    Parameters
+    ----------
+    model:          CourseModel
+                    the courses of the schedule
+    course_ids:     Iterable
+                    ids of the courses that have to be taken
+    courses_taken:  Iterable
+                    ids of the courses already taken
+    Returns
+    ----------
+    list
+                    `course_ids` followed by the ids of the prerequisites that were added, in the order they were added
+    """
+    planned = list(course_ids)
+    known = 0
+    for course_id in chain(planned, courses_taken):
+        known |= 1 << course_id
+
+    # the prerequisites that are added are checked once the loop reaches them
+    for course_id in planned:
+        if not model.prerequisite_closure[course_id] & ~known:
+            # everything this course could need is already taken or planned (or it has no prerequisites)
+            continue
+        if not any(known & option == option for option in model.courses[course_id].options):
+            for prereq in model.prerequisite_choice[course_id]:
+                if not known >> prereq & 1:
+                    known |= 1 << prereq
+                    planned.append(prereq)
+    return planned
+
+
+class _TermWalk:
+    """
+    The terms ahead of a student (term 0 is the current term), with the most credits each of them can hold.
+    """
+
+    def __init__(self, term_at: Callable, credits_earned: int):
+        self._term_at = term_at
+        self._terms = []
+        # credits that can be earned by the end of each term
+        self._credits = []
+        self._credits_earned = credits_earned
+        # every term a course can be taken in, the terms repeat after the first few
+        self.offered = 0
+        for index in range(4):
+            self.offered |= self.term_bit(index)
+
+    def _extend(self, index: int) -> None:
+        while len(self._terms) <= index:
+            term_bit, credit_cap = self._term_at(len(self._terms))
+            self._terms.append((term_bit, credit_cap))
+            self._credits.append((self._credits[-1] if self._credits else self._credits_earned) + credit_cap)
+
+    def term_bit(self, index: int) -> int:
+        self._extend(index)
+        return self._terms[index][0]
+
+    def credit_cap(self, index: int) -> int:
+        self._extend(index)
+        return self._terms[index][1]
+
+    def first_term_with_credits(self, credits: int) -> int:
+        """
+        returns the first term by the end of which `credits` credits can have been earned.
+        """
+        index = 0
+        while True:
+            self._extend(index)
+            if self._credits[index] >= credits:
+                return index
+            index += 1
+
+    def next_offered(self, course: Course, index: int) -> int:
+        """
+        returns the first term from `index` on in which the course is offered.
+        """
+        while not course.is_offered(self.term_bit(index)):
+            index += 1
+        return index
+
+
+def earliest_graduation(model: CourseModel, remaining_courses: Iterable[int], courses_taken: Iterable[int],
+                        term_at: Callable, credits_earned: int, electives_needed: int,
+                        credits_for_graduation: int = 120, credits_for_3000_level: int = 60) -> dict:
+    """
+    computes a lower bound on the number of terms a student needs to graduate, without building a schedule.
+
+    No schedule of the remaining courses that follows the rules of the planner can graduate sooner,
+    the bound is the largest of:
+    - the terms needed to earn the missing credits when every term is filled up to its credit cap
+    - the longest chain of remaining courses, each taken in the first term it is offered in once its
+      prerequisites are done (and once enough credits can have been earned, i.e. ENGLISH 3130)
+    - the terms needed for the 3000+ level and certificate electives, at most two per term and only
+      once 60 credits can have been earned
+
+    Parameters
+    ----------
+    model:                  CourseModel
+                            the courses of the schedule
+    remaining_courses:      Iterable
+                            ids of the courses still to take
+    courses_taken:          Iterable
+                            ids of the courses already taken
+    term_at:                Callable
+                            returns the term bit (see TERM_BITS) and the most credits that fit in the n-th
+                            term from now, the current term being 0
+    credits_earned:         int
+                            the credits earned so far
+    electives_needed:       int
+                            the 3000+ level and certificate electives still needed
+    credits_for_graduation: int
+                            total credits needed to graduate
+    credits_for_3000_level: int
+                            credits that must be earned before a 3000+ level elective can be added
+    Returns
+    ----------
+    dict
+                            - `terms`: the least number of terms left, including the current term,
+                              None if some remaining course can never be taken
+                            - `limits`: the bound from each of `credits`, `prerequisite_chain` and `electives`
+                            - `critical_path`: ids of the longest chain of remaining courses, in the order taken
+                            - `unschedulable`: ids of the remaining courses that can never be taken
+    """
+    remaining_courses = list(remaining_courses)
+    terms = _TermWalk(term_at, credits_earned)
+
+    available = 0
+    for course_id in remaining_courses:
+        available |= 1 << course_id
+    taken = 0
+    for course_id in courses_taken:
+        taken |= 1 << course_id
+
+    # the first term each course can be taken in (-1 if already taken, None if never), and the
+    # prerequisite that held it back the longest
+    earliest = [None] * len(model.names)
+    held_back_by = [None] * len(model.names)
+    for course_id in model.prerequisite_order:
+        if taken >> course_id & 1:
+            earliest[course_id] = -1
+            continue
+        if not available >> course_id & 1 or not model.in_catalog(course_id):
+            continue
+        course = model.courses[course_id]
+        if not course.terms & terms.offered:
+            continue
+        for mask, strict_mask, minimum_credits in course.clauses:
+            start, last = 0, None
+            while mask:
+                bit = mask & -mask
+                mask ^= bit
+                prereq = bit.bit_length() - 1
+                if earliest[prereq] is None:
+                    break
+                # most prerequisites have to be done the term before
+                prereq_term = earliest[prereq] + (1 if strict_mask & bit else 0)
+                if prereq_term > start:
+                    start, last = prereq_term, prereq
+            else:
+                if minimum_credits:
+                    start = max(start, terms.first_term_with_credits(minimum_credits))
+                if earliest[course_id] is None or start < earliest[course_id]:
+                    earliest[course_id], held_back_by[course_id] = start, last
+        if earliest[course_id] is not None:
+            earliest[course_id] = terms.next_offered(course, earliest[course_id])
+
+    unschedulable = [course_id for course_id in remaining_courses if earliest[course_id] is None]
+
+    chain_terms, critical_path = 0, []
+    for course_id in remaining_courses:
+        if earliest[course_id] is not None and earliest[course_id] + 1 > chain_terms:
+            chain_terms = earliest[course_id] + 1
+            critical_path = [course_id]
+    while critical_path and held_back_by[critical_path[-1]] is not None \
+            and earliest[held_back_by[critical_path[-1]]] >= 0:
+        critical_path.append(held_back_by[critical_path[-1]])
+    critical_path.reverse()
+
+    credit_terms = 0
+    if credits_earned < credits_for_graduation:
+        credit_terms = terms.first_term_with_credits(credits_for_graduation) + 1
+
+    elective_terms = 0
+    if electives_needed > 0:
+        # an elective is added once the credits before it reach the minimum, each one is 3 credits
+        index = terms.first_term_with_credits(credits_for_3000_level + 3)
+        electives_left = electives_needed
+        while True:
+            electives_left -= min(2, terms.credit_cap(index) // 3)
+            if electives_left <= 0:
+                break
+            index += 1
+        elective_terms = index + 1
+
+    return {
+        'terms': max(credit_terms, chain_terms, elective_terms) if not unschedulable else None,
+        'limits': {'credits': credit_terms, 'prerequisite_chain': chain_terms, 'electives': elective_terms},
+        'critical_path': critical_path,
+        'unschedulable': unschedulable
+    }
+
+
+# the kinds of requirements reported by GraduationTracker.outstanding_requirements
+REQUIRED_COURSES = 'required_courses'
+CMP_SCI_3000_ELECTIVES = 'cmp_sci_3000_electives'
+CERTIFICATE_ELECTIVES = 'certificate_electives'
+GEN_ED_CREDITS = 'gen_ed_credits'
+TOTAL_CREDITS = 'total_credits'
+
+
+class GraduationTracker:
+    """
+    Tracks whether a schedule meets the graduation requirements.
+
+    The required courses are kept as a bitmask over course ids and compared to
+    the bitset of the shared TakenCourses, so every check is a few integer
+    operations no matter how many courses are required. The elective and credit
+    counters are owned by the planner and passed in when checking.
+    """
+
+    __slots__ = ('required_courses', 'courses_taken', 'credits_for_graduation', '_required_mask')
+
+    def __init__(self, required_courses: Iterable[int], courses_taken: TakenCourses, credits_for_graduation: int = 120):
+        """
+        Parameters
+        ----------
+        required_courses:       Iterable
+                                ids of the courses that must be taken to graduate
+        courses_taken:          TakenCourses
+                                the courses taken so far, shared with the planner
+        credits_for_graduation: int
+                                total credits needed to graduate
+        """
+        self.required_courses = tuple(required_courses)
+        self.courses_taken = courses_taken
+        self.credits_for_graduation = credits_for_graduation
+        self._required_mask = 0
+        for course_id in self.required_courses:
+            self._required_mask |= 1 << course_id
+
+    def is_graduated(self, credits_earned: int, cmp_sci_3000_electives_needed: int,
+                     certificate_electives_needed: int, gen_ed_credits_needed: int) -> bool:
+        """
+        returns True if every required course has been taken and all counters are complete.
+        """
+        return (not self._required_mask & ~self.courses_taken.mask
+                and cmp_sci_3000_electives_needed == 0
+                and certificate_electives_needed == 0
+                and gen_ed_credits_needed == 0
+                and credits_earned >= self.credits_for_graduation)
+
+    def outstanding_requirements(self, credits_earned: int, cmp_sci_3000_electives_needed: int,
+                                 certificate_electives_needed: int, gen_ed_credits_needed: int) -> list:
+        """
+        lists the graduation requirements that are not met yet.
+
+        Returns
+        ----------
+        list
+                    one dictionary per outstanding requirement, empty once graduated:
+                    - `requirement`: the kind of requirement (i.e. `required_courses`, `gen_ed_credits`)
+                    - `remaining`: how many courses or credits are still needed
+                    - `courses`: ids of the missing courses (only for `required_courses`)
+        """
+        outstanding = []
+        missing_mask = self._required_mask & ~self.courses_taken.mask
+        if missing_mask:
+            missing = [course_id for course_id in self.required_courses if missing_mask >> course_id & 1]
+            outstanding.append({'requirement': REQUIRED_COURSES, 'remaining': len(missing), 'courses': missing})
+        for requirement, remaining in ((CMP_SCI_3000_ELECTIVES, cmp_sci_3000_electives_needed),
+                                       (CERTIFICATE_ELECTIVES, certificate_electives_needed),
+                                       (GEN_ED_CREDITS, gen_ed_credits_needed)):
+            if remaining != 0:
+                outstanding.append({'requirement': requirement, 'remaining': remaining})
+        if credits_earned < self.credits_for_graduation:
+            outstanding.append({'requirement': TOTAL_CREDITS, 'remaining': self.credits_for_graduation - credits_earned})
+        return outstanding
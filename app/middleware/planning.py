@@ -0,0 +1,209 @@
+import json
+from dataclasses import dataclass, field
+from typing import Mapping, Optional, TypedDict
+
+
+class InitialSchedulerState(TypedDict):
+    """
+    the counters and settings the scheduler starts the first semester of a student from.
+    """
+    current_semester: str
+    semester_number: int
+    num_3000_replaced_by_cert_core: int
+    first_semester: str
+    semester_years: dict
+    user_name: str
+    ge_taken: int
+    fe_taken: int
+    gen_ed_credits_still_needed: int
+    cert_elective_courses_still_needed: int
+    min_3000_course: int
+    total_credits: int
+    minimum_summer_credits: int
+    catalog_version: str
+
+
+class SchedulerState(InitialSchedulerState, total=False):
+    """
+    the scheduler state kept on the server between semesters. The keys below are saved once a semester is planned.
+
+    Courses are given by their ids in the course model of `catalog_version` and the certificate.
+    """
+    remaining_courses: list
+    planned_courses: list
+    semesters: list
+    include_summer: bool
+    saved_minimum_credits_selection: int
+    is_graduated: bool
+    certificate_choice: list
+    TOTAL_CREDITS_FOR_CERTIFICATE_ELECTIVES: int
+    courses_taken: list
+    required_courses_tuple: list
+
+
+def initial_scheduler_state(form) -> SchedulerState:
+    """
+    builds the scheduler state for the first semester from the form on the home page.
+
+    Later semesters continue from the `scheduler_state` of the PlanResult,
+    which is kept on the server between requests instead of being posted back by the page.
+
+    Parameters
+    ----------
+    form:       Mapping
+                the form submitted from the home page
+    Returns
+    ----------
+    SchedulerState
+                the counters and settings the scheduler starts from
+    """
+    return {
+        "current_semester": form["current_semester"],
+        "semester_number": int(form["semester_number"]),
+        "num_3000_replaced_by_cert_core": int(form["num_3000_replaced_by_cert_core"]),  # default is 0
+        "first_semester": form["first_semester"],
+        "semester_years": json.loads(form["semester_years"]),
+        "user_name": form["user_name"],
+        "ge_taken": int(form["ge_taken"]),
+        "fe_taken": int(form["fe_taken"]),
+        "gen_ed_credits_still_needed": int(form["gen_ed_credits_still_needed"]),
+        "cert_elective_courses_still_needed": int(form["cert_elective_courses_still_needed"]),  # default is 0
+        "min_3000_course": int(form["min_3000_course"]),  # default is 5
+        "total_credits": int(form["total_credits"]),
+        "minimum_summer_credits": int(form["minimum_summer_credits"]),
+        "catalog_version": form["catalog_version"]
+    }
+
+
+@dataclass(frozen=True)
+class PlanRequest:
+    """
+    everything the planner needs to build the next semester (or the rest of the schedule) of a student.
+
+    Attributes
+    ----------
+    state:                          SchedulerState
+                                    the scheduler state, from `initial_scheduler_state` for the first semester
+                                    and the `scheduler_state` of the previous PlanResult after that
+    course_schedule:                list
+                                    the semesters planned so far (as rearranged by the student)
+    minimum_semester_credits:       int
+                                    credits of the semester to plan
+    generate_complete_schedule:     bool
+                                    True to plan every semester up to graduation
+    optimize_schedule:              bool
+                                    True to search for the complete schedule with the fewest semesters
+    include_summer, courses_taken, waived_courses, has_passed_math_placement_exam, certificate_choice:
+                                    the choices of the home page, only read for the first semester
+    """
+    state: SchedulerState
+    course_schedule: list
+    minimum_semester_credits: int
+    generate_complete_schedule: bool = False
+    optimize_schedule: bool = False
+    include_summer: bool = False
+    courses_taken: tuple = ()
+    waived_courses: tuple = ()
+    has_passed_math_placement_exam: bool = False
+    certificate_choice: tuple = ("None", "")
+
+    @classmethod
+    def from_form(cls, form, scheduler_state: Optional[SchedulerState] = None) -> "PlanRequest":
+        """
+        reads the request from the schedule form, starting from `scheduler_state` after the first semester.
+        """
+        if scheduler_state is not None:
+            return cls(
+                state=scheduler_state,
+                course_schedule=json.loads(form["course_schedule"]),
+                minimum_semester_credits=int(form["minimum_semester_credits"]),
+                generate_complete_schedule="generate_complete_schedule" in form.keys(),
+                optimize_schedule="optimize_schedule" in form.keys()
+            )
+        return cls(
+            state=initial_scheduler_state(form),
+            course_schedule=json.loads(form["course_schedule"]),
+            minimum_semester_credits=int(form["minimum_semester_credits"]),
+            generate_complete_schedule="generate_complete_schedule" in form.keys(),
+            optimize_schedule="optimize_schedule" in form.keys(),
+            include_summer=form.get("include_summer") == "on",
+            courses_taken=tuple(form.getlist("courses_taken")),
+            waived_courses=tuple(form.getlist("waived_courses")),
+            has_passed_math_placement_exam="aleks_check" in form.keys(),
+            certificate_choice=tuple(form["certificate_choice"].split(","))
+        )
+
+
+@dataclass
+class PlanResult:
+    """
+    the schedule built by the planner, with the counters shown on the schedule page.
+
+    Courses are given by their display names. `scheduler_state` is what the next semester
+    continues from (see PlanRequest).
+    """
+    scheduler_state: SchedulerState
+    course_schedule: list
+    semester_number: int
+    current_semester: str
+    semesters: list
+    first_semester: str
+    semester_years: dict
+    include_summer: bool
+    is_graduated: bool
+    full_schedule_generation: bool
+    user_name: str
+    total_credits: int
+    ge_taken: int
+    fe_taken: int
+    gen_ed_credits_still_needed: int
+    min_3000_course: int
+    num_3000_replaced_by_cert_core: int
+    cert_elective_courses_still_needed: int
+    total_credits_for_certificate_electives: int
+    certificate_choice: list
+    minimum_semester_credits: list
+    saved_minimum_credits_selection: int
+    minimum_summer_credits: int
+    courses_taken: list
+    required_courses: list
+    outstanding_requirements: list = field(default_factory=list)
+
+    def render_info(self) -> Mapping:
+        """
+        returns the values of the schedule page, with the lists the page posts back encoded as JSON.
+        """
+        return {
+            "scheduler_state": self.scheduler_state,
+            "semesters": self.semesters,
+            "total_credits": self.total_credits,
+            "course_schedule": json.dumps(self.course_schedule),
+            "course_schedule_display": self.course_schedule,
+            "courses_taken": json.dumps(self.courses_taken),
+            "list_of_required_courses_taken_display": self.courses_taken,
+            "semester_number": self.semester_number,
+            "waived_courses": None,
+            "current_semester": self.current_semester,
+            "minimum_semester_credits": self.minimum_semester_credits,
+            "min_3000_course": self.min_3000_course,
+            "include_summer": self.include_summer,
+            "certificate_choice": json.dumps(self.certificate_choice),
+            "certificates_display": self.certificate_choice,
+            "num_3000_replaced_by_cert_core": self.num_3000_replaced_by_cert_core,
+            "cert_elective_courses_still_needed": self.cert_elective_courses_still_needed,
+            "TOTAL_CREDITS_FOR_CERTIFICATE_ELECTIVES": self.total_credits_for_certificate_electives,
+            "saved_minimum_credits_selection": self.saved_minimum_credits_selection,
+            "gen_ed_credits_still_needed": self.gen_ed_credits_still_needed,
+            "full_schedule_generation": self.full_schedule_generation,
+            "minimum_summer_credits": self.minimum_summer_credits,
+            "first_semester": self.first_semester,
+            "semester_years": json.dumps(self.semester_years),
+            "semester_years_display": self.semester_years,
+            "user_name": self.user_name,
+            "fe_taken": self.fe_taken,
+            "ge_taken": self.ge_taken,
+            "is_graduated": self.is_graduated,
+            "required_courses_tuple": json.dumps(self.required_courses),
+            "required_courses_tuple_display": self.required_courses,
+            "outstanding_requirements": self.outstanding_requirements
+        }
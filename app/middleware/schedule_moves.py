@@ -0,0 +1,313 @@
+from bisect import bisect_left
+from collections import deque
+from typing import Mapping, Optional
+
+from app.middleware.course_model import CourseModel, LATEST_SEMESTER_FOR_COURSE, TERM_BITS
+from app.middleware.course_parsing import course_model
+
+
+def _credits(value) -> int:
+    # the credits of a schedule entry, as the page shows them (variable credits such as `1-3` count as 0)
+    try:
+        return int(value)
+    except (TypeError, ValueError):
+        return 0
+
+
+class SchedulePositions:
+    """
+    Index of the semester every course of a displayed schedule is in.
+
+    Keeps, next to the position of each course id, a bitmask of the course ids of
+    every semester, so whether a course can be taken in a semester is checked with
+    the compiled prerequisites of the planner (see `Course.clauses`) instead of by
+    scanning the semesters. The courses and credits before each semester are kept
+    as running totals (`prefix_masks`, `prefix_credits`), which a move only updates
+    for the semesters between where the course was and where it goes. Electives and
+    courses that are not part of the course model are left alone.
+    """
+
+    __slots__ = ('model', 'course_schedule', 'courses_taken', 'starting_credits', 'positions', 'semester_masks',
+                 'semester_credits', 'entry_credits', 'course_credits', 'prefix_masks', 'prefix_credits')
+
+    def __init__(self, model: CourseModel, course_schedule: list, courses_taken: int, starting_credits: int):
+        """
+        Parameters
+        ----------
+        model:              CourseModel
+                            the courses the schedule was planned from
+        course_schedule:    list
+                            the semesters as shown on the schedule page, updated in place by `move`
+        courses_taken:      int
+                            bitmask of the ids of the courses taken before the schedule
+        starting_credits:   int
+                            the credits earned before the schedule
+        """
+        self.model = model
+        self.course_schedule = course_schedule
+        self.courses_taken = courses_taken
+        self.starting_credits = starting_credits
+        self.positions = {}
+        self.semester_masks = [0] * len(course_schedule)
+        # the credits of each semester as the page shows them, and the sum of the credits of its courses
+        self.semester_credits = [_credits(semester["credits"]) for semester in course_schedule]
+        self.entry_credits = [0] * len(course_schedule)
+        self.course_credits = {}
+        for index, semester in enumerate(course_schedule):
+            for entry in semester["schedule"]:
+                self.entry_credits[index] += _credits(entry["credits"])
+                course_id = model.id_of(entry["course"])
+                if course_id is not None and model.in_catalog(course_id):
+                    self.positions[course_id] = index
+                    self.semester_masks[index] |= 1 << course_id
+                    self.course_credits[course_id] = _credits(entry["credits"])
+
+        # prefix_masks[i] and prefix_credits[i] are the courses taken and the credits earned before semester i
+        self.prefix_masks = [courses_taken] * (len(course_schedule) + 1)
+        self.prefix_credits = [starting_credits] * (len(course_schedule) + 1)
+        self._update_prefixes(0, len(course_schedule))
+
+    @classmethod
+    def from_state(cls, scheduler_state: Mapping, course_schedule: list) -> "SchedulePositions":
+        """
+        builds the index of a schedule from the scheduler state saved for its session.
+
+        The courses taken before the schedule are the taken courses of the state that are not in
+        the schedule, and the credits earned before it are the credits of the state less those of
+        its semesters (moving courses does not change either).
+        """
+        model = course_model(scheduler_state["catalog_version"], scheduler_state["certificate_choice"][1])
+        scheduled = set()
+        for semester in course_schedule:
+            for entry in semester["schedule"]:
+                course_id = model.id_of(entry["course"])
+                if course_id is not None and model.in_catalog(course_id):
+                    scheduled.add(course_id)
+        courses_taken = 0
+        for course_id in scheduler_state["courses_taken"]:
+            if course_id not in scheduled:
+                courses_taken |= 1 << course_id
+        starting_credits = scheduler_state["total_credits"] - sum(
+            _credits(semester["credits"]) for semester in course_schedule)
+        return cls(model, course_schedule, courses_taken, starting_credits)
+
+    def _update_prefixes(self, first: int, last: int) -> None:
+        # recomputes the running totals before semesters first + 1 .. last, after semesters first .. last - 1 changed
+        for index in range(first, last):
+            self.prefix_masks[index + 1] = self.prefix_masks[index] | self.semester_masks[index]
+            self.prefix_credits[index + 1] = self.prefix_credits[index] + self.semester_credits[index]
+
+    def semester_of(self, course_id: int) -> Optional[int]:
+        """
+        returns the index of the semester a course is in, None if it is not in the schedule.
+        """
+        return self.positions.get(course_id)
+
+    def check(self, course_id: int, index: int) -> Optional[str]:
+        """
+        checks whether a course can be taken in the semester at `index`, with the other courses where they are.
+
+        Returns
+        ----------
+        str
+                        why the course cannot be taken there (as shown on the schedule page), None if it can
+        """
+        course = self.model.courses[course_id]
+        name = self.model.names[course_id]
+        latest = LATEST_SEMESTER_FOR_COURSE.get(name)
+        if latest is not None and index > latest[0]:
+            return f"{name} must be taken in {latest[1]}!"
+        term = self.course_schedule[index]["semester"]
+        if not course.is_offered(TERM_BITS[term]):
+            return f"{name} is not offered during the {term} semester!"
+
+        before = self.prefix_masks[index]
+        this_semester = self.semester_masks[index] & ~(1 << course_id)
+        credits = self.prefix_credits[index] + self.entry_credits[index]
+        if self.positions.get(course_id) == index:
+            credits -= self.course_credits[course_id]
+
+        reason = None
+        for mask, strict_mask, minimum_credits in course.clauses:
+            missing = mask & ~(before | this_semester & ~strict_mask)
+            if not missing and credits >= minimum_credits:
+                return None
+            if missing:
+                prereq = self.model.names[(missing & -missing).bit_length() - 1]
+                reason = f"{name} prerequisite ({prereq}) has to be completed prior to the selected semester!"
+            else:
+                reason = (f"{name} does not meet its criteria of a minimum of {minimum_credits} credit hours for the "
+                          f"selected semester! Currently at {credits} credits.")
+        return reason
+
+    def first_possible(self, course_id: int, start: int) -> int:
+        """
+        returns the first semester from `start` on by the end of which the prerequisites of a course can all be
+        taken (the length of the schedule if there is none). `check` fails for every semester before it.
+        """
+        clauses = self.model.courses[course_id].clauses
+        # the courses taken by the end of a semester only grow, so the first semester is found by bisection
+        return bisect_left(range(len(self.course_schedule)), True, lo=start,
+                           key=lambda index: any((mask & ~self.prefix_masks[index + 1]) == 0 for mask, _, _ in clauses))
+
+    def move(self, course_id: int, index: int) -> None:
+        """
+        moves a course of the schedule to the semester at `index`, updating the credits of both semesters.
+        """
+        old_index = self.positions[course_id]
+        name = self.model.names[course_id]
+        old_semester = self.course_schedule[old_index]
+        position = next(i for i, entry in enumerate(old_semester["schedule"]) if entry["course"] == name)
+        entry = old_semester["schedule"].pop(position)
+        old_semester["credits"] = _credits(old_semester["credits"]) - _credits(entry["credits"])
+        new_semester = self.course_schedule[index]
+        new_semester["schedule"].append(entry)
+        new_semester["credits"] = _credits(new_semester["credits"]) + _credits(entry["credits"])
+
+        bit = 1 << course_id
+        self.semester_masks[old_index] &= ~bit
+        self.semester_masks[index] |= bit
+        self.semester_credits[old_index] = old_semester["credits"]
+        self.semester_credits[index] = new_semester["credits"]
+        self.entry_credits[old_index] -= _credits(entry["credits"])
+        self.entry_credits[index] += _credits(entry["credits"])
+        self.positions[course_id] = index
+        self._update_prefixes(min(old_index, index), max(old_index, index))
+
+    def mark(self, course_id: int, reason: Optional[str]) -> None:
+        """
+        records the outcome of `check` on the schedule entry of a course, as the schedule page does.
+        """
+        name = self.model.names[course_id]
+        for entry in self.course_schedule[self.positions[course_id]]["schedule"]:
+            if entry["course"] == name:
+                entry["passed_validation"] = reason is None
+                entry["validation_msg"] = reason or ""
+
+
+def replan_after_move(scheduler_state: Mapping, course_schedule: list, course: str, semester: int) -> dict:
+    """
+    moves a course of a schedule and re-plans only the courses that build on it.
+
+    The semesters before the first one the move touches are left as they are. The moved
+    course stays where the student put it; every course that depends on it (directly or
+    through other moved courses, see `CourseModel.dependents`) and can no longer be taken
+    where it is, is pushed back to the first later semester where it can, which is then
+    checked for its own dependents. So the work depends on the courses the move affects,
+    not on the length of the schedule.
+
+    Parameters
+    ----------
+    scheduler_state:    Mapping
+                        the scheduler state saved for the session of the schedule
+    course_schedule:    list
+                        the semesters as shown on the schedule page (updated in place)
+    course:             str
+                        the name of the course that was moved (i.e. `CMP SCI 2250`)
+    semester:           int
+                        the index of the semester it was moved to
+    Returns
+    ----------
+    dict
+                        the updated `course_schedule`, the `moved` courses (with the semester they were moved
+                        `from` and `to`), the `first_changed_semester`, the `verdict` on the student's move
+                        (None if the course can be taken there) and the dependents that are `unschedulable`
+                        in any later semester (with the `reason`)
+    """
+    positions = SchedulePositions.from_state(scheduler_state, course_schedule)
+    model = positions.model
+    course_id = model.id_of(course)
+    if course_id is None or positions.semester_of(course_id) is None:
+        raise ValueError(f"{course} is not in the schedule")
+    if not 0 <= semester < len(course_schedule):
+        raise ValueError(f"There is no semester {semester} in the schedule")
+
+    from_semester = positions.semester_of(course_id)
+    positions.move(course_id, semester)
+    moved = [{"course": course, "from": from_semester, "to": semester}]
+    unschedulable = {}
+
+    pending = deque(model.dependents[course_id])
+    while pending:
+        dependent = pending.popleft()
+        index = positions.semester_of(dependent)
+        if index is None or positions.check(dependent, index) is None:
+            unschedulable.pop(dependent, None)
+            continue
+        # the semesters before the first one its prerequisites can be taken by are skipped without checking them
+        later = next((later for later in range(positions.first_possible(dependent, index + 1), len(course_schedule))
+                      if positions.check(dependent, later) is None), None)
+        if later is None:
+            unschedulable[dependent] = {"course": model.names[dependent], "semester": index,
+                                        "reason": positions.check(dependent, index)}
+            continue
+        positions.move(dependent, later)
+        positions.mark(dependent, None)
+        moved.append({"course": model.names[dependent], "from": index, "to": later})
+        pending.extend(model.dependents[dependent])
+
+    verdict = positions.check(course_id, semester)
+    positions.mark(course_id, verdict)
+    for dependent, failure in unschedulable.items():
+        positions.mark(dependent, failure["reason"])
+
+    return {
+        "course_schedule": course_schedule,
+        "moved": moved,
+        "first_changed_semester": min(from_semester, semester),
+        "verdict": verdict,
+        "unschedulable": list(unschedulable.values())
+    }
+
+
+def validate_moves(scheduler_state: Mapping, course_schedule: list, moves: list) -> list:
+    """
+    checks a batch of proposed moves of a schedule in a single pass over its position index.
+
+    The moves are made one after the other on `course_schedule`, then every moved course is
+    checked in its new semester, followed by the courses in the schedule that depend on a moved
+    course (see `CourseModel.dependents`), which a move can break or repair.
+
+    Parameters
+    ----------
+    scheduler_state:    Mapping
+                        the scheduler state saved for the session of the schedule
+    course_schedule:    list
+                        the semesters as shown on the schedule page, before the moves (updated in place)
+    moves:              list
+                        the moves, each a mapping with the name of the `course` and the index of the `semester`
+                        it is moved to
+    Returns
+    ----------
+    list
+                        one verdict per checked course: the `course`, the index of its `semester`, the `reason`
+                        it cannot be taken there (None if it can) and the moved course it depends on (`after`,
+                        None for the moved courses themselves)
+    """
+    positions = SchedulePositions.from_state(scheduler_state, course_schedule)
+    model = positions.model
+    moved = {}
+    for move in moves:
+        course, semester = move["course"], int(move["semester"])
+        course_id = model.id_of(course)
+        if course_id is None or positions.semester_of(course_id) is None:
+            raise ValueError(f"{course} is not in the schedule")
+        if not 0 <= semester < len(course_schedule):
+            raise ValueError(f"There is no semester {semester} in the schedule")
+        positions.move(course_id, semester)
+        moved[course_id] = course
+
+    verdicts = []
+    for course_id, course in moved.items():
+        index = positions.semester_of(course_id)
+        verdicts.append({"course": course, "semester": index, "reason": positions.check(course_id, index), "after": None})
+    checked = set(moved)
+    for course_id, course in moved.items():
+        for dependent in model.dependents[course_id]:
+            index = positions.semester_of(dependent)
+            if index is None or dependent in checked:
+                continue
+            checked.add(dependent)
+            verdicts.append({"course": model.names[dependent], "semester": index,
+                             "reason": positions.check(dependent, index), "after": course})
+    return verdicts
@@ -0,0 +1,328 @@
+import math
+import time
+from itertools import combinations
+from typing import Callable, Iterable, Mapping, Optional
+
+from app.middleware.course_model import CourseModel
+
+# credits of every elective the planner adds
+DEFAULT_CREDIT_HOURS = 3
+
+# most ready courses tried in other combinations than the greedy one, per semester
+MAX_COURSES_PER_BRANCH = 10
+
+
+class _OutOfTime(Exception):
+    pass
+
+
+class ScheduleSearch:
+    """
+    Branch-and-bound search for the schedule that graduates in the fewest semesters.
+
+    The greedy planner in `plan_semester` adds the ready courses in course
+    number order, which can push a course that is only offered in one term back
+    by a whole year. The search instead decides which of the ready courses are
+    started in each semester; the rest of every semester is filled with electives
+    by the same rules as the planner (core credits per semester, 3000+ level and
+    certificate electives after 60 credits, general education first), which are
+    simulated here one semester at a time.
+
+    The first branch of every semester is the greedy choice, and the search only
+    keeps schedules shorter than the `upper_bound` it is given (the length of the
+    greedy schedule). A branch is cut when a lower bound on the semesters it still
+    needs cannot beat the best schedule found so far, and a state (completed
+    courses, credits and elective counters at the start of a term) reached again
+    no sooner than before is not searched again. A course that has to be taken by
+    a given semester (see LATEST_SEMESTER_FOR_COURSE) is never postponed while it
+    can still be taken in time.
+    """
+
+    def __init__(self, model: CourseModel, remaining_courses: Iterable[int], courses_taken: Iterable[int],
+                 required_courses: Iterable[int], term_at: Callable, credits_earned: int,
+                 cmp_sci_3000_electives_needed: int, certificate_electives_needed: int, gen_ed_credits_needed: int,
+                 has_certificate: bool, credits_for_graduation: int = 120, credits_for_3000_level: int = 60,
+                 latest_semesters: Optional[Mapping[int, int]] = None, clock: Callable[[], float] = time.monotonic):
+        """
+        Parameters
+        ----------
+        model:                          CourseModel
+                                        the courses of the schedule
+        remaining_courses:              Iterable
+                                        ids of the courses still to schedule, in the order the planner considers them
+        courses_taken:                  Iterable
+                                        ids of the courses already taken
+        required_courses:               Iterable
+                                        ids of the courses that must be taken to graduate
+        term_at:                        Callable
+                                        returns the term bit (see TERM_BITS) and the credits a semester is closed at,
+                                        for the n-th semester from now (the current semester being 0)
+        credits_earned:                 int
+                                        the credits earned so far
+        cmp_sci_3000_electives_needed:  int
+                                        3000+ level electives still needed
+        certificate_electives_needed:   int
+                                        certificate electives still needed
+        gen_ed_credits_needed:          int
+                                        general education credits still needed
+        has_certificate:                bool
+                                        True if the student works towards a certificate
+        credits_for_graduation:         int
+                                        total credits needed to graduate
+        credits_for_3000_level:         int
+                                        credits that must be earned before a 3000+ level elective can be added
+        latest_semesters:               Mapping, optional
+                                        the last semester (counted from the current one) by which a course has to
+                                        be taken, by course id
+        clock:                          Callable
+                                        returns the current time in seconds, used for the time budget
+        """
+        self.model = model
+        self.has_certificate = has_certificate
+        self.credits_for_graduation = credits_for_graduation
+        self.credits_for_3000_level = credits_for_3000_level
+        self._latest_semesters = dict(latest_semesters or {})
+        self._clock = clock
+        self._term_at = term_at
+        self._terms = []
+
+        taken = 0
+        for course_id in courses_taken:
+            taken |= 1 << course_id
+        self._required_mask = 0
+        for course_id in required_courses:
+            self._required_mask |= 1 << course_id
+        # courses with a variable number of credits are never added by the planner
+        self._remaining = [course_id for course_id in remaining_courses
+                           if not taken >> course_id & 1 and model.courses[course_id].credit is not None]
+        self._rank = {course_id: rank for rank, course_id in enumerate(self._remaining)}
+        # the remaining courses, each after its prerequisites
+        self._prerequisite_order = [course_id for course_id in model.prerequisite_order if course_id in self._rank]
+        self._start = (taken, credits_earned, cmp_sci_3000_electives_needed, certificate_electives_needed,
+                       gen_ed_credits_needed)
+
+        # the courses that have to be completed in an earlier semester than a course, whichever prerequisites are used
+        self._needs_before = {}
+        for course_id in self._remaining:
+            needs_before = None
+            for _, strict_mask, _ in model.courses[course_id].clauses:
+                needs_before = strict_mask if needs_before is None else needs_before & strict_mask
+            self._needs_before[course_id] = needs_before or 0
+        self._largest_course = max([DEFAULT_CREDIT_HOURS] + [model.courses[course_id].credit
+                                                               for course_id in self._remaining])
+
+        self._seen = {}
+        self._deadline = 0.0
+        self._best_terms = 0
+        self._best_path = None
+
+    def _term(self, index: int) -> tuple:
+        while len(self._terms) <= index:
+            self._terms.append(self._term_at(len(self._terms)))
+        return self._terms[index]
+
+    def run(self, upper_bound: int, time_budget: float) -> Optional[dict]:
+        """
+        searches for a schedule with fewer than `upper_bound` semesters until the time budget runs out.
+
+        Parameters
+        ----------
+        upper_bound:    int
+                        the number of semesters of the schedule to beat (i.e. the greedy one)
+        time_budget:    float
+                        seconds the search may take, the best schedule found so far is returned after that
+        Returns
+        ----------
+        dict
+                        None if no shorter schedule was found, otherwise:
+                        - `terms`: the number of semesters of the schedule
+                        - `release_semesters`: the semester each course is added in, by course id
+                          (see `ReadyQueue`)
+        """
+        self._best_terms = upper_bound
+        self._best_path = None
+        self._seen = {}
+        self._deadline = self._clock() + time_budget
+        try:
+            self._search(0, self._start, [])
+        except _OutOfTime:
+            pass
+        if self._best_path is None:
+            return None
+        release_semesters = {}
+        for index, chosen in enumerate(self._best_path):
+            for course_id in chosen:
+                release_semesters[course_id] = index
+        return {'terms': self._best_terms, 'release_semesters': release_semesters}
+
+    def _search(self, index: int, node: tuple, path: list) -> None:
+        if self._clock() > self._deadline:
+            raise _OutOfTime()
+        if index + self._lower_bound(node) >= self._best_terms:
+            return
+        if index:
+            # what is left of the schedule only depends on the term, so a state reached again no sooner is done
+            key = (self._term(index), node)
+            seen = self._seen.get(key)
+            if seen is not None and seen <= index:
+                return
+            self._seen[key] = index
+
+        for chosen in self._options(index, node):
+            result = self._fill_semester(index, node, chosen)
+            if result is None:
+                continue
+            next_node, graduated = result
+            path.append(chosen)
+            if graduated:
+                if index + 1 < self._best_terms:
+                    self._best_terms = index + 1
+                    self._best_path = list(path)
+            else:
+                self._search(index + 1, next_node, path)
+            path.pop()
+            if index + 1 >= self._best_terms:
+                # no other choice in this semester can graduate sooner than the schedule just found
+                return
+
+    def _lower_bound(self, node: tuple) -> int:
+        """
+        returns the least number of semesters, starting with this one, still needed from a state.
+        """
+        taken, credits, cmp_sci_3000_electives_needed, certificate_electives_needed, _ = node
+
+        # each course waits at least one semester for the prerequisites it cannot do without
+        chain = {}
+        longest_chain = 0
+        for course_id in self._prerequisite_order:
+            if taken >> course_id & 1:
+                continue
+            length = 1
+            needs_before = self._needs_before[course_id] & ~taken
+            while needs_before:
+                bit = needs_before & -needs_before
+                needs_before ^= bit
+                length = max(length, chain.get(bit.bit_length() - 1, 0) + 1)
+            chain[course_id] = length
+            if self._required_mask >> course_id & 1:
+                longest_chain = max(longest_chain, length)
+
+        # a semester is closed once it reaches its credits, so it holds less than one course more
+        most_credits = max(max(target - 1, 0) + self._largest_course for _, target in (self._term(i) for i in range(4)))
+        credit_terms = max(0, math.ceil((self.credits_for_graduation - credits) / most_credits))
+
+        # at most two 3000+ level or certificate electives fit in a semester
+        elective_terms = math.ceil(max(0, cmp_sci_3000_electives_needed + certificate_electives_needed) / 2)
+        return max(longest_chain, credit_terms, elective_terms)
+
+    def _is_ready(self, course_id: int, taken: int, credits: int) -> bool:
+        for mask, _, minimum_credits in self.model.courses[course_id].clauses:
+            if taken & mask == mask and credits >= minimum_credits:
+                return True
+        return False
+
+    def _options(self, index: int, node: tuple):
+        """
+        yields the combinations of ready courses to start in a semester, the greedy planner's choice first.
+        """
+        term_bit, target = self._term(index)
+        taken, credits = node[0], node[1]
+        courses = self.model.courses
+        ready = [course_id for course_id in self._remaining
+                 if not taken >> course_id & 1 and courses[course_id].is_offered(term_bit)
+                 and self._is_ready(course_id, taken, credits)]
+
+        # the planner adds ready courses in order as long as the semester has room for core credits
+        max_core_credits = math.ceil(target * 2 / 3)
+        greedy, semester_credits = [], 0
+        for course_id in ready:
+            if semester_credits >= max_core_credits or semester_credits >= target:
+                break
+            greedy.append(course_id)
+            semester_credits += courses[course_id].credit
+        greedy = tuple(greedy)
+        yield greedy
+
+        # then other combinations, the most courses first and the courses that hold up the most others first; the
+        # courses that have to be taken by a later semester are part of every one of them while they are ready
+        required_now = tuple(course_id for course_id in ready if self._latest_semesters.get(course_id, -1) >= index)
+        candidates = sorted((course_id for course_id in ready if course_id not in required_now),
+                            key=lambda course_id: -self.model.chain_length[course_id])[:MAX_COURSES_PER_BRANCH]
+        for size in range(len(greedy) - len(required_now), -1, -1):
+            for combination in combinations(candidates, size):
+                chosen = tuple(sorted(required_now + combination, key=self._rank.__getitem__))
+                if chosen != greedy:
+                    yield chosen
+
+    def _is_graduated(self, taken: int, credits: int, cmp_sci_3000_electives_needed: int,
+                      certificate_electives_needed: int, gen_ed_credits_needed: int) -> bool:
+        return (not self._required_mask & ~taken
+                and cmp_sci_3000_electives_needed == 0
+                and certificate_electives_needed == 0
+                and gen_ed_credits_needed == 0
+                and credits >= self.credits_for_graduation)
+
+    def _fill_semester(self, index: int, node: tuple, chosen: tuple) -> Optional[tuple]:
+        """
+        simulates the planner on a semester that starts the chosen courses.
+
+        Returns
+        ----------
+        tuple
+                    the state after the semester and whether the student graduated, None if the planner
+                    would not add all of the chosen courses to this semester
+        """
+        _, target = self._term(index)
+        taken, credits, cmp_sci_3000_electives_needed, certificate_electives_needed, gen_ed_credits_needed = node
+        max_core_credits = math.ceil(target * 2 / 3)
+        max_cs_math_credits = target - 3
+        max_cs_elective_credits = 6
+        semester_credits = cs_math_credits = cs_elective_credits = 0
+
+        for position, course_id in enumerate(chosen):
+            if semester_credits >= max_core_credits:
+                return None
+            credit = self.model.courses[course_id].credit
+            taken |= 1 << course_id
+            credits += credit
+            semester_credits += credit
+            cs_math_credits += credit
+            graduated = self._is_graduated(taken, credits, cmp_sci_3000_electives_needed,
+                                           certificate_electives_needed, gen_ed_credits_needed)
+            if semester_credits >= target or graduated:
+                if position != len(chosen) - 1:
+                    return None
+                return (taken, credits, cmp_sci_3000_electives_needed, certificate_electives_needed,
+                        gen_ed_credits_needed), graduated
+
+        while True:
+            has_cs_room = (cs_elective_credits <= max_cs_elective_credits - 3
+                           and (cs_math_credits <= max_cs_math_credits - 3 or max_cs_math_credits - 3 <= 0))
+            if credits < self.credits_for_3000_level:
+                if gen_ed_credits_needed >= DEFAULT_CREDIT_HOURS:
+                    gen_ed_credits_needed -= DEFAULT_CREDIT_HOURS
+            elif self.has_certificate:
+                if has_cs_room and (cmp_sci_3000_electives_needed > 0 or certificate_electives_needed > 0):
+                    if cmp_sci_3000_electives_needed > 0:
+                        cmp_sci_3000_electives_needed -= 1
+                    else:
+                        certificate_electives_needed -= 1
+                    cs_math_credits += DEFAULT_CREDIT_HOURS
+                    cs_elective_credits += DEFAULT_CREDIT_HOURS
+                elif gen_ed_credits_needed > 0:
+                    gen_ed_credits_needed -= DEFAULT_CREDIT_HOURS
+            else:
+                if cmp_sci_3000_electives_needed > 0 and has_cs_room:
+                    cmp_sci_3000_electives_needed -= 1
+                    cs_math_credits += DEFAULT_CREDIT_HOURS
+                    cs_elective_credits += DEFAULT_CREDIT_HOURS
+                elif gen_ed_credits_needed > 0:
+                    gen_ed_credits_needed -= DEFAULT_CREDIT_HOURS
+            credits += DEFAULT_CREDIT_HOURS
+            semester_credits += DEFAULT_CREDIT_HOURS
+
+            graduated = self._is_graduated(taken, credits, cmp_sci_3000_electives_needed,
+                                           certificate_electives_needed, gen_ed_credits_needed)
+            if semester_credits >= target or graduated:
+                return (taken, credits, cmp_sci_3000_electives_needed, certificate_electives_needed,
+                        gen_ed_credits_needed), graduated
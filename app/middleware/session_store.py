@@ -0,0 +1,159 @@
+import os
+import pickle
+import secrets
+import sqlite3
+import time
+from abc import ABC, abstractmethod
+from contextlib import closing
+from typing import Optional
+
+from app.middleware.lru_cache import LRUCache
+
+
+def new_token() -> str:
+    """
+    returns a new opaque, URL-safe token to identify a scheduler session.
+    """
+    return secrets.token_urlsafe(24)
+
+
+class SessionStore(ABC):
+    """
+    Holds the scheduler state between the steps of building a schedule.
+
+    The state is pickled when it is stored, so every `get` returns a private
+    copy that the caller is free to modify. Subclasses only need to store and
+    look up the pickled bytes.
+    """
+
+    def get(self, token: str) -> Optional[dict]:
+        """
+        returns the state saved under `token`, or None if it does not exist or has expired.
+        """
+        data = self._load(token)
+        return None if data is None else pickle.loads(data)
+
+    def put(self, token: str, state: dict) -> None:
+        """
+        saves `state` under `token`, replacing any state already saved there.
+        """
+        self._save(token, pickle.dumps(state, pickle.HIGHEST_PROTOCOL))
+
+    def create(self, state: dict) -> str:
+        """
+        saves `state` under a new token and returns the token.
+        """
+        token = new_token()
+        self.put(token, state)
+        return token
+
+    @abstractmethod
+    def delete(self, token: str) -> None:
+        """
+        removes the state saved under `token`, if there is one.
+        """
+
+    @abstractmethod
+    def _load(self, token: str) -> Optional[bytes]:
+        """
+        returns the pickled state saved under `token`, or None if it does not exist or has expired.
+        """
+
+    @abstractmethod
+    def _save(self, token: str, data: bytes) -> None:
+        """
+        stores the pickled state under `token`, replacing any state already stored there.
+        """
+
+
+class MemorySessionStore(SessionStore):
+    """
+    Keeps sessions in the memory of the current process.
+
+    Sessions expire `ttl` seconds after they were saved, and the least recently
+    used sessions are dropped once `max_entries` is reached. Each worker process
+    has its own store, so use the SQLite store when running several workers
+    without sticky sessions.
+    """
+
+    def __init__(self, max_entries: int = 10000, ttl: float = 4 * 60 * 60):
+        self._sessions = LRUCache(max_entries, ttl)
+
+    def delete(self, token: str) -> None:
+        self._sessions.pop(token)
+
+    def _load(self, token: str) -> Optional[bytes]:
+        return self._sessions.get(token)
+
+    def _save(self, token: str, data: bytes) -> None:
+        self._sessions.put(token, data)
+
+
+class SQLiteSessionStore(SessionStore):
+    """
+    Keeps sessions in a SQLite database that can be shared by every worker on the host.
+
+    Sessions expire `ttl` seconds after they were saved; expired rows are
+    removed whenever a session is saved.
+    """
+
+    def __init__(self, path: str, ttl: float = 4 * 60 * 60):
+        self.path = path
+        self.ttl = ttl
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        with closing(self._connect()) as connection, connection:
+            connection.execute("PRAGMA journal_mode=WAL")
+            connection.execute(
+                "CREATE TABLE IF NOT EXISTS scheduler_sessions ("
+                "token TEXT PRIMARY KEY, state BLOB NOT NULL, expires REAL NOT NULL)"
+            )
+
+    def _connect(self) -> sqlite3.Connection:
+        # a connection per call keeps the store safe to use from any thread
+        return sqlite3.connect(self.path, timeout=10)
+
+    def delete(self, token: str) -> None:
+        with closing(self._connect()) as connection, connection:
+            connection.execute("DELETE FROM scheduler_sessions WHERE token = ?", (token,))
+
+    def _load(self, token: str) -> Optional[bytes]:
+        with closing(self._connect()) as connection:
+            row = connection.execute(
+                "SELECT state FROM scheduler_sessions WHERE token = ? AND expires > ?", (token, time.time())
+            ).fetchone()
+        return None if row is None else row[0]
+
+    def _save(self, token: str, data: bytes) -> None:
+        now = time.time()
+        with closing(self._connect()) as connection, connection:
+            connection.execute("DELETE FROM scheduler_sessions WHERE expires <= ?", (now,))
+            connection.execute(
+                "INSERT OR REPLACE INTO scheduler_sessions (token, state, expires) VALUES (?, ?, ?)",
+                (token, data, now + self.ttl)
+            )
+
+
+def create_session_store(config) -> SessionStore:
+    """
+    creates the session store selected by the app configuration.
+
+    Parameters
+    ----------
+    config:     Mapping
+                the Flask app config, using:
+                - `SCHEDULER_SESSION_BACKEND`: "memory" or "sqlite"
+                - `SCHEDULER_SESSION_TTL`: seconds a session stays valid
+                - `SCHEDULER_SESSION_MAX_ENTRIES`: sessions kept by the memory store
+                - `SCHEDULER_SESSION_DATABASE`: database file used by the SQLite store
+    Returns
+    ----------
+    SessionStore
+    """
+    backend = config["SCHEDULER_SESSION_BACKEND"]
+    if backend == "memory":
+        return MemorySessionStore(config["SCHEDULER_SESSION_MAX_ENTRIES"], config["SCHEDULER_SESSION_TTL"])
+    if backend == "sqlite":
+        return SQLiteSessionStore(config["SCHEDULER_SESSION_DATABASE"], config["SCHEDULER_SESSION_TTL"])
+    raise ValueError(f"Unknown scheduler session backend: {backend}")
@@ -0,0 +1,50 @@
+import logging
+import os
+from typing import Optional
+
+from jinja2 import FileSystemBytecodeCache
+from jinja2.bccache import Bucket
+
+logger = logging.getLogger(__name__)
+
+
+class SharedBytecodeCache(FileSystemBytecodeCache):
+    """
+    Jinja bytecode cache in a directory shared by the worker processes.
+
+    The directory may be read-only (i.e. filled by `flask precompile-templates` when the app was
+    deployed) or removed while the app runs. A template that cannot be written to it is still
+    compiled and used, it is only compiled again by the next process instead of failing the request.
+    """
+
+    def dump_bytecode(self, bucket: Bucket) -> None:
+        try:
+            super().dump_bytecode(bucket)
+        except OSError as error:
+            logger.debug("Could not keep the compiled template %s: %s", bucket.key, error)
+
+
+def create_bytecode_cache(config) -> Optional[SharedBytecodeCache]:
+    """
+    creates the bytecode cache of the templates configured for the app.
+
+    Parameters
+    ----------
+    config:     Mapping
+                the Flask app config, using `SCHEDULER_TEMPLATE_CACHE_DIR`: the directory of the cache, created
+                if it is missing, None to disable the cache
+    Returns
+    ----------
+    SharedBytecodeCache
+                the cache, None if it is disabled or its directory cannot be created
+    """
+    directory = config["SCHEDULER_TEMPLATE_CACHE_DIR"]
+    if not directory:
+        return None
+    try:
+        os.makedirs(directory, exist_ok=True)
+    except OSError as error:
+        # the templates are compiled in every process instead
+        logger.warning("Not caching compiled templates, cannot create %s: %s", directory, error)
+        return None
+    return SharedBytecodeCache(directory)
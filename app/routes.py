@@ -1,37 +1,40 @@
-from flask import render_template, request, json
-from app import app
-from app.middleware.course_parsing import parse_courses, generate_semester
+from flask import render_template, request, json, jsonify, redirect, url_for, abort, Response, stream_with_context
+from app import app, scheduler_sessions, plan_results, planning_pool
+from app.middleware.course_parsing import catalog_version, certificate_choices, certificate_registry_cache, \
+    earliest_graduation_estimate, CatalogVersionError, UnschedulableError
+from app.middleware.batch_planning import plan_cohort, planner_settings
+from app.middleware.planning import PlanRequest
+from app.middleware.schedule_moves import replan_after_move, validate_moves
+from app.middleware.catalog_assets import catalog_json, home_page_courses
+from app.middleware.cached_responses import PageCache, cached_response, template_signature
+
+# the templates the home page is rendered from, it is only rendered again when the catalog or one of them changes
+HOME_PAGE_TEMPLATES = ('index.html', 'home_page.html')
+home_pages = PageCache()
 
 @app.route('/')
 @app.route('/index')
 def index():
+    # the page is the same for every student, browsers revalidate it with If-None-Match
+    version = catalog_version()
+    key = (version, certificate_registry_cache.digest, request.script_root,
+           template_signature(app, HOME_PAGE_TEMPLATES))
+    page = home_pages.get(key, lambda: render_home_page(version))
+    return cached_response(request, page, max_age=0)
+
+
+def render_home_page(version):
     semesters = ["Fall", "Spring"]
-    certificates = [("None", ""), ("Artificial Intelligence", "AICERTReq"), ("Cybersecurity", "CYBERCERTReq"), ("Data Science", "DATACERTReq"), ("Mobile Apps and Computing", "MOBILECERTReq"), ("Internet and Web", "WEBCERTReq")]
+    certificates = certificate_choices()
     #num_3000_replaced_by_cert_core=0
     #cert_elective_courses_still_needed=0
-    # create dictionaries for each course type
-    all_courses = parse_courses()
-
-    all_courses_list = []
-    for course in all_courses.items():
-        prerequisite_description = ""
-        if "prerequisite_description" in course[1].keys():
-            prerequisite_description = course[1]["prerequisite_description"]
-        course_info = {
-            "course": course[0],
-            "credits": course[1]["credit"],
-            "course_number": course[1]["course_number"],
-            "prerequisite_description": prerequisite_description
-        }
-        all_courses_list.append(course_info)
-    # sort required courses by course number
-    all_courses_list = sorted(all_courses_list, key=lambda d: d["course"])
+    # the courses of the catalog sorted by course name, built once per catalog version
+    all_courses_list = home_page_courses(version)
 
     return render_template('index.html',
                            initial_load=True,
                            required_courses=all_courses_list,
-                           required_courses_dict=json.dumps(all_courses),
-                           json_required_courses=json.dumps(all_courses_list),
+                           catalog_version=version,
                            semesters=semesters,
                            certificates=certificates,
                            num_3000_replaced_by_cert_core=0,
@@ -57,18 +60,29 @@ def index():
 
 @app.route('/schedule', methods=["POST"])
 def schedule_generator():
+    # the first semester is built from the home page form, later requests continue from the saved state
+    scheduler_state = None
+    if "schedule_token" in request.form.keys():
+        scheduler_state = scheduler_sessions.get(request.form["schedule_token"])
+        if scheduler_state is None:
+            # the session expired (or was never created), start over from the home page
+            return redirect(url_for('index'))
+
     if "Print" in request.form.keys():
+        if scheduler_state is None:
+            # the counters of the printout are read from the saved state, without one there is no schedule to print
+            return redirect(url_for('index'))
         course_schedule_display = json.loads(request.form["course_schedule"])
-        total_credits = int(request.form["total_credits"])
-        num_3000_replaced_by_cert_core = int(request.form["num_3000_replaced_by_cert_core"])
-        min_3000_course = int(request.form["min_3000_course"])
-        cert_elective_courses_still_needed = int(request.form["cert_elective_courses_still_needed"])
-        ge_taken = 27 - int(request.form["gen_ed_credits_still_needed"])
-        fe_taken = int(request.form["fe_taken"])
-        c = json.loads(request.form["certificate_choice"])
-        user_name = request.form["user_name"]
+        total_credits = scheduler_state["total_credits"]
+        num_3000_replaced_by_cert_core = scheduler_state["num_3000_replaced_by_cert_core"]
+        min_3000_course = scheduler_state["min_3000_course"]
+        cert_elective_courses_still_needed = scheduler_state["cert_elective_courses_still_needed"]
+        ge_taken = 27 - scheduler_state["gen_ed_credits_still_needed"]
+        fe_taken = scheduler_state["fe_taken"]
+        c = scheduler_state["certificate_choice"]
+        user_name = scheduler_state["user_name"]
         certificate = c[0]
-        total_elective_credits = int(request.form["TOTAL_CREDITS_FOR_CERTIFICATE_ELECTIVES"])
+        total_elective_credits = scheduler_state["TOTAL_CREDITS_FOR_CERTIFICATE_ELECTIVES"]
         return render_template('printable.html',
                             course_schedule_display=course_schedule_display,
                             total_credits = total_credits,
@@ -81,10 +95,22 @@ def schedule_generator():
                            total_elective_credits = total_elective_credits,
                            user_name = user_name)
     else:
-        render_info = generate_semester(request)
+        try:
+            # complete schedules of new students come from the cache when the same profile was planned before
+            plan = PlanRequest.from_form(request.form, scheduler_state)
+            render_info = plan_results.plan(plan, app.config).render_info()
+        except CatalogVersionError as error:
+            # the catalog changed since the page was loaded, plan again from the current catalog
+            app.logger.info("%s, sending the student back to the home page", error)
+            return redirect(url_for('index'))
+        except UnschedulableError as error:
+            # the choices never lead to graduation, i.e. a required course whose prerequisites can never be met
+            app.logger.info("%s", error)
+            abort(422, description=str(error))
+        # save each step under a new token, so going back in the browser still continues from that step
+        schedule_token = scheduler_sessions.create(render_info["scheduler_state"])
         return render_template('index.html',
-                            required_courses_dict_list=render_info["required_courses_dict_list"],
-                            required_courses_dict_list_unchanged=render_info["required_courses_dict_list_unchanged"],
+                            schedule_token=schedule_token,
                             semesters=render_info["semesters"],
                             total_credits=render_info["total_credits"],
                             course_schedule=render_info["course_schedule"],
@@ -109,7 +135,6 @@ def schedule_generator():
                             first_semester = render_info['first_semester'],
                             semester_years = render_info['semester_years'],
                             semester_years_display = render_info["semester_years_display"],
-                            course_prereqs_for = render_info['course_prereqs_for'],
                             user_name = render_info['user_name'],
                             ge_taken = render_info['ge_taken'],
                             fe_taken = render_info['fe_taken'],
@@ -118,3 +143,71 @@ def schedule_generator():
                             required_courses_tuple_display = render_info["required_courses_tuple_display"],
                             total_elective_credits = render_info["TOTAL_CREDITS_FOR_CERTIFICATE_ELECTIVES"]
     )
+
+@app.route('/earliest_graduation', methods=["GET", "POST"])
+def earliest_graduation():
+    # how soon a student could graduate at the earliest, from the same fields as the home page form
+    try:
+        return jsonify(earliest_graduation_estimate(request.values))
+    except KeyError as error:
+        return jsonify({"error": f"Missing field: {error.args[0]}"}), 400
+    except ValueError as error:
+        return jsonify({"error": str(error)}), 400
+
+@app.route('/api/plans', methods=["POST"])
+def plan_cohort_api():
+    # plans complete schedules for many students at once, one JSON line per student as soon as it is planned
+    payload = request.get_json(silent=True)
+    profiles = payload.get("profiles") if isinstance(payload, dict) else payload
+    if not isinstance(profiles, list):
+        return jsonify({"error": 'Expected a JSON list of student profiles, or {"profiles": [...]}'}), 400
+    # without a planning pool (SCHEDULER_BATCH_WORKERS is 0) the profiles are planned in the request
+    results = plan_cohort(profiles, workers=0, timeout=app.config["SCHEDULER_BATCH_PROFILE_TIMEOUT"],
+                          settings=planner_settings(app.config), pool=planning_pool)
+    return Response(stream_with_context(json.dumps(result) + "\n" for result in results),
+                    mimetype="application/x-ndjson")
+
+@app.route('/api/replan', methods=["POST"])
+def replan_api():
+    # moves one course of the schedule on the page and pushes back the courses that depend on it where needed
+    payload = request.get_json(silent=True)
+    if not isinstance(payload, dict):
+        return jsonify({"error": "Expected a JSON object"}), 400
+    scheduler_state = scheduler_sessions.get(payload.get("schedule_token", ""))
+    if scheduler_state is None:
+        return jsonify({"error": "The schedule session has expired"}), 404
+    try:
+        move = payload["move"]
+        return jsonify(replan_after_move(scheduler_state, payload["course_schedule"], move["course"], int(move["semester"])))
+    except CatalogVersionError as error:
+        return jsonify({"error": str(error)}), 409
+    except KeyError as error:
+        return jsonify({"error": f"Missing field: {error.args[0]}"}), 400
+    except (TypeError, ValueError) as error:
+        return jsonify({"error": str(error)}), 400
+
+@app.route('/api/validate_moves', methods=["POST"])
+def validate_moves_api():
+    # checks the courses dropped on the schedule page (and the courses depending on them) in one request
+    payload = request.get_json(silent=True)
+    if not isinstance(payload, dict):
+        return jsonify({"error": "Expected a JSON object"}), 400
+    scheduler_state = scheduler_sessions.get(payload.get("schedule_token", ""))
+    if scheduler_state is None:
+        return jsonify({"error": "The schedule session has expired"}), 404
+    try:
+        return jsonify({"verdicts": validate_moves(scheduler_state, payload["course_schedule"], payload["moves"])})
+    except CatalogVersionError as error:
+        return jsonify({"error": str(error)}), 409
+    except KeyError as error:
+        return jsonify({"error": f"Missing field: {error.args[0]}"}), 400
+    except (TypeError, ValueError) as error:
+        return jsonify({"error": str(error)}), 400
+
+@app.route('/api/catalog/<version>.json')
+def catalog_json_api(version):
+    # the courses of the home page for a catalog version, which never change, so browsers keep them for a year
+    try:
+        return cached_response(request, catalog_json(version), max_age=365 * 24 * 60 * 60, immutable=True)
+    except CatalogVersionError:
+        return redirect(url_for('catalog_json_api', version=catalog_version()))
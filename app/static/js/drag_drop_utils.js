@@ -62,183 +62,186 @@ function dropFailedElementUpdate (should_add_warning, li_to_update, msg, course_
     }
 }
 
-function prereqVerification(course_info, course_num, semester_num, li_to_move, required_courses_list, course_schedule, is_prereq_for_check = false, orig_course_num, orig_semester_num) {
-    let li_to_update = li_to_move;
+// the validation request waiting for its verdicts, and the moves made meanwhile (sent together once it returns)
+let validation_in_flight = null;
+let queued_moves = [];
+let schedule_before_queued_moves = null;
+// the moved courses the server could not check, the student is asked before a schedule with them is posted
+let unchecked_courses = new Set();
+
+function postSchedule(url, body) {
+    // rejects with the error of the server (or the status) when the request fails, so the courses are not left unchecked silently
+    return fetch(url, {
+        method: "POST",
+        headers: {"Content-Type": "application/json"},
+        body: JSON.stringify(Object.assign({schedule_token: document.querySelector('input[name="schedule_token"]').value}, body))
+    }).then((response) => {
+        if (response.ok) {
+            return response.json();
+        }
+        return response.json().catch(() => ({})).then((result) => {
+            throw new Error(result.error || `${response.status} ${response.statusText}`);
+        });
+    });
+}
 
-    let required_courses_taken = false;
+function validateMoves(moves, course_schedule) {
+    // checks the moved courses, and the courses depending on them, on the server against the schedule before the moves
+    return postSchedule(document.getElementById("validate_moves_url").value, {course_schedule: course_schedule, moves: moves});
+}
 
-    let failed_message = "";
-    let msg = "";
-    let credits_total_for_new_semester = 0;
-    const courses_taken_before_new_semester = [];
-    const new_semester_current_courses = [];
-    const remaining_unaccounted_courses = [];
-    let semester_of_prereq_course = null;
+function showMoveError(error, moves) {
+    const msg = `The move could not be checked, try again or check the prerequisites yourself. (${error.message})`;
+    let course_schedule = JSON.parse(document.getElementById("course_schedule").value);
 
-    let concurrent = null;
+    moves.forEach((move) => {
+        const li_to_update = document.getElementById(move.course);
+        if (li_to_update) {
+            dropFailedElementUpdate(true, li_to_update, msg, move.course);
+        }
+        const semester_num = semesterOf(course_schedule, move.course);
+        if (semester_num > -1) {
+            course_schedule = updateCourseScheduleWithPrereqValidation(course_schedule, semester_num, move.course, false, msg);
+        }
+        unchecked_courses.add(move.course);
+    });
 
-    if (Object.keys(course_info).includes("concurrent")) {
-        concurrent = course_info["concurrent"];
-    }
+    document.getElementById("course_schedule").value = JSON.stringify(course_schedule);
+    const error_element = document.getElementById("move_error");
+    error_element.textContent = msg;
+    error_element.hidden = false;
+}
 
-    if (!is_prereq_for_check) {
-        course_schedule.forEach((semester) => { 
-            semester_schedule = semester.schedule.forEach((course_info) => {
-                const is_elective = course_info.name === '[User Selects]';   
-
-                if (!is_elective) {
-                    if (semester.semester_number < semester_num) {
-                        courses_taken_before_new_semester.push(course_info.course);
-                    }
-                    else if (semester.semester_number === semester_num) {
-                        new_semester_current_courses.push(course_info.course);
-                    }
-                    else {
-                        remaining_unaccounted_courses.push(course_info.course)
-                    }
-                }
-            });
-            if (semester.semester_number <= semester_num) {
-                credits_total_for_new_semester = credits_total_for_new_semester + semester.credits;
-            }
-        });
-    } else {
-        li_to_update = document.getElementById(course_num)
-        if (li_to_update) {
-            course_schedule.some((semester) => {
-                semester_schedule = semester.schedule.map(x => x.course);
-                if (semester_schedule.includes(course_num)) {
-                    semester_of_prereq_course = semester.semester_number;
-                    return true;
-                }
-            })
-            course_schedule.forEach((semester) => {
-                credits_to_remove = 0; 
-                
-                if (semester.semester_number === semester_num && semester_num < semester_of_prereq_course) {
-                    courses_taken_before_new_semester.push(orig_course_num);
-                } else if (semester.semester_number === semester_of_prereq_course) {
-                    new_semester_current_courses.push(orig_course_num);
-                } else if (semester.semester_number === semester_num && semester_num > semester_of_prereq_course) {
-                    remaining_unaccounted_courses.push(orig_course_num);
-                }
+function showMoveVerdicts(verdicts) {
+    let course_schedule = JSON.parse(document.getElementById("course_schedule").value);
 
-                semester.schedule.forEach((course_information) => {
-                    if (!(course_information.course === orig_course_num)) {
-                        const is_elective = course_information.name === '[User Selects]';
-                        if (!is_elective) {
-                            if (semester.semester_number < semester_of_prereq_course) {
-                                courses_taken_before_new_semester.push(course_information.course);
-                            }
-                            else if (semester.semester_number === semester_of_prereq_course) {
-                                new_semester_current_courses.push(course_information.course);
-                            }
-                            else {
-                                remaining_unaccounted_courses.push(course_information.course)
-                            }
-                        }
-                    } else {
-                        credits_to_remove = course_information.credits;
-                    }
-                });
-                if (semester.semester_number <= semester_num) {
-                    credits_total_for_new_semester = credits_total_for_new_semester + semester.credits - credits_to_remove;
-                }
-                if (semester_of_prereq_course) {
-                    return true;
-                }
-            });
+    verdicts.forEach((verdict) => {
+        unchecked_courses.delete(verdict.course);
+        let msg = "";
+        if (verdict.reason && verdict.after) {
+            msg = `${verdict.course} failed prerequisite validation after ${verdict.after} was moved. `.concat(verdict.reason);
+        } else if (verdict.reason) {
+            msg = verdict.reason;
+        }
+
+        const li_to_update = document.getElementById(verdict.course);
+        if (li_to_update) {
+            dropFailedElementUpdate(Boolean(verdict.reason), li_to_update, msg, verdict.course);
         }
+        course_schedule = updateCourseScheduleWithPrereqValidation(course_schedule, verdict.semester, verdict.course, !verdict.reason, msg);
+    });
+
+    document.getElementById("course_schedule").value = JSON.stringify(course_schedule);
+    if (!unchecked_courses.size) {
+        document.getElementById("move_error").hidden = true;
+    }
+}
+
+function queueMoveValidation(move, schedule_before_move) {
+    if (!queued_moves.length) {
+        schedule_before_queued_moves = schedule_before_move;
+    }
+    queued_moves.push(move);
+    if (!validation_in_flight) {
+        sendQueuedMoves();
     }
+}
+
+function replanDependents() {
+    const checkbox = document.getElementById("replan_dependents");
+    return Boolean(checkbox && checkbox.checked);
+}
+
+function semesterOf(course_schedule, course_num) {
+    return course_schedule.findIndex((semester) => semester.schedule.some((course) => course.course === course_num));
+}
+
+function moveScheduleEntry(course_schedule, course_num, from_semester, to_semester) {
+    const index = course_schedule[from_semester].schedule.findIndex((course) => course.course === course_num);
+    const entry = course_schedule[from_semester].schedule.splice(index, 1)[0];
+    course_schedule[from_semester].credits = parseInt(course_schedule[from_semester].credits) - parseInt(entry.credits);
+    course_schedule[to_semester].schedule.push(entry);
+    course_schedule[to_semester].credits = parseInt(course_schedule[to_semester].credits) + parseInt(entry.credits);
+}
 
-    const courses_taken = JSON.parse(document.getElementById("courses_taken").value);
-    
-    courses_taken.forEach((course) => {
-        if (!(courses_taken_before_new_semester.includes(course)
-            || new_semester_current_courses.includes(course)
-            || remaining_unaccounted_courses.includes(course))
-        ) {
-            courses_taken_before_new_semester.push(course);
+function replanMove(move) {
+    // the course is already where it was dropped, the server pushes back the courses depending on it that can no longer stay
+    const course_schedule = JSON.parse(document.getElementById("course_schedule").value);
+    return postSchedule(document.getElementById("replan_url").value, {
+        course_schedule: course_schedule,
+        move: {course: move.course, semester: semesterOf(course_schedule, move.course)}
+    });
+}
+
+function showReplan(result) {
+    let course_schedule = JSON.parse(document.getElementById("course_schedule").value);
+
+    // the first move is the dropped course itself, the others are the courses pushed back after it
+    result.moved.slice(1).forEach((moved) => {
+        // a course the student moved again in the meantime stays where they put it
+        if (semesterOf(course_schedule, moved.course) !== moved.from) {
+            return;
         }
-    })
-
-    if (li_to_update) {
-        // # Update prereq check to check if course_taken (if not in schedule) in js
-        course_info["prerequisite"].some((prereq) => {
-            if (Array.isArray(prereq)) {
-                if (prereq.length === 1) {
-                    if (courses_taken_before_new_semester.includes(prereq[0]) ||
-                        (new_semester_current_courses.includes(prereq[0]) && (prereq[0] === concurrent))) {
-                            required_courses_taken = true;
-                            return true;
-                    } else {
-                        if (required_courses_list.includes(prereq[0])) {
-                            failed_message = `${course_num} prerequisite (${prereq[0]}) has to be completed prior to the selected semester!`;
-                        }
-                        required_courses_taken = false;
-                    }
-                } else {
-                    required_courses_taken = false;
-    
-                    prereq.some((prereq_course) => {
-                        if (courses_taken_before_new_semester.includes(prereq_course) ||
-                            (new_semester_current_courses.includes(prereq_course) && (prereq_course === concurrent))) {
-                                required_courses_taken = true;
-                        } else {
-                            if (required_courses_list.includes(prereq_course)) {
-                                failed_message = `${course_num} prerequisite (${prereq_course}) has to be completed prior to the selected semester!`;
-                            }
-                            required_courses_taken = false;
-                        }
-                        if (!required_courses_taken) {
-                            return true;
-                        }
-                    })
-                    if (required_courses_taken) {
-                        required_courses_taken = true;
-                        return true;
-                    }
-                }
-            } else {
-                if (course_num === "ENGLISH 3130") {
-                    if (!(credits_total_for_new_semester >= 48)) {
-                        failed_message = `ENGLISH 3130 does not meet it's criteria of a minimum of 48 credit hours for the selected semester! Currently at ${credits_total_for_new_semester} credits.`;
-                        required_courses_taken = false;
-                    } else if (!courses_taken_before_new_semester.includes(prereq)) {
-                        if (required_courses_list.includes(prereq)) {
-                            failed_message = `${course_num} prerequisite (${prereq}) has to be completed prior to the selected semester!`;
-                        }
-                        required_courses_taken = false;
-                    } else {
-                        required_courses_taken = true;
-                        return true; // Stop looping since class can be added
-                    }
-                } else if ((courses_taken_before_new_semester.includes(prereq) ||
-                    (new_semester_current_courses.includes(prereq) && (prereq === concurrent)))) {
-                        required_courses_taken = true;
-                } else {
-                    if (required_courses_list.includes(prereq)) {
-                        failed_message = `${course_num} prerequisite (${prereq}) has to be completed prior to the selected semester!`;
-                    }
-                    required_courses_taken = false
-                }
-            }
-        })
-    
-        if (is_prereq_for_check && !required_courses_taken) {
-            msg = `${course_num} failed prerequisite validation after ${orig_course_num} was moved. `.concat(failed_message);
-        } else if (!required_courses_taken) {
-            msg = `${course_num} failed prerequisite validation after moving. `.concat(failed_message);
+        moveScheduleEntry(course_schedule, moved.course, moved.from, moved.to);
+        if (queued_moves.length) {
+            moveScheduleEntry(schedule_before_queued_moves, moved.course, moved.from, moved.to);
         }
-    
-        dropFailedElementUpdate(!required_courses_taken, li_to_update, msg, course_num);
-    }
+        [moved.from, moved.to].forEach((semester_num) => {
+            document.getElementById(`semester-${semester_num}-credits`).childNodes[1].textContent = course_schedule[semester_num].credits;
+        });
+        const li_to_move = document.getElementById(moved.course);
+        document.getElementById(`semester-${moved.to}-ul`).appendChild(li_to_move);
+        dropFailedElementUpdate(false, li_to_move, "", moved.course);
+        course_schedule = updateCourseScheduleWithPrereqValidation(course_schedule, moved.to, moved.course, true);
+    });
+    document.getElementById("course_schedule").value = JSON.stringify(course_schedule);
+
+    const dropped = result.moved[0];
+    showMoveVerdicts([{course: dropped.course, semester: dropped.to, reason: result.verdict, after: null}].concat(
+        result.unschedulable.map((failure) => ({course: failure.course, semester: failure.semester, reason: failure.reason, after: dropped.course}))));
+}
 
-    semester_to_check = semester_of_prereq_course ? semester_of_prereq_course : orig_semester_num;
+function sendQueuedMoves() {
+    let request;
+    let moves;
+    if (replanDependents()) {
+        // each move is re-planned on its own, from the schedule the moves before it left
+        moves = [queued_moves.shift()];
+        if (queued_moves.length) {
+            moveScheduleEntry(schedule_before_queued_moves, moves[0].course, semesterOf(schedule_before_queued_moves, moves[0].course), moves[0].semester);
+        }
+        request = replanMove(moves[0]).then(showReplan);
+    } else {
+        moves = queued_moves;
+        queued_moves = [];
+        request = validateMoves(moves, schedule_before_queued_moves).then((result) => showMoveVerdicts(result.verdicts));
+    }
+    validation_in_flight = request.catch((error) => showMoveError(error, moves)).finally(() => {
+        validation_in_flight = null;
+        if (queued_moves.length) {
+            sendQueuedMoves();
+        }
+    });
+}
 
-    return updateCourseScheduleWithPrereqValidation(course_schedule, semester_to_check, course_num, required_courses_taken, msg);
+function movesValidated() {
+    // resolves once every move made so far has its verdict
+    return validation_in_flight ? validation_in_flight.then(movesValidated) : Promise.resolve();
 }
 
+// the schedule is posted with the validation flags of its courses, so it waits for the verdicts of the last moves
+document.addEventListener("submit", (ev) => {
+    if (validation_in_flight || queued_moves.length) {
+        ev.preventDefault();
+        const form = ev.target;
+        const submitter = ev.submitter;
+        movesValidated().then(() => form.requestSubmit(submitter));
+    } else if (unchecked_courses.size && !confirm(
+            `${Array.from(unchecked_courses).join(", ")} could not be checked and may be missing prerequisites. Continue anyway?`)) {
+        ev.preventDefault();
+    }
+});
+
 function drop(ev, course_element) {
     ev.preventDefault();
 
@@ -252,89 +255,25 @@ function drop(ev, course_element) {
     var li_to_move = document.getElementById("li_to_move");
     let course_schedule = JSON.parse(document.getElementById("course_schedule").value);
 
-    const orig_semester_num = parseInt(li_to_move.parentNode.parentNode.getAttribute("semesterNum"))
     const semester_num = parseInt(course_element.getAttribute("semesterNum"));
     const selected_drop_ul = document.getElementById(`semester-${semester_num}-ul`);
 
-    if (course_num === "INTDSC 1003") {
-        if (semester_num === 0) {
-            dropFailedElementUpdate(false, li_to_move, null, course_num);
-            course_schedule = updateCourseScheduleWithPrereqValidation(course_schedule, orig_semester_num, course_num, true)
-        } else {
-            error_msg = "INTDSC 1003 must be taken in the first semester!";
-            dropFailedElementUpdate(true, li_to_move, error_msg, course_num);
-            course_schedule = updateCourseScheduleWithPrereqValidation(course_schedule, orig_semester_num, course_num, false, error_msg)
-        }
-    } else if (course_num === "CMP SCI 1000") {
-        if (semester_num <= 1) {
-            dropFailedElementUpdate(false, li_to_move, null, course_num);
-            course_schedule = updateCourseScheduleWithPrereqValidation(course_schedule, orig_semester_num, course_num, true)
-        } else {
-            error_msg = "CMP SCI 1000 must be taken in the first or second semester!";
-            dropFailedElementUpdate(true, li_to_move, error_msg, course_num);
-            course_schedule = updateCourseScheduleWithPrereqValidation(course_schedule, orig_semester_num, course_num, false, error_msg)
-        }
-    } else {
-        // check if the course is an elective
-        const elective = course_name === '[User Selects]';
-
-        if (!elective) {
-            var items = selected_drop_ul.getElementsByTagName("li");
-            let course_info = null;
-
-            for (var i = 0; i < items.length; ++i) {
-                // Check if course is being dropped back into the same semester it was previously in
-                if (course_num == items[i].getAttribute("courseNum")) { 
-                    li_to_move.removeAttribute("id");
-                    return; // Stop drop() function since the list item is not being dropped in a new semester
-                }
-            }
-
-            const required_courses_dict_list = JSON.parse(document.getElementById("required_courses_dict_list_unchanged").value);
-
-            const required_courses_list = [];
+    // electives can go in any semester, courses are checked on the server once they are moved
+    let move = null;
+    const schedule_before_move = JSON.parse(document.getElementById("course_schedule").value);
 
-            required_courses_dict_list.forEach(course_and_info => {
-                required_courses_list.push(course_and_info[0])
-            });
+    if (course_name !== '[User Selects]') {
+        var items = selected_drop_ul.getElementsByTagName("li");
 
-            required_courses_dict_list.forEach((course_array) => {
-                if (course_array[0] === course_num) {
-                    course_info = course_array[1];
-                }
-                required_courses_list.push(course_array[0])
-            });
-
-            let should_validate_prereqs = true;
-
-            if (!course_info.semesters_offered.includes(course_schedule[semester_num].semester)) {
-                let msg = `${course_num} is not offered during the ${course_schedule[semester_num].semester} semester!`;
-                dropFailedElementUpdate(true, li_to_move, msg, course_num);
-                should_validate_prereqs = false;
-            } else {
-                dropFailedElementUpdate(false, li_to_move, null, course_num);
-            }
-
-            if ((course_info["prerequisite"].length != 0) && should_validate_prereqs) {
-                course_schedule = prereqVerification(course_info, course_num, semester_num, li_to_move, required_courses_list, course_schedule, false, null, orig_semester_num);
+        for (var i = 0; i < items.length; ++i) {
+            // Check if course is being dropped back into the same semester it was previously in
+            if (course_num == items[i].getAttribute("courseNum")) {
+                li_to_move.removeAttribute("id");
+                return; // Stop drop() function since the list item is not being dropped in a new semester
             }
+        }
 
-            course_prereqs_for = JSON.parse(document.getElementById("course_prereqs_for").value);
-            course_prereqs_for_selected_course = course_prereqs_for[course_num]
-
-            if (course_prereqs_for_selected_course) {
-                course_prereqs_for_selected_course.forEach((prereq) => {
-                    prereq_for_course_info = null;
-                    required_courses_dict_list.some((course_array) => {
-                        if (course_array[0] === prereq) {
-                            prereq_for_course_info = course_array[1];
-                            return true;
-                        }
-                    });
-                    course_schedule = prereqVerification(prereq_for_course_info, prereq, semester_num, li_to_move, required_courses_list, course_schedule, true, course_num, orig_semester_num);
-                })
-            }
-        }        
+        move = {course: course_num, semester: semester_num};
     }
 
     var li_to_move_original_parent = li_to_move.parentNode;
@@ -375,4 +314,8 @@ function drop(ev, course_element) {
 
     li_to_move.setAttribute("id", course_num);
     selected_drop_ul.appendChild(li_to_move);
+
+    if (move) {
+        queueMoveValidation(move, schedule_before_move);
+    }
 }
\ No newline at end of file
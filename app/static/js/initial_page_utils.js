@@ -100,15 +100,29 @@ function handleTakenCourseSelect(sel) {
     updateWaivedTakenDropdown(sel, true)
 }
 
+// The courses of the catalog, fetched once per page (the browser keeps them for each catalog version)
+var required_courses_request = null;
+
+function loadRequiredCourses() {
+    if (required_courses_request === null) {
+        required_courses_request = fetch(document.getElementById("catalog_url").value)
+            .then((response) => response.json());
+    }
+    return required_courses_request;
+}
+
 // Update waived/taken courses select element to remove/add options based on selected waived/taken courses
 function updateWaivedTakenDropdown(sel, is_taken_courses) {
+    loadRequiredCourses().then((required_courses) => rebuildWaivedTakenDropdown(sel, is_taken_courses, required_courses));
+}
+
+function rebuildWaivedTakenDropdown(sel, is_taken_courses, required_courses) {
     var dropdown_to_update;
     if (is_taken_courses) {
         dropdown_to_update = document.getElementById("waived_courses");
     } else {
         dropdown_to_update = document.getElementById("taken_courses");   
     }
-    var required_courses = JSON.parse(document.getElementById("json_required_courses").value);
 
     var opts = []
     var selected_opts_from_dropdown_to_update = []
@@ -0,0 +1,55 @@
+import json
+
+import pytest
+
+from app import routes
+from app.middleware.batch_planning import PlanningPool, ProfileError, plan_cohort, profile_request
+from tests.test_planner import BASELINE_SCHEDULES
+
+# an odd number of general education credits taken never brings the credits still needed to 0
+UNSCHEDULABLE_PROFILE = {"current_semester": "Fall", "minimum_semester_credits": 15, "ge_taken": 1}
+
+
+def test_profile_request_rejects_invalid_profiles():
+    for profile in ({"current_semester": "Winter", "minimum_semester_credits": 12},
+                    {"current_semester": "Fall"},
+                    {"current_semester": "Fall", "minimum_semester_credits": "twelve"},
+                    {"current_semester": "Fall", "minimum_semester_credits": 12, "certificate": "Astronomy"},
+                    {"current_semester": "Fall", "minimum_semester_credits": 12, "courses_taken": ["CMP SCI 1250", 2250]},
+                    ["not", "a", "profile"]):
+        with pytest.raises(ProfileError):
+            profile_request(profile)
+
+
+def test_worker_pool_plans_like_the_request():
+    profiles = [case["profile"] for case in BASELINE_SCHEDULES[:6]] + [{"current_semester": "Winter"}]
+    in_request = sorted(plan_cohort(profiles, workers=0), key=lambda result: result["index"])
+    pool = PlanningPool(2)
+    try:
+        for _ in range(2):
+            pooled = sorted(plan_cohort(profiles, pool=pool), key=lambda result: result["index"])
+            assert pooled == in_request
+    finally:
+        pool.shutdown()
+    assert "error" in in_request[-1] and all("error" not in result for result in in_request[:-1])
+
+
+def test_profile_that_never_graduates_is_an_error_in_the_request():
+    # SIGALRM cannot stop a request thread, the planner gives up on its own
+    results = list(plan_cohort([UNSCHEDULABLE_PROFILE, BASELINE_SCHEDULES[0]["profile"]], workers=0))
+    assert results[0]["error"] == \
+        "The schedule does not graduate within 60 semesters, still missing: gen_ed_credits (-1)"
+    assert "error" not in results[1]
+
+
+def test_batch_api_streams_one_result_per_profile(client, monkeypatch):
+    monkeypatch.setattr(routes, "planning_pool", None)
+    response = client.post("/api/plans", json={"profiles": [BASELINE_SCHEDULES[0]["profile"], UNSCHEDULABLE_PROFILE,
+                                                            {"current_semester": "Winter"}]})
+    assert response.status_code == 200 and response.mimetype == "application/x-ndjson"
+    results = [json.loads(line) for line in response.get_data(as_text=True).splitlines()]
+    assert [result["index"] for result in results] == [0, 1, 2]
+    assert results[0]["is_graduated"] and "does not graduate" in results[1]["error"]
+    assert results[2]["error"] == "Unknown semester: Winter"
+
+    assert client.post("/api/plans", json={"profiles": "none"}).status_code == 400
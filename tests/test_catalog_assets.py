@@ -0,0 +1,65 @@
+import gzip
+import json
+
+from app.middleware.catalog_assets import catalog_json, home_page_courses
+from app.middleware.course_parsing import catalog_version
+
+
+def catalog_url(version=None):
+    return f"/api/catalog/{version or catalog_version()}.json"
+
+
+def test_catalog_json_lists_the_home_page_courses(client):
+    response = client.get(catalog_url())
+    assert response.status_code == 200
+    assert response.mimetype == "application/json" and "Content-Encoding" not in response.headers
+    assert response.get_json() == json.loads(json.dumps(home_page_courses(catalog_version())))
+    # the URL names the catalog version, so the body never changes and browsers keep it without asking again
+    assert response.cache_control.public and response.cache_control.immutable
+    assert response.cache_control.max_age == 365 * 24 * 60 * 60
+    assert "Accept-Encoding" in response.vary
+
+
+def test_etag_is_the_catalog_version_for_each_encoding(client):
+    version = catalog_version()
+    identity = client.get(catalog_url(), headers={"Accept-Encoding": "identity"})
+    gzipped = client.get(catalog_url(), headers={"Accept-Encoding": "gzip, deflate"})
+    assert identity.get_etag() == (version, False)
+    assert gzipped.get_etag() == (f"{version}-gzip", False)
+
+    assert gzipped.headers["Content-Encoding"] == "gzip"
+    assert gzip.decompress(gzipped.data) == identity.data == catalog_json(version).body
+    assert len(gzipped.data) < len(identity.data)
+
+
+def test_matching_etag_is_not_modified(client):
+    version = catalog_version()
+    response = client.get(catalog_url(), headers={"If-None-Match": f'"{version}"'})
+    assert response.status_code == 304 and response.data == b""
+    assert response.get_etag() == (version, False)
+
+    response = client.get(catalog_url(), headers={"Accept-Encoding": "gzip", "If-None-Match": f'"{version}-gzip"'})
+    assert response.status_code == 304 and response.data == b""
+
+
+def test_etag_of_another_encoding_or_version_sends_the_body(client):
+    version = catalog_version()
+    # a copy of the identity body does not answer a request that asks for gzip
+    response = client.get(catalog_url(), headers={"Accept-Encoding": "gzip", "If-None-Match": f'"{version}"'})
+    assert response.status_code == 200 and response.headers["Content-Encoding"] == "gzip"
+    response = client.get(catalog_url(), headers={"If-None-Match": '"0000000000000000"'})
+    assert response.status_code == 200 and response.data == catalog_json(version).body
+
+
+def test_retired_catalog_version_redirects_to_the_current_one(client):
+    response = client.get(catalog_url("0" * 16))
+    assert response.status_code == 302
+    assert response.location == catalog_url()
+    assert client.get(response.location).status_code == 200
+
+
+def test_home_page_links_the_current_catalog(client):
+    page = client.get("/").get_data(as_text=True)
+    assert f'id="catalog_url" value="{catalog_url()}"' in page
+    # the courses are fetched by the page instead of being inlined into it
+    assert catalog_json(catalog_version()).body.decode("utf-8") not in page
@@ -0,0 +1,98 @@
+import copy
+import hashlib
+import os
+import pickle
+
+import pytest
+
+from app.middleware.catalog_cache import CompiledFileCache, FrozenDict, freeze, thaw
+
+CATALOG = {"CMP SCI 1250": {"credit": 3, "prerequisite": ["CMP SCI 1000", "MATH 1030"], "rotation_term": None},
+           "MATH 1030": {"credit": 3, "prerequisite": [], "rotation_term": [{"term": "Fall"}]}}
+
+
+def test_freeze_makes_every_level_read_only():
+    frozen = freeze(CATALOG)
+    assert isinstance(frozen, FrozenDict)
+    assert frozen["CMP SCI 1250"]["prerequisite"] == ("CMP SCI 1000", "MATH 1030")
+    for write in (lambda: frozen.__setitem__("x", 1), lambda: frozen["MATH 1030"].update(credit=4),
+                  lambda: frozen.pop("MATH 1030"), lambda: frozen.clear(), lambda: frozen.setdefault("x", 1)):
+        with pytest.raises(TypeError):
+            write()
+    with pytest.raises(AttributeError):
+        frozen["CMP SCI 1250"]["prerequisite"].append("MATH 1800")
+
+
+def test_thaw_and_deepcopy_return_private_mutable_copies():
+    frozen = freeze(CATALOG)
+    for copied in (thaw(frozen), copy.deepcopy(frozen)):
+        assert copied == CATALOG
+        assert type(copied) is dict and type(copied["MATH 1030"]["rotation_term"]) is list
+        copied["MATH 1030"]["credit"] = 4
+        assert frozen["MATH 1030"]["credit"] == 3
+
+
+def test_frozen_dict_pickles_as_frozen():
+    frozen = pickle.loads(pickle.dumps(freeze(CATALOG)))
+    assert frozen == freeze(CATALOG)
+    assert isinstance(frozen, FrozenDict) and isinstance(frozen["MATH 1030"], FrozenDict)
+
+
+class CountingCompiler:
+
+    def __init__(self):
+        self.calls = 0
+
+    def __call__(self, text):
+        self.calls += 1
+        return {"lines": text.splitlines()}
+
+
+def test_compiled_file_cache_only_recompiles_changed_content(tmp_path):
+    path = tmp_path / "catalog.txt"
+    path.write_text("a\nb\n")
+    compiler = CountingCompiler()
+    cache = CompiledFileCache(str(path), compiler)
+
+    assert cache.get() == {"lines": ("a", "b")}
+    assert cache.get() is cache.get()
+    assert cache.digest == hashlib.sha256(b"a\nb\n").hexdigest()
+
+    # touched without changing the content: hashed again, but not recompiled
+    stat = os.stat(path)
+    os.utime(path, ns=(stat.st_atime_ns, stat.st_mtime_ns + 10 ** 9))
+    assert cache.get() == {"lines": ("a", "b")}
+    assert compiler.calls == 1
+
+    path.write_text("a\nb\nc\n")
+    assert cache.get_versioned() == (hashlib.sha256(b"a\nb\nc\n").hexdigest(), {"lines": ("a", "b", "c")})
+    assert compiler.calls == 2
+
+
+def test_compiled_file_cache_prefers_precompiled_data(tmp_path):
+    path = tmp_path / "catalog.txt"
+    path.write_text("a\n")
+    digest = hashlib.sha256(b"a\n").hexdigest()
+    compiler = CountingCompiler()
+    lookups = []
+
+    def precompiled(name, content_digest):
+        lookups.append((name, content_digest))
+        return freeze({"lines": ["from the snapshot"]}) if content_digest == digest else None
+
+    cache = CompiledFileCache(str(path), compiler, precompiled)
+    assert cache.get() == {"lines": ("from the snapshot",)}
+    assert lookups == [("catalog.txt", digest)] and compiler.calls == 0
+
+    path.write_text("b\n")
+    assert cache.get() == {"lines": ("b",)}
+    assert compiler.calls == 1
+
+
+def test_streaming_cache_hashes_what_the_compiler_did_not_read(tmp_path):
+    path = tmp_path / "catalog.xml"
+    path.write_bytes(b"<root/>" + b" " * 200000)
+    cache = CompiledFileCache(str(path), lambda stream: {"head": stream.read(7).decode()}, streaming=True)
+
+    assert cache.get() == {"head": "<root/>"}
+    assert cache.digest == hashlib.sha256(path.read_bytes()).hexdigest()
@@ -0,0 +1,26 @@
+import struct
+
+from app.middleware import catalog_snapshot
+from app.middleware.catalog_cache import thaw
+from app.middleware.course_parsing import certificate_registry_cache, course_catalog_cache
+
+
+def test_snapshot_round_trip_matches_the_xml(tmp_path):
+    path = str(tmp_path / "catalog.snapshot")
+    sources = catalog_snapshot.write_snapshot([course_catalog_cache, certificate_registry_cache], path)
+    snapshot = catalog_snapshot.read_snapshot(path)
+
+    assert dict(snapshot["sources"]) == sources
+    for cache in (course_catalog_cache, certificate_registry_cache):
+        digest, compiled = cache.compile_file()
+        assert sources[cache.name] == digest
+        assert thaw(snapshot["compiled"][cache.name]) == thaw(compiled)
+
+
+def test_snapshot_of_another_format_is_ignored(tmp_path):
+    path = tmp_path / "catalog.snapshot"
+    assert catalog_snapshot.read_snapshot(str(path)) is None
+    path.write_bytes(struct.pack('<8sH2x', catalog_snapshot.SNAPSHOT_MAGIC, catalog_snapshot.SNAPSHOT_FORMAT_VERSION + 1))
+    assert catalog_snapshot.read_snapshot(str(path)) is None
+    path.write_bytes(b"not a snapshot")
+    assert catalog_snapshot.read_snapshot(str(path)) is None
@@ -0,0 +1,39 @@
+import json
+
+from app import app
+
+PROFILES_CSV = """id,current_semester,minimum_semester_credits,include_summer,minimum_summer_credits,courses_taken,certificate
+first,Fall,15,false,,CMP SCI 1250; MATH 1320,
+second,Spring,12,yes,6,,WEBCERTReq
+malformed,Fall,twelve,,,,
+"""
+
+
+def test_plan_bulk_plans_every_csv_row(tmp_path):
+    profiles = tmp_path / "cohort.csv"
+    profiles.write_text(PROFILES_CSV)
+    output = tmp_path / "schedules.jsonl"
+
+    result = app.test_cli_runner().invoke(args=["plan-bulk", str(profiles), "--workers", "0", "-o", str(output)])
+    assert result.exit_code == 0, result.output
+    results = {result["id"]: result for result in map(json.loads, output.read_text().splitlines())}
+
+    assert [results[id]["index"] for id in ("first", "second", "malformed")] == [0, 1, 2]
+    assert results["first"]["is_graduated"] and results["second"]["is_graduated"]
+    # the taken courses (separated by `;`) are not planned again
+    planned = {entry["course"] for semester in results["first"]["semesters"] for entry in semester["schedule"]}
+    assert not planned & {"CMP SCI 1250", "MATH 1320"}
+    assert {semester["semester"] for semester in results["second"]["semesters"]} == {"Fall", "Spring", "Summer"}
+    # a row that cannot be planned is reported in its place, the others are still planned
+    assert results["malformed"]["error"] == "minimum_semester_credits must be a whole number, not 'twelve'"
+    assert "Planned 3 profiles (1 errors)" in result.output
+
+
+def test_plan_bulk_reports_json_lines_that_cannot_be_read(tmp_path):
+    profiles = tmp_path / "cohort.jsonl"
+    profiles.write_text('{"current_semester": "Fall", "minimum_semester_credits": 15}\n{"current_semester": \n')
+    result = app.test_cli_runner().invoke(args=["plan-bulk", str(profiles), "--workers", "0"])
+    assert result.exit_code == 0
+    lines = [json.loads(line) for line in result.output.splitlines() if line.startswith("{")]
+    assert "error" not in lines[0] and lines[1]["error"].startswith("Line 2 is not valid JSON")
+    assert "Planned 2 profiles (1 errors)" in result.output
@@ -0,0 +1,80 @@
+import io
+
+import pytest
+import xmltodict
+
+from app.middleware.catalog_cache import thaw
+from app.middleware.course_parsing import build_dictionary, compile_course_stream, course_catalog_cache
+
+
+def compile_courses(xml_text):
+    # the parser course_data.xml was read with before it was streamed, the reference for compile_course_stream
+    csbs_req = xmltodict.parse(xml_text)["CSBSReq"]
+
+    all_courses = build_dictionary(csbs_req["Electives"]["course"])
+    all_courses.update(build_dictionary(csbs_req["OtherCourses"]["course"]))
+    all_courses.update(build_dictionary(csbs_req["MathandStatistics"]["course"]))
+    all_courses.update(build_dictionary(csbs_req["CoreCourses"]["course"]))
+    return all_courses
+
+
+def course(number, subject="CMP SCI", terms=("Fall",), prerequisites=(), extra=""):
+    # a course always has a rotation term, an empty one if it is not offered
+    rotation = "".join(f"<rotation_term><term>{term}</term><time_code>D</time_code></rotation_term>"
+                       for term in terms or ("",))
+    prerequisite = "".join(f"<or_choice><and_required>{name}</and_required></or_choice>" for name in prerequisites)
+    prerequisite = f"<prerequisite>{prerequisite}</prerequisite>" if prerequisites else ""
+    return (f"<course><subject>{subject}</subject><course_number>{number}</course_number>"
+            f"<course_name>Course {number} &amp; more</course_name>{rotation}<credit>3</credit>"
+            f"{prerequisite}{extra}</course>")
+
+
+def catalog_xml(**sections):
+    body = "".join(f"<{name}>{''.join(courses)}</{name}>" for name, courses in sections.items())
+    return ('<?xml version="1.0" encoding="UTF-8"?>\n<!-- generated -->\n'
+            '<CSBSReq xmlns:xsi="http://www.w3.org/2001/XMLSchema-instance">' + body + "</CSBSReq>")
+
+
+def streamed(xml_text):
+    return compile_course_stream(io.BytesIO(xml_text.encode("utf-8")))
+
+
+def test_streamed_catalog_matches_the_parsed_catalog():
+    with open(course_catalog_cache.path, encoding="utf-8") as fd:
+        parsed = compile_courses(fd.read())
+    assert thaw(course_catalog_cache.compile_file()[1]) == parsed
+
+
+def test_streamed_courses_match_the_parser_on_unusual_layouts():
+    xml_text = catalog_xml(
+        # a single course in a section, which xmltodict gives as a dictionary instead of a list
+        MathandStatistics=[course(1030, "MATH", terms=("Fall", "Spring", "Summer"))],
+        CoreCourses=[course(1250, prerequisites=("CMP SCI 1000", "MATH 1030")), course(2250, terms=()),
+                     course(2261, extra='<prerequisite_description lang="en">Prerequisites: CMP SCI 2250'
+                                        '<br/> or consent</prerequisite_description>')],
+        # a course listed in two sections keeps the one of the later section
+        Electives=[course(2250, terms=("Summer",)), course(4220, prerequisites=("CMP SCI 2261",))],
+        OtherCourses=[course(1100, "ENGLISH"), course(1000), course(3130, extra="<paired>CMP SCI 5130</paired>")],
+        Unused=[course(9999)])
+    assert streamed(xml_text) == compile_courses(xml_text)
+    assert streamed(xml_text)["CMP SCI 2250"]["semesters_offered"] is None
+
+
+def test_large_catalog_streams_like_the_parser():
+    courses = [course(number, prerequisites=(f"CMP SCI {number - 1}",)) for number in range(1000, 6000)]
+    xml_text = catalog_xml(CoreCourses=courses[:2500], Electives=courses[2500:], OtherCourses=[course(1)],
+                           MathandStatistics=[course(2, "MATH")])
+    compiled = streamed(xml_text)
+    assert len(compiled) == 5002
+    assert compiled == compile_courses(xml_text)
+
+
+def test_catalog_without_a_course_type_is_rejected():
+    with pytest.raises(ValueError, match="no courses under OtherCourses"):
+        streamed(catalog_xml(CoreCourses=[course(1000)], Electives=[course(4220)],
+                             MathandStatistics=[course(1030, "MATH")]))
+
+
+def test_catalog_with_another_root_is_rejected():
+    with pytest.raises(ValueError, match="Catalog root element instead of CSBSReq"):
+        streamed("<Catalog><CoreCourses>" + course(1000) + "</CoreCourses></Catalog>")
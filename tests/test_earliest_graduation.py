@@ -0,0 +1,72 @@
+import pytest
+from werkzeug.datastructures import MultiDict
+
+from app.middleware.course_parsing import certificate_registry, earliest_graduation_estimate
+from app.middleware.batch_planning import plan_profile
+from tests.test_planner import BASELINE_SCHEDULES
+
+
+def profile_form(profile):
+    # the home page form of a profile of the golden comparison
+    certificate = profile["certificate"]
+    name = certificate_registry()[certificate]["name"] if certificate else "None"
+    form = MultiDict({
+        "current_semester": profile["current_semester"],
+        "minimum_semester_credits": profile["minimum_semester_credits"],
+        "minimum_summer_credits": profile["minimum_summer_credits"],
+        "total_credits": profile["total_credits"],
+        "ge_taken": profile["ge_taken"],
+        "fe_taken": profile["fe_taken"],
+        "certificate_choice": f"{name},{certificate}"
+    })
+    if profile["include_summer"]:
+        form["include_summer"] = "on"
+    if profile["aleks_check"]:
+        form["aleks_check"] = "on"
+    for course in profile["courses_taken"]:
+        form.add("courses_taken", course)
+    for course in profile["waived_courses"]:
+        form.add("waived_courses", course)
+    return form
+
+
+@pytest.mark.parametrize("case", BASELINE_SCHEDULES,
+                         ids=[f"{case['profile']['certificate'] or 'none'}-{number}"
+                              for number, case in enumerate(BASELINE_SCHEDULES)])
+def test_bound_never_exceeds_the_planned_schedule(case):
+    estimate = earliest_graduation_estimate(profile_form(case["profile"]))
+    assert estimate["terms"] is not None and estimate["unschedulable"] == []
+    assert estimate["terms"] <= len(case["semesters"])
+    assert estimate["terms"] == max(estimate["limits"].values())
+
+
+def test_estimate_names_the_graduation_term(client):
+    response = client.get("/earliest_graduation",
+                          query_string={"current_semester": "Fall", "minimum_semester_credits": 15})
+    assert response.status_code == 200
+    estimate = response.get_json()
+    planned = plan_profile({"current_semester": "Fall", "minimum_semester_credits": 15})
+    assert 0 < estimate["terms"] <= len(planned["semesters"])
+    assert estimate["graduation"]["semester"] in ("Fall", "Spring")
+    assert estimate["critical_path"] and all(isinstance(course, str) for course in estimate["critical_path"])
+
+    # the same fields can be posted, as the home page form does
+    assert client.post("/earliest_graduation", data={"current_semester": "Fall",
+                                                     "minimum_semester_credits": 15}).get_json() == estimate
+
+
+@pytest.mark.parametrize("fields, error", [
+    ({"current_semester": "Fall"}, "Missing field: minimum_semester_credits"),
+    ({"minimum_semester_credits": 15}, "Missing field: current_semester"),
+    ({"current_semester": "Winter", "minimum_semester_credits": 15}, "Unknown semester: Winter"),
+    ({"current_semester": "Fall", "minimum_semester_credits": "fifteen"}, "invalid literal"),
+    ({"current_semester": "Fall", "minimum_semester_credits": 15, "certificate_choice": "Astronomy,ASTROCERTReq"},
+     "Unknown certificate: Astronomy,ASTROCERTReq"),
+    ({"current_semester": "Fall", "minimum_semester_credits": 15, "certificate_choice": "None"},
+     "Unknown certificate: None"),
+    ({"current_semester": "Fall", "minimum_semester_credits": 15, "catalog_version": "0" * 16}, "has been retired")
+])
+def test_invalid_form_input_is_a_bad_request(client, fields, error):
+    response = client.get("/earliest_graduation", query_string=fields)
+    assert response.status_code == 400
+    assert error in response.get_json()["error"]
@@ -0,0 +1,89 @@
+import os
+import shutil
+
+import pytest
+
+from app import routes
+from app.middleware.cached_responses import PageCache
+from app.middleware.course_parsing import catalog_version, certificate_registry_cache, course_catalog_cache
+
+
+@pytest.fixture
+def renders(monkeypatch):
+    # a fresh page cache, and the versions of the catalog each home page was rendered for
+    rendered = []
+
+    def render_home_page(version):
+        rendered.append(version)
+        return render(version)
+
+    render = routes.render_home_page
+    monkeypatch.setattr(routes, "home_pages", PageCache())
+    monkeypatch.setattr(routes, "render_home_page", render_home_page)
+    return rendered
+
+
+def copy_with_change(monkeypatch, tmp_path, cache, change):
+    # points a compiled file cache at a changed copy of its file, the original is used again after the test
+    copy = tmp_path / cache.name
+    shutil.copyfile(cache.path, copy)
+    copy.write_text(change(copy.read_text()))
+    monkeypatch.setattr(cache, "path", str(copy))
+
+
+def test_second_request_is_served_from_the_cache(client, renders):
+    first = client.get("/")
+    second = client.get("/index")
+    assert first.status_code == second.status_code == 200
+    assert second.data == first.data and second.get_etag() == first.get_etag()
+    assert renders == [catalog_version()]
+
+
+def test_matching_etag_is_not_modified(client, renders):
+    etag, _ = client.get("/").get_etag()
+    response = client.get("/", headers={"If-None-Match": f'"{etag}"'})
+    assert response.status_code == 304 and response.data == b""
+    # the page may change at any time, so browsers always ask
+    assert response.cache_control.max_age == 0
+    assert client.get("/", headers={"If-None-Match": '"another-page"'}).status_code == 200
+    assert len(renders) == 1
+
+
+def test_edited_template_renders_the_page_again(client, renders):
+    template = os.path.join(routes.app.root_path, routes.app.template_folder, "home_page.html")
+    stat = os.stat(template)
+    etag, _ = client.get("/").get_etag()
+    try:
+        os.utime(template, ns=(stat.st_atime_ns, stat.st_mtime_ns + 1_000_000_000))
+        response = client.get("/", headers={"If-None-Match": f'"{etag}"'})
+    finally:
+        os.utime(template, ns=(stat.st_atime_ns, stat.st_mtime_ns))
+    # the same content renders the same page, so a browser holding it still gets a 304
+    assert response.status_code == 304
+    assert len(renders) == 2
+
+
+def test_changed_catalog_renders_the_page_again(client, renders, monkeypatch, tmp_path):
+    old_version = catalog_version()
+    old_page = client.get("/")
+    copy_with_change(monkeypatch, tmp_path, course_catalog_cache,
+                     lambda text: text.replace("Introduction to iOS Programming and Apps",
+                                               "Introduction to iOS and Swift Programming"))
+    new_version = catalog_version()
+    assert new_version != old_version
+
+    response = client.get("/", headers={"If-None-Match": old_page.headers["ETag"]})
+    assert response.status_code == 200 and response.get_etag() != old_page.get_etag()
+    assert f"/api/catalog/{new_version}.json".encode() in response.data
+    assert renders == [old_version, new_version]
+
+
+def test_changed_certificates_render_the_page_again(client, renders, monkeypatch, tmp_path):
+    old_digest = certificate_registry_cache.digest
+    client.get("/")
+    copy_with_change(monkeypatch, tmp_path, certificate_registry_cache, lambda text: text + "\n")
+    assert certificate_registry_cache.digest != old_digest
+
+    client.get("/")
+    client.get("/")
+    assert renders == [catalog_version()] * 2
@@ -0,0 +1,94 @@
+import copy
+import os
+import pickle
+
+import pytest
+
+from app.middleware.catalog_cache import FrozenDict, thaw
+from app.middleware.course_parsing import certificate_registry_cache, course_catalog_cache
+from app.middleware.mapped_catalog import MappedDict, MappedList, MappedTable, write_table
+
+TREE = {
+    "zeta": [1, -2, 2 ** 31 - 1, -2 ** 31, None, "", "naïve ☃"],
+    "alpha": {"nested": {"deeper": ["x", {"y": "z"}]}, "empty_dict": {}, "empty_list": []},
+    "MATH 1030": "MATH 1030",
+    "": 0
+}
+
+
+def mapped(tmp_path, value, name="table.bin"):
+    path = tmp_path / name
+    with open(path, "wb") as fd:
+        write_table(value, fd)
+    fd = open(path, "rb")
+    table = MappedTable(fd)
+    fd.close()
+    return table.value(table.root)
+
+
+def test_table_round_trip(tmp_path):
+    root = mapped(tmp_path, TREE)
+    assert isinstance(root, MappedDict) and isinstance(root["zeta"], MappedList)
+    assert thaw(root) == TREE
+    assert list(root) == list(TREE)
+    assert root["zeta"] == tuple(TREE["zeta"])
+    assert root["zeta"][-1] == "naïve ☃" and root["zeta"][1:3] == (-2, 2 ** 31 - 1)
+    assert root["alpha"]["nested"]["deeper"][1]["y"] == "z"
+    assert dict(root["alpha"].items())["empty_dict"] == {}
+
+
+def test_table_lookups(tmp_path):
+    root = mapped(tmp_path, {f"course {number}": number for number in range(500)})
+    assert len(root) == 500
+    assert all(root[f"course {number}"] == number for number in range(0, 500, 7))
+    assert "course 499" in root and "course 500" not in root and 3 not in root
+    assert root.get("missing") is None
+    with pytest.raises(KeyError):
+        root["missing"]
+    with pytest.raises(IndexError):
+        mapped(tmp_path, [1, 2], "list.bin")[2]
+
+
+def test_views_copy_and_pickle_as_regular_data(tmp_path):
+    root = mapped(tmp_path, TREE)
+    private = copy.deepcopy(root)
+    assert type(private) is dict and type(private["zeta"]) is list and private == TREE
+    private["alpha"]["nested"] = None
+    assert root["alpha"]["nested"]["deeper"][0] == "x"
+
+    unpickled = pickle.loads(pickle.dumps(root))
+    assert isinstance(unpickled, FrozenDict) and thaw(unpickled) == TREE
+
+
+def test_table_rejects_values_it_cannot_store(tmp_path):
+    for value, error in (({"big": 2 ** 31}, ValueError), ({1: "not a string key"}, TypeError),
+                         ({"float": 1.5}, TypeError)):
+        with pytest.raises(error):
+            mapped(tmp_path, value)
+
+
+def test_truncated_table_is_rejected(tmp_path):
+    path = tmp_path / "table.bin"
+    with open(path, "wb") as fd:
+        write_table(TREE, fd)
+    data = path.read_bytes()
+    path.write_bytes(data[:-3])
+    with open(path, "rb") as fd, pytest.raises(ValueError):
+        MappedTable(fd)
+
+
+def test_mapping_stays_valid_when_the_table_is_replaced(tmp_path):
+    # the snapshot is replaced with os.replace, workers keep reading the table they mapped
+    root = mapped(tmp_path, TREE)
+    replacement = tmp_path / "replacement.bin"
+    with open(replacement, "wb") as fd:
+        write_table({"other": "table"}, fd)
+    os.replace(replacement, tmp_path / "table.bin")
+    assert thaw(root) == TREE
+
+
+def test_catalog_is_served_from_the_mapped_snapshot():
+    for cache in (course_catalog_cache, certificate_registry_cache):
+        compiled = cache.get()
+        assert isinstance(compiled, MappedDict)
+        assert thaw(compiled) == thaw(cache.compile_file()[1])
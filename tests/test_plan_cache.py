@@ -0,0 +1,88 @@
+import logging
+import multiprocessing
+import os
+import subprocess
+import sys
+
+from app.middleware.batch_planning import planner_settings, profile_request
+from app.middleware.course_parsing import certificate_choices, plan_semester
+from app.middleware.plan_cache import PlanCache, warm_up
+from tests.test_planner import BASELINE_SCHEDULES
+
+# a small warm-up grid: every certificate, starting in Fall with 15 credits and 6 in the summers
+WARM_UP_CONFIG = dict(planner_settings(), SCHEDULER_WARM_UP_SEMESTERS=["Fall"], SCHEDULER_WARM_UP_CREDITS=[15],
+                      SCHEDULER_WARM_UP_SUMMER_CREDITS=[6])
+WARM_UP_ENVIRONMENT = {"FLASK_SCHEDULER_WARM_UP": "true", "FLASK_SCHEDULER_WARM_UP_SEMESTERS": '["Fall"]',
+                       "FLASK_SCHEDULER_WARM_UP_CREDITS": "[15]", "FLASK_SCHEDULER_WARM_UP_SUMMER_CREDITS": "[6]"}
+
+
+def test_cached_plan_matches_a_fresh_plan():
+    settings = planner_settings()
+    profile = BASELINE_SCHEDULES[0]["profile"]
+    cache = PlanCache(16)
+    missed = cache.plan(profile_request(profile), settings)
+    hit = cache.plan(profile_request(dict(profile, user_name="Another Student")), settings)
+    fresh = plan_semester(profile_request(profile), settings)
+
+    assert cache.stats()["hits"] == 1
+    assert hit.course_schedule == missed.course_schedule == fresh.course_schedule
+    assert hit.user_name == hit.scheduler_state["user_name"] == "Another Student"
+
+
+def test_warm_up_plans_the_grid_into_the_cache():
+    cache = PlanCache(64)
+    summary = warm_up(cache, WARM_UP_CONFIG)
+    assert summary["planned"] == len(certificate_choices()) and summary["failed"] == 0
+    assert cache.stats()["entries"] == len(certificate_choices())
+
+    # a student with the same choices is served from the cache
+    cache.plan(profile_request({"current_semester": "Fall", "minimum_semester_credits": 15,
+                                 "include_summer": True, "minimum_summer_credits": 6}), planner_settings())
+    assert cache.stats()["hits"] == 1
+
+
+def test_warm_up_logs_and_skips_failing_profiles(caplog, monkeypatch):
+    cache = PlanCache(64)
+    plan = cache.plan
+
+    def failing_plan(request, settings):
+        if request.certificate_choice[1] == "AICERTReq":
+            raise RuntimeError("planner bug")
+        return plan(request, settings)
+
+    monkeypatch.setattr(cache, "plan", failing_plan)
+    config = dict(WARM_UP_CONFIG, SCHEDULER_WARM_UP_SEMESTERS=["Fall", "Winter"])
+    with caplog.at_level(logging.WARNING, logger="app.middleware.plan_cache"):
+        summary = warm_up(cache, config)
+
+    certificates = len(certificate_choices())
+    assert summary["planned"] == certificates - 1 and summary["failed"] == certificates + 1
+    assert cache.stats()["entries"] == certificates - 1
+    skipped = [record for record in caplog.records if record.getMessage().startswith("Skipped warming up")]
+    assert len(skipped) == certificates + 1
+    assert sum("Unknown semester: Winter" in record.getMessage() for record in skipped) == certificates
+    assert [record.exc_info[1].args for record in skipped if record.exc_info] == [("planner bug",)]
+
+
+def warmed_up_schedules(results):
+    # imports the app in a process started by multiprocessing, as the workers of the planning pool are
+    from app import plan_results
+    results.put(plan_results.stats()["entries"])
+
+
+def test_only_the_server_warms_up(monkeypatch):
+    environment = dict(os.environ, **WARM_UP_ENVIRONMENT)
+    server = subprocess.run([sys.executable, "-c", "from app import plan_results; print(plan_results.stats()['entries'])"],
+                            env=environment, capture_output=True, text=True, check=True)
+    assert int(server.stdout) == len(certificate_choices())
+
+    for name, value in WARM_UP_ENVIRONMENT.items():
+        monkeypatch.setenv(name, value)
+    context = multiprocessing.get_context("spawn")
+    results = context.Queue()
+    worker = context.Process(target=warmed_up_schedules, args=(results,))
+    worker.start()
+    try:
+        assert results.get(timeout=60) == 0
+    finally:
+        worker.join()
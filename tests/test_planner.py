@@ -0,0 +1,36 @@
+import json
+import os
+
+import pytest
+
+from app.middleware.batch_planning import plan_profile
+from app.middleware.course_parsing import catalog_version, course_model, plan_required_courses
+
+# complete schedules planned by the planner before it was moved onto the course model, for a sample of profiles
+with open(os.path.join(os.path.dirname(__file__), "data", "baseline_schedules.json")) as fd:
+    BASELINE_SCHEDULES = json.load(fd)
+
+
+def semesters_of(course_schedule):
+    return [[semester["semester"], semester["credits"], [entry["course"] for entry in semester["schedule"]]]
+            for semester in course_schedule]
+
+
+@pytest.mark.parametrize("case", BASELINE_SCHEDULES,
+                         ids=[f"{case['profile']['certificate'] or 'none'}-{number}"
+                              for number, case in enumerate(BASELINE_SCHEDULES)])
+def test_complete_schedule_matches_the_baseline_planner(case):
+    result = plan_profile(case["profile"])
+    assert semesters_of(result["semesters"]) == case["semesters"]
+    assert result["total_credits"] == case["total_credits"]
+    assert result["is_graduated"] == case["is_graduated"]
+
+
+def test_required_courses_leave_the_taken_courses_of_the_caller_alone():
+    model = course_model(catalog_version())
+    courses_taken = model.ids_of(["MATH 1320"])
+    _, remaining_courses, planned_taken = plan_required_courses(model, courses_taken, 0, True)
+
+    assert courses_taken == model.ids_of(["MATH 1320"])
+    assert planned_taken == courses_taken + [model.id_of("ALEKS")]
+    assert model.id_of("MATH 1030") not in remaining_courses
@@ -0,0 +1,59 @@
+import json
+
+from app import scheduler_sessions
+from app.middleware.batch_planning import planner_settings, profile_request
+from app.middleware.course_parsing import catalog_version, plan_semester
+
+
+def home_page_form(**fields):
+    # the fields the home page posts for a new student starting in Fall, with 15 credits per semester
+    form = {
+        "current_semester": "Fall", "minimum_semester_credits": "15", "minimum_summer_credits": "0",
+        "semester_number": "0", "num_3000_replaced_by_cert_core": "0", "first_semester": "", "semester_years": "{}",
+        "user_name": "Student", "ge_taken": "0", "fe_taken": "0", "gen_ed_credits_still_needed": "27",
+        "cert_elective_courses_still_needed": "0", "min_3000_course": "5", "total_credits": "0",
+        "certificate_choice": "None,", "course_schedule": "[]", "catalog_version": catalog_version(),
+        "single_semester": "Generate Semester"
+    }
+    form.update(fields)
+    return form
+
+
+def test_print_without_a_schedule_token_goes_back_to_the_home_page(client):
+    response = client.post("/schedule", data={"Print": "Print View", "course_schedule": "[]"})
+    assert response.status_code == 302 and response.location == "/index"
+
+
+def test_print_with_an_expired_schedule_token_goes_back_to_the_home_page(client):
+    response = client.post("/schedule", data={"Print": "Print View", "course_schedule": "[]",
+                                              "schedule_token": "expired"})
+    assert response.status_code == 302 and response.location == "/index"
+
+
+def test_print_reads_its_counters_from_the_saved_state(client):
+    result = plan_semester(profile_request({"current_semester": "Fall", "minimum_semester_credits": 15,
+                                            "user_name": "Printed Student"}), planner_settings())
+    token = scheduler_sessions.create(result.scheduler_state)
+    response = client.post("/schedule", data={"Print": "Print View", "schedule_token": token,
+                                              "course_schedule": json.dumps(result.course_schedule)})
+    assert response.status_code == 200
+    assert b"Printed Student" in response.data
+
+
+def test_home_page_form_plans_the_first_semester(client):
+    response = client.post("/schedule", data=home_page_form())
+    assert response.status_code == 200
+    assert b'name="schedule_token"' in response.data
+
+
+def test_stale_catalog_version_goes_back_to_the_home_page(client):
+    # a home page loaded before course_data.xml changed posts the version it was built from
+    for fields in ({}, {"generate_complete_schedule": "on"}):
+        response = client.post("/schedule", data=home_page_form(catalog_version="0" * 16, **fields))
+        assert response.status_code == 302 and response.location == "/index"
+
+
+def test_complete_schedule_that_never_graduates_is_unprocessable(client):
+    response = client.post("/schedule", data=home_page_form(ge_taken="1", generate_complete_schedule="on"))
+    assert response.status_code == 422
+    assert b"does not graduate within 60 semesters" in response.data
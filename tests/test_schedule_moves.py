@@ -0,0 +1,256 @@
+import copy
+import random
+
+import pytest
+
+from app import scheduler_sessions
+from app.middleware.batch_planning import planner_settings, profile_request
+from app.middleware.course_parsing import plan_semester
+from app.middleware.schedule_moves import SchedulePositions, replan_after_move, validate_moves
+from tests.test_routes import home_page_form
+
+
+def planned(profile):
+    result = plan_semester(profile_request(profile), planner_settings())
+    return result.scheduler_state, result.course_schedule
+
+
+@pytest.fixture(scope="module")
+def fall_schedule():
+    # semester 1 (Spring) holds CMP SCI 1250, semester 2 (Fall) CMP SCI 2250 and 2261, semester 3 (Spring) CMP SCI 2700
+    return planned({"current_semester": "Fall", "minimum_semester_credits": 15})
+
+
+@pytest.fixture(scope="module")
+def summer_schedule():
+    return planned({"current_semester": "Fall", "minimum_semester_credits": 15, "include_summer": True,
+                    "minimum_summer_credits": 6})
+
+
+def semester_of(course_schedule, course):
+    return next(index for index, semester in enumerate(course_schedule)
+                if any(entry["course"] == course for entry in semester["schedule"]))
+
+
+def verdicts_of(schedule, moves):
+    scheduler_state, course_schedule = schedule
+    return {verdict["course"]: verdict
+            for verdict in validate_moves(scheduler_state, copy.deepcopy(course_schedule), moves)}
+
+
+def replanned(schedule, course, semester):
+    scheduler_state, course_schedule = schedule
+    return replan_after_move(scheduler_state, copy.deepcopy(course_schedule), course, semester)
+
+
+def test_schedule_layout(fall_schedule):
+    _, course_schedule = fall_schedule
+    assert [semester_of(course_schedule, course) for course in
+            ("INTDSC 1003", "CMP SCI 1250", "CMP SCI 2250", "CMP SCI 2261", "CMP SCI 2700")] == [0, 1, 2, 2, 3]
+
+
+def test_valid_move(fall_schedule):
+    verdicts = verdicts_of(fall_schedule, [{"course": "CMP SCI 2700", "semester": 4}])
+    assert verdicts["CMP SCI 2700"] == {"course": "CMP SCI 2700", "semester": 4, "reason": None, "after": None}
+
+
+def test_move_before_a_prerequisite(fall_schedule):
+    verdicts = verdicts_of(fall_schedule, [{"course": "CMP SCI 2250", "semester": 1}])
+    assert verdicts["CMP SCI 2250"]["reason"] == \
+        "CMP SCI 2250 prerequisite (CMP SCI 1250) has to be completed prior to the selected semester!"
+    # CMP SCI 2261 may be taken together with CMP SCI 2250, so moving that earlier does not break it
+    assert verdicts["CMP SCI 2261"] == {"course": "CMP SCI 2261", "semester": 2, "reason": None,
+                                        "after": "CMP SCI 2250"}
+
+
+def test_move_breaks_the_courses_that_depend_on_it(fall_schedule):
+    verdicts = verdicts_of(fall_schedule, [{"course": "CMP SCI 2250", "semester": 4}])
+    assert verdicts["CMP SCI 2250"]["reason"] is None
+    assert verdicts["CMP SCI 2261"]["after"] == "CMP SCI 2250"
+    assert verdicts["CMP SCI 2261"]["reason"] == \
+        "CMP SCI 2261 prerequisite (CMP SCI 2250) has to be completed prior to the selected semester!"
+
+
+def test_later_move_repairs_a_dependent(fall_schedule):
+    verdicts = verdicts_of(fall_schedule, [{"course": "CMP SCI 2250", "semester": 4},
+                                           {"course": "CMP SCI 2261", "semester": 4}])
+    assert verdicts["CMP SCI 2250"]["reason"] is None
+    assert verdicts["CMP SCI 2261"] == {"course": "CMP SCI 2261", "semester": 4, "reason": None, "after": None}
+
+
+def test_course_that_must_be_taken_first(fall_schedule):
+    verdicts = verdicts_of(fall_schedule, [{"course": "INTDSC 1003", "semester": 1}])
+    assert verdicts["INTDSC 1003"]["reason"] == "INTDSC 1003 must be taken in the first semester!"
+
+
+def test_move_to_a_term_the_course_is_not_offered(summer_schedule):
+    _, course_schedule = summer_schedule
+    summer = next(index for index, semester in enumerate(course_schedule) if semester["semester"] == "Summer")
+    verdicts = verdicts_of(summer_schedule, [{"course": "CMP SCI 4500", "semester": summer}])
+    assert verdicts["CMP SCI 4500"]["reason"] == "CMP SCI 4500 is not offered during the Summer semester!"
+
+
+def test_moves_update_the_schedule_in_place(fall_schedule):
+    scheduler_state, course_schedule = fall_schedule
+    course_schedule = copy.deepcopy(course_schedule)
+    credits = [semester["credits"] for semester in course_schedule]
+    validate_moves(scheduler_state, course_schedule, [{"course": "CMP SCI 2700", "semester": "4"}])
+    assert semester_of(course_schedule, "CMP SCI 2700") == 4
+    assert course_schedule[3]["credits"] == credits[3] - 3 and course_schedule[4]["credits"] == credits[4] + 3
+
+
+def test_invalid_moves_are_rejected(fall_schedule):
+    scheduler_state, course_schedule = fall_schedule
+    for move in ({"course": "CMP SCI 9999", "semester": 1}, {"course": "GEN ED", "semester": 1},
+                 {"course": "CMP SCI 2700", "semester": len(course_schedule)},
+                 {"course": "CMP SCI 2700", "semester": -1}):
+        with pytest.raises(ValueError):
+            validate_moves(scheduler_state, copy.deepcopy(course_schedule), [move])
+
+
+def test_moves_keep_the_running_totals_of_a_fresh_index(fall_schedule):
+    scheduler_state, course_schedule = fall_schedule
+    course_schedule = copy.deepcopy(course_schedule)
+    positions = SchedulePositions.from_state(scheduler_state, course_schedule)
+    courses = list(positions.positions)
+    rng = random.Random(3)
+    for _ in range(60):
+        positions.move(rng.choice(courses), rng.randrange(len(course_schedule)))
+        fresh = SchedulePositions(positions.model, course_schedule, positions.courses_taken,
+                                  positions.starting_credits)
+        assert positions.prefix_masks == fresh.prefix_masks
+        assert positions.prefix_credits == fresh.prefix_credits
+        for course_id in courses:
+            index = positions.semester_of(course_id)
+            assert positions.check(course_id, index) == fresh.check(course_id, index)
+            # no semester before the first possible one passes the check
+            first = positions.first_possible(course_id, 0)
+            assert all(positions.check(course_id, earlier) is not None for earlier in range(first))
+
+
+def test_replan_pushes_dependents_to_their_first_possible_semester(fall_schedule):
+    scheduler_state, _ = fall_schedule
+    result = replanned(fall_schedule, "CMP SCI 2250", 4)
+    assert result["verdict"] is None and result["unschedulable"] == []
+    assert result["first_changed_semester"] == 2
+    assert result["moved"][0] == {"course": "CMP SCI 2250", "from": 2, "to": 4}
+    assert {"course": "CMP SCI 2261", "from": 2, "to": 4} in result["moved"]
+
+    # every pushed course can be taken where it went, and in no semester between where it was and there
+    positions = SchedulePositions.from_state(scheduler_state, result["course_schedule"])
+    for moved in result["moved"][1:]:
+        course_id = positions.model.id_of(moved["course"])
+        assert positions.semester_of(course_id) == moved["to"]
+        assert positions.check(course_id, moved["to"]) is None
+        assert all(positions.check(course_id, earlier) is not None for earlier in range(moved["from"], moved["to"]))
+
+
+def test_replanned_schedule_passes_validation(fall_schedule):
+    scheduler_state, course_schedule = fall_schedule
+    result = replanned(fall_schedule, "CMP SCI 2250", 4)
+    moves = [{"course": moved["course"], "semester": moved["to"]} for moved in result["moved"]]
+    verdicts = validate_moves(scheduler_state, copy.deepcopy(course_schedule), moves)
+    assert verdicts and all(verdict["reason"] is None for verdict in verdicts)
+
+    # moving the courses on the page the same way gives the same schedule
+    validated = copy.deepcopy(course_schedule)
+    validate_moves(scheduler_state, validated, moves)
+    assert [semester["credits"] for semester in validated] == \
+        [semester["credits"] for semester in result["course_schedule"]]
+
+
+def test_replan_keeps_other_courses_in_place(fall_schedule):
+    _, course_schedule = fall_schedule
+    result = replanned(fall_schedule, "CMP SCI 2250", 4)
+    moved = {moved["course"] for moved in result["moved"]}
+    for index, semester in enumerate(course_schedule):
+        for entry in semester["schedule"]:
+            if entry["course"] not in moved and entry["course"] not in ("GEN ED", "FREE", "CMP SCI 3000+"):
+                assert semester_of(result["course_schedule"], entry["course"]) == index
+
+
+def test_dependents_that_would_go_past_the_last_semester_stay_and_are_marked(fall_schedule):
+    _, course_schedule = fall_schedule
+    last = len(course_schedule) - 1
+    result = replanned(fall_schedule, "CMP SCI 2250", last)
+    assert result["verdict"] is None
+    unschedulable = {failure["course"]: failure for failure in result["unschedulable"]}
+    # CMP SCI 2750 needs CMP SCI 2250 in an earlier semester, which the last semester cannot follow
+    assert unschedulable["CMP SCI 2750"] == {
+        "course": "CMP SCI 2750", "semester": 3,
+        "reason": "CMP SCI 2750 prerequisite (CMP SCI 2250) has to be completed prior to the selected semester!"}
+    assert all(moved["to"] <= last for moved in result["moved"])
+
+    for failure in result["unschedulable"]:
+        entry = next(entry for entry in result["course_schedule"][failure["semester"]]["schedule"]
+                     if entry["course"] == failure["course"])
+        assert entry["passed_validation"] is False and entry["validation_msg"] == failure["reason"]
+
+
+def test_replan_of_a_course_already_in_place(fall_schedule):
+    # the schedule page moves the dropped course itself and then asks for its dependents to be re-planned
+    scheduler_state, course_schedule = fall_schedule
+    dropped = copy.deepcopy(course_schedule)
+    validate_moves(scheduler_state, dropped, [{"course": "CMP SCI 2250", "semester": 4}])
+    result = replan_after_move(scheduler_state, dropped, "CMP SCI 2250", 4)
+    expected = replanned(fall_schedule, "CMP SCI 2250", 4)
+    assert result["moved"][0] == {"course": "CMP SCI 2250", "from": 4, "to": 4}
+    assert result["moved"][1:] == expected["moved"][1:]
+    assert [semester["credits"] for semester in result["course_schedule"]] == \
+        [semester["credits"] for semester in expected["course_schedule"]]
+
+
+def test_replan_reports_a_move_that_breaks_the_moved_course(fall_schedule):
+    result = replanned(fall_schedule, "CMP SCI 2250", 1)
+    assert result["verdict"] == \
+        "CMP SCI 2250 prerequisite (CMP SCI 1250) has to be completed prior to the selected semester!"
+    assert result["first_changed_semester"] == 1
+
+
+def test_invalid_replans_are_rejected(fall_schedule):
+    _, course_schedule = fall_schedule
+    for course, semester in (("CMP SCI 9999", 1), ("CMP SCI 2700", len(course_schedule)), ("CMP SCI 2700", -1)):
+        with pytest.raises(ValueError):
+            replanned(fall_schedule, course, semester)
+
+
+def test_replan_api(client, fall_schedule):
+    scheduler_state, course_schedule = fall_schedule
+    token = scheduler_sessions.create(scheduler_state)
+    payload = {"schedule_token": token, "course_schedule": course_schedule,
+               "move": {"course": "CMP SCI 2250", "semester": "4"}}
+    response = client.post("/api/replan", json=payload)
+    assert response.status_code == 200
+    assert response.get_json() == replanned(fall_schedule, "CMP SCI 2250", 4)
+
+    assert client.post("/api/replan", json=dict(payload, schedule_token="expired")).status_code == 404
+    assert client.post("/api/replan", data="not json").status_code == 400
+    response = client.post("/api/replan", json={"schedule_token": token, "course_schedule": course_schedule})
+    assert response.status_code == 400 and response.get_json() == {"error": "Missing field: move"}
+    response = client.post("/api/replan", json=dict(payload, move={"course": "CMP SCI 9999", "semester": 1}))
+    assert response.status_code == 400
+
+
+def test_schedule_page_connects_the_replan_checkbox(client):
+    response = client.post("/schedule", data=home_page_form(generate_complete_schedule="on"))
+    assert response.status_code == 200
+    page = response.get_data(as_text=True)
+    assert 'id="replan_dependents"' in page and 'id="replan_url" value="/api/replan"' in page
+    assert 'id="move_error"' in page
+
+
+def test_validate_moves_api(client, fall_schedule):
+    scheduler_state, course_schedule = fall_schedule
+    token = scheduler_sessions.create(scheduler_state)
+    moves = [{"course": "CMP SCI 2250", "semester": 4}]
+    payload = {"schedule_token": token, "course_schedule": course_schedule, "moves": moves}
+    response = client.post("/api/validate_moves", json=payload)
+    assert response.status_code == 200
+    assert response.get_json() == {"verdicts": validate_moves(scheduler_state, copy.deepcopy(course_schedule), moves)}
+
+    # the page shows the error of a failed check, so every failure comes back as JSON with an `error`
+    for status, body in ((404, dict(payload, schedule_token="expired")),
+                         (400, {"schedule_token": token, "course_schedule": course_schedule}),
+                         (400, dict(payload, moves=[{"course": "CMP SCI 9999", "semester": 1}]))):
+        response = client.post("/api/validate_moves", json=body)
+        assert response.status_code == status and response.get_json()["error"]
@@ -0,0 +1,86 @@
+import itertools
+import time
+
+import pytest
+
+from app.middleware.batch_planning import planner_settings, profile_request
+from app.middleware.course_model import LATEST_SEMESTER_FOR_COURSE
+from app.middleware.course_parsing import plan_semester
+from app.middleware.schedule_moves import SchedulePositions
+from app.middleware.schedule_search import ScheduleSearch
+from tests.test_planner import BASELINE_SCHEDULES
+
+# a short budget keeps the suite fast, it still shortens several of the golden profiles
+SEARCH_SETTINGS = dict(planner_settings(), SCHEDULER_SEARCH_TIME_BUDGET=0.1)
+
+
+@pytest.fixture(scope="module")
+def planned_schedules():
+    # the greedy and the optimized complete schedule of every golden profile
+    schedules = []
+    for case in BASELINE_SCHEDULES:
+        greedy = plan_semester(profile_request(case["profile"]), SEARCH_SETTINGS)
+        optimized = plan_semester(profile_request(dict(case["profile"], optimize_schedule=True)), SEARCH_SETTINGS)
+        schedules.append((greedy, optimized))
+    return schedules
+
+
+def failed_checks(result):
+    positions = SchedulePositions.from_state(result.scheduler_state, result.course_schedule)
+    return {positions.model.names[course_id]: positions.check(course_id, index)
+            for course_id, index in positions.positions.items() if positions.check(course_id, index) is not None}
+
+
+def test_optimized_schedule_is_never_longer_than_the_greedy_one(planned_schedules):
+    for greedy, optimized in planned_schedules:
+        assert optimized.is_graduated and optimized.total_credits >= 120
+        assert len(optimized.course_schedule) <= len(greedy.course_schedule)
+        assert optimized.semester_number == len(optimized.course_schedule)
+    assert any(len(optimized.course_schedule) < len(greedy.course_schedule)
+               for greedy, optimized in planned_schedules)
+
+
+def test_optimized_schedule_keeps_every_course_rule(planned_schedules):
+    for greedy, optimized in planned_schedules:
+        failures = failed_checks(optimized)
+        # prerequisites, term offerings and minimum credits always hold
+        assert set(failures) <= set(LATEST_SEMESTER_FOR_COURSE), failures
+        # a course is only later than the page wants it where the greedy schedule cannot place it in time either
+        assert failures.items() <= failed_checks(greedy).items()
+
+
+def test_search_stops_when_the_time_budget_runs_out(monkeypatch):
+    budgets = []
+    run = ScheduleSearch.run
+
+    def timed_run(search, upper_bound, time_budget):
+        started = time.monotonic()
+        result = run(search, upper_bound, time_budget)
+        budgets.append((time_budget, time.monotonic() - started))
+        return result
+
+    monkeypatch.setattr(ScheduleSearch, "run", timed_run)
+    for case in BASELINE_SCHEDULES[:6]:
+        plan_semester(profile_request(dict(case["profile"], optimize_schedule=True)),
+                      dict(SEARCH_SETTINGS, SCHEDULER_SEARCH_TIME_BUDGET=0.05))
+    assert len(budgets) == 6
+    for time_budget, elapsed in budgets:
+        assert time_budget == 0.05 and elapsed < time_budget + 0.1
+
+
+def test_search_without_time_left_keeps_the_greedy_schedule(monkeypatch):
+    # a clock that has run out right after the search started
+    ticks = itertools.chain([0.0], itertools.repeat(1.0))
+    created = []
+
+    class ExpiredSearch(ScheduleSearch):
+        def __init__(self, *args, **kwargs):
+            super().__init__(*args, **kwargs, clock=lambda: next(ticks))
+            created.append(self)
+
+    monkeypatch.setattr("app.middleware.course_parsing.ScheduleSearch", ExpiredSearch)
+    profile = BASELINE_SCHEDULES[0]["profile"]
+    greedy = plan_semester(profile_request(profile), SEARCH_SETTINGS)
+    optimized = plan_semester(profile_request(dict(profile, optimize_schedule=True)), SEARCH_SETTINGS)
+    assert len(created) == 1
+    assert optimized.course_schedule == greedy.course_schedule
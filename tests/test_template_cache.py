@@ -0,0 +1,75 @@
+import logging
+import os
+import subprocess
+import sys
+
+from app import app
+from app.middleware.template_cache import SharedBytecodeCache, create_bytecode_cache
+from tests.test_routes import home_page_form
+
+
+def test_precompile_templates_fills_the_cache_directory(monkeypatch, tmp_path):
+    monkeypatch.setattr(app.jinja_env, "bytecode_cache", SharedBytecodeCache(str(tmp_path)))
+    result = app.test_cli_runner().invoke(args=["precompile-templates"])
+    assert result.exit_code == 0, result.output
+
+    templates = app.jinja_env.list_templates()
+    assert f"Compiled {len(templates)} templates into {tmp_path}" in result.output
+    assert len([name for name in os.listdir(tmp_path) if name.endswith(".cache")]) == len(templates)
+
+
+def test_precompile_templates_without_a_cache(monkeypatch):
+    monkeypatch.setattr(app.jinja_env, "bytecode_cache", None)
+    result = app.test_cli_runner().invoke(args=["precompile-templates"])
+    assert result.exit_code != 0 and "there is no bytecode cache to fill" in result.output
+
+
+def test_missing_cache_directory_is_created(tmp_path):
+    directory = tmp_path / "instance" / "jinja_bytecode"
+    assert isinstance(create_bytecode_cache({"SCHEDULER_TEMPLATE_CACHE_DIR": str(directory)}), SharedBytecodeCache)
+    assert directory.is_dir()
+    assert create_bytecode_cache({"SCHEDULER_TEMPLATE_CACHE_DIR": None}) is None
+
+
+def test_cache_directory_that_cannot_be_created_disables_the_cache(tmp_path, caplog):
+    blocked = tmp_path / "file"
+    blocked.write_text("")
+    with caplog.at_level(logging.WARNING, logger="app.middleware.template_cache"):
+        assert create_bytecode_cache({"SCHEDULER_TEMPLATE_CACHE_DIR": str(blocked / "jinja_bytecode")}) is None
+    assert "Not caching compiled templates" in caplog.text
+
+
+def test_app_starts_without_its_cache_directory(tmp_path):
+    environment = dict(os.environ, FLASK_SCHEDULER_TEMPLATE_CACHE_DIR=str(tmp_path / "file" / "jinja_bytecode"))
+    (tmp_path / "file").write_text("")
+    script = "from app import app; print(app.jinja_env.bytecode_cache, app.test_client().get('/').status_code)"
+    started = subprocess.run([sys.executable, "-c", script], env=environment, capture_output=True, text=True,
+                             check=True)
+    assert started.stdout.split() == ["None", "200"]
+
+
+def render_schedule_page(monkeypatch, bytecode_cache):
+    # compiles the templates from their sources into `bytecode_cache` while a schedule page is rendered
+    monkeypatch.setattr(app.jinja_env, "bytecode_cache", bytecode_cache)
+    app.jinja_env.cache.clear()
+    try:
+        return app.test_client().post("/schedule", data=home_page_form())
+    finally:
+        app.jinja_env.cache.clear()
+
+
+def test_pages_render_when_the_cache_directory_is_removed(monkeypatch, tmp_path):
+    directory = tmp_path / "jinja_bytecode"
+    bytecode_cache = create_bytecode_cache({"SCHEDULER_TEMPLATE_CACHE_DIR": str(directory)})
+    directory.rmdir()
+    assert render_schedule_page(monkeypatch, bytecode_cache).status_code == 200
+
+
+def test_pages_render_when_the_cache_directory_is_read_only(monkeypatch, tmp_path):
+    def read_only(*args, **kwargs):
+        raise PermissionError(13, "Permission denied", str(tmp_path))
+
+    # the files cannot be written, whoever the tests run as
+    monkeypatch.setattr("jinja2.bccache.tempfile.NamedTemporaryFile", read_only)
+    assert render_schedule_page(monkeypatch, SharedBytecodeCache(str(tmp_path))).status_code == 200
+    assert os.listdir(tmp_path) == []